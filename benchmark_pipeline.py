@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Benchmark each pipeline stage on synthetic data at several scales.
+
+Stages: TSV parse, county aggregation, congressional aggregation, the v2
+contest build and its streamed write (write_election_json_v2), CSV emission,
+and shapefile read / reproject / GeoJSON export. With --v1 the v1
+results_by_year document build and its serialization are timed too. Each stage runs --repeat times
+per scale on data from synthetic_data.py and its best time is kept. Every run
+is saved to benchmark_results/run-<timestamp>.json and compared with
+benchmark_results/baseline.json; a stage slower than the baseline by more than
+its threshold is reported as a regression and the exit status is 1.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+import geopandas as gpd
+import pandas as pd
+import process_fl_data_to_csv
+import process_fl_election_data
+from election_loader import ELECTION_DATA_DIR, find_election_files, parse_year_from_filename, read_election_file
+from synthetic_data import SCALES, SYNTHETIC_PLAN, generate
+
+RESULTS_DIR = 'benchmark_results'
+BASELINE_FILE = 'baseline.json'
+
+# Default allowed slowdown against the baseline (0.25 = 25% slower)
+DEFAULT_THRESHOLD = 0.25
+
+# Stages run for 1x and 10x by default; 100x takes minutes per stage
+DEFAULT_SCALES = [1, 10]
+
+# Projection used for the reproject stage (Florida GDL Albers)
+REPROJECT_CRS = 'EPSG:3086'
+
+def timed(func, repeat):
+    """Best wall time of func over repeat runs, with its printed output discarded; returns (seconds, result)"""
+    best, result = None, None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def stage_result(seconds, rows):
+    """Timing record for one stage; rows is its unit of work (characters or bytes for serialization)"""
+    return {'seconds': round(seconds, 6), 'rows': rows, 'rows_per_sec': round(rows / seconds) if seconds else None}
+
+def write_v2(contests, tmp):
+    """Write contests with the streaming v2 writer to a fresh file in tmp; returns its size in bytes"""
+    path = os.path.join(tmp, 'fl_election_v2.json')
+    process_fl_election_data.write_election_json_v2(
+        (contest for _, year_contests in contests for contest in year_contests), output_file=path)
+    size = os.path.getsize(path)
+    os.remove(path)
+    return size
+
+def benchmark_scale(root, repeat, v1=False):
+    """Run every stage against the synthetic data in root; returns {stage: result}"""
+    files = find_election_files(os.path.join(root, ELECTION_DATA_DIR))
+    years = [parse_year_from_filename(path) for path in files]
+    results = {}
+    
+    seconds, frames = timed(lambda: [read_election_file(path) for path in files], repeat)
+    raw_rows = sum(len(df) for df in frames)
+    results['tsv_parse'] = stage_result(seconds, raw_rows)
+    
+    classify = process_fl_data_to_csv.classify_election_rows
+    seconds, county = timed(lambda: [process_fl_data_to_csv.aggregate_county_results(classify(df), year)
+                                     for df, year in zip(frames, years)], repeat)
+    results['county_aggregation'] = stage_result(seconds, raw_rows)
+    
+    seconds, congressional = timed(lambda: [process_fl_data_to_csv.aggregate_congressional_results(classify(df), year)
+                                            for df, year in zip(frames, years)], repeat)
+    results['congressional_aggregation'] = stage_result(seconds, raw_rows)
+    
+    seconds, contests = timed(lambda: [(year, process_fl_election_data.build_year_contests(df, year))
+                                       for df, year in zip(frames, years)], repeat)
+    results['election_json_build'] = stage_result(seconds, raw_rows)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        seconds, size = timed(lambda: write_v2(contests, tmp), repeat)
+    results['election_json_write'] = stage_result(seconds, size)
+    
+    if v1:
+        seconds, data = timed(lambda: process_fl_election_data.build_v1_document(contests), repeat)
+        results['results_json_v1_build'] = stage_result(seconds, raw_rows)
+        
+        seconds, text = timed(lambda: json.dumps(data, indent=2), repeat)
+        results['results_json_v1_serialize'] = stage_result(seconds, len(text))
+    
+    county = [t for t in county if t is not None]
+    congressional = [t for t in congressional if t is not None]
+    seconds, _ = timed(lambda: [pd.concat(county, ignore_index=True).to_csv(index=False),
+                                pd.concat(congressional, ignore_index=True).to_csv(index=False)], repeat)
+    results['csv_emission'] = stage_result(seconds, sum(len(t) for t in county + congressional))
+    
+    plan_path = os.path.join(root, SYNTHETIC_PLAN)
+    seconds, plan = timed(lambda: gpd.read_file(plan_path), repeat)
+    results['shapefile_read'] = stage_result(seconds, len(plan))
+    
+    seconds, _ = timed(lambda: plan.to_crs(REPROJECT_CRS), repeat)
+    results['shapefile_reproject'] = stage_result(seconds, len(plan))
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        seconds, _ = timed(lambda: plan.to_file(os.path.join(tmp, 'plan.geojson'), driver='GeoJSON'), repeat)
+    results['geojson_export'] = stage_result(seconds, len(plan))
+    return results
+
+def compare_to_baseline(run, baseline, threshold, stage_thresholds):
+    """List (scale, stage, ratio, limit) for every stage slower than its allowed limit"""
+    regressions = []
+    for scale, stages in run['scales'].items():
+        for stage, result in stages.items():
+            reference = baseline.get('scales', {}).get(scale, {}).get(stage)
+            if not reference or not reference['seconds']:
+                continue
+            ratio = result['seconds'] / reference['seconds']
+            limit = 1 + stage_thresholds.get(stage, threshold)
+            if ratio > limit:
+                regressions.append((scale, stage, ratio, limit))
+    return regressions
+
+def print_report(run, baseline):
+    for scale, stages in run['scales'].items():
+        print(f"\n{scale}x:")
+        for stage, result in stages.items():
+            reference = baseline.get('scales', {}).get(scale, {}).get(stage) if baseline else None
+            change = f"  ({result['seconds'] / reference['seconds']:.2f}x baseline)" if reference and reference['seconds'] else ''
+            print(f"  {stage:28s} {result['seconds'] * 1000:10.1f} ms  {result['rows']:>10,} rows{change}")
+
+def parse_stage_thresholds(values, parser):
+    thresholds = {}
+    for value in values:
+        stage, sep, limit = value.partition('=')
+        try:
+            thresholds[stage] = float(limit)
+        except ValueError:
+            sep = ''
+        if not sep:
+            parser.error(f"--stage-threshold expects STAGE=FRACTION, got {value!r}")
+    return thresholds
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on synthetic data")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help=f"data sizes to run, as multiples of the real data (choose from {SCALES})")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per stage; the best time is kept")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown against the baseline, as a fraction")
+    parser.add_argument('--stage-threshold', action='append', default=[], metavar='STAGE=FRACTION',
+                        help="allowed slowdown for one stage, overriding --threshold")
+    parser.add_argument('--v1', action='store_true',
+                        help="also time the v1 results_by_year document build and serialization")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store this run as the new baseline")
+    args = parser.parse_args()
+    stage_thresholds = parse_stage_thresholds(args.stage_threshold, parser)
+    
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'scales': {}
+    }
+    for scale in args.scales:
+        root = generate(scale)
+        print(f"Benchmarking {scale}x...")
+        run['scales'][str(scale)] = benchmark_scale(root, args.repeat, v1=args.v1)
+    
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    run_path = os.path.join(RESULTS_DIR, f"run-{run['timestamp'].replace(':', '')}.json")
+    with open(run_path, 'w') as f:
+        json.dump(run, f, indent=2)
+    
+    baseline_path = os.path.join(RESULTS_DIR, BASELINE_FILE)
+    baseline = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    print_report(run, baseline)
+    print(f"\nSaved {run_path}")
+    
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"Saved baseline {baseline_path}")
+    elif baseline:
+        regressions = compare_to_baseline(run, baseline, args.threshold, stage_thresholds)
+        for scale, stage, ratio, limit in regressions:
+            print(f"REGRESSION {scale}x {stage}: {ratio:.2f}x baseline (limit {limit:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
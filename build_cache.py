@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Content-hash build cache shared by the data processing scripts.
+
+The manifest records a SHA-256 for every input file (election TSVs, shapefile
+components, the scripts themselves) and for every cached output. A build step
+is skipped when its inputs hash the same as last time and its outputs are
+still on disk untouched; per-year intermediate results are kept as slices so
+only the years whose TSV changed are reprocessed and spliced back in.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+
+CACHE_DIR = '.build_cache'
+MANIFEST_FILE = 'manifest.json'
+
+def hash_file(path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def shapefile_inputs(shapefile_path):
+    """Return every component file (.shp, .dbf, .shx, .prj, ...) of a shapefile"""
+    stem = os.path.splitext(shapefile_path)[0]
+    return sorted(glob.glob(f"{stem}.*"))
+
+def write_if_changed(path, text):
+    """Write text to path unless the file already holds exactly that content.
+
+    Returns True when the file was written.
+    """
+    data = text.encode('utf-8')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+def write_chunks_if_changed(path, chunks):
+    """Stream text chunks to path without joining them, leaving an identical file untouched.
+
+    The chunks go to a temporary file that replaces path only if it differs.
+    Returns True when the file was written.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+    if os.path.exists(path) and hash_file(path) == hash_file(tmp_path):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+class BuildCache:
+    """Manifest of input/output hashes plus a store of cached intermediate slices"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+        self._hashes = {}
+
+        self.manifest = {'inputs': {}, 'entries': {}}
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path) as f:
+                    self.manifest = json.load(f)
+            except (OSError, ValueError):
+                print(f"Ignoring unreadable build manifest {self.manifest_path}")
+
+    def _hash(self, path):
+        """Hash a file once per run"""
+        path = os.path.relpath(path)
+        if path not in self._hashes:
+            self._hashes[path] = hash_file(path) if os.path.exists(path) else None
+        return self._hashes[path]
+
+    def _hash_all(self, paths):
+        return {os.path.relpath(p): self._hash(p) for p in paths}
+
+    def is_fresh(self, key, inputs, outputs=()):
+        """True if key was built from these exact inputs and its outputs are unchanged"""
+        entry = self.manifest['entries'].get(key)
+        if entry is None:
+            return False
+        if entry['inputs'] != self._hash_all(inputs):
+            return False
+        if entry.get('slice') and not os.path.exists(entry['slice']):
+            return False
+        current_outputs = self._hash_all(outputs)
+        if None in current_outputs.values():
+            return False
+        return entry.get('outputs', {}) == current_outputs
+
+    def record(self, key, inputs, outputs=(), slice_path=None):
+        """Remember the hashes key was built from (call after its outputs are written)"""
+        for path in list(inputs) + list(outputs):
+            self._hashes.pop(os.path.relpath(path), None)
+        input_hashes = self._hash_all(inputs)
+        self.manifest['inputs'].update(input_hashes)
+        self.manifest['entries'][key] = {
+            'inputs': input_hashes,
+            'outputs': self._hash_all(outputs),
+            'slice': slice_path
+        }
+
+    def slice_path(self, key):
+        return os.path.join(self.cache_dir, 'slices', key.replace('/', '__') + '.pkl')
+
+    def load_slice(self, key):
+        """Load the cached intermediate result stored under key"""
+        with open(self.slice_path(key), 'rb') as f:
+            return pickle.load(f)
+
+    def store_slice(self, key, inputs, value):
+        """Cache an intermediate result under key and record its inputs"""
+        path = self.slice_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.record(key, inputs, slice_path=path)
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.manifest_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+
+def cached_map(cache, keys_and_inputs, compute, force=False):
+    """Return {key: result}, running compute only for keys whose inputs changed.
+
+    keys_and_inputs maps each slice key to (argument, input paths). compute takes
+    the list of stale arguments and returns their results in the same order,
+    which lets callers hand the stale set to a process pool in one go.
+    """
+    stale = [key for key, (_, inputs) in keys_and_inputs.items()
+             if force or not cache.is_fresh(key, inputs)]
+
+    computed = dict(zip(stale, compute([keys_and_inputs[key][0] for key in stale])))
+
+    results = {}
+    for key, (_, inputs) in keys_and_inputs.items():
+        if key in computed:
+            results[key] = computed[key]
+            cache.store_slice(key, inputs, computed[key])
+        else:
+            results[key] = cache.load_slice(key)
+
+    print(f"Build cache: {len(stale)} of {len(keys_and_inputs)} slices recomputed")
+    return results
+
+def cached_slices(cache, keys_and_inputs, compute, force=False, fields=None):
+    """Bring the slice of every key up to date without holding the results; returns the keys in order.
+
+    Like cached_map, but compute may return a lazy iterator: each result is
+    stored as soon as it arrives and then dropped, and callers read the slices
+    back one at a time with iter_slices. With fields, each result (a dict, or
+    None) is stored one field per slice, so a pass over one field never
+    unpickles the others.
+    """
+    def slice_keys(key):
+        return [key] if fields is None else [f"{key}/{field}" for field in fields]
+
+    stale = [key for key, (_, inputs) in keys_and_inputs.items()
+             if force or not all(cache.is_fresh(k, inputs) for k in slice_keys(key))]
+
+    for key, result in zip(stale, compute([keys_and_inputs[key][0] for key in stale])):
+        inputs = keys_and_inputs[key][1]
+        if fields is None:
+            cache.store_slice(key, inputs, result)
+        else:
+            for field in fields:
+                cache.store_slice(f"{key}/{field}", inputs, None if result is None else result[field])
+
+    print(f"Build cache: {len(stale)} of {len(keys_and_inputs)} slices recomputed")
+    return list(keys_and_inputs)
+
+def iter_slices(cache, keys, field=None):
+    """Yield the cached slice (or one field of it) of each key in turn, skipping empty ones"""
+    for key in keys:
+        value = cache.load_slice(key if field is None else f"{key}/{field}")
+        if value is not None:
+            yield value
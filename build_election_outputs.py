@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Build every election output from a single parse of each Election_Data file.
+
+Each TSV is read once through election_loader and the resulting frame is handed
+to every emitter in the same run: the county and congressional CSVs
+(process_fl_data_to_csv), the candidate index (process_candidates) and the
+election JSON (process_fl_election_data), streamed out in the compact v2
+schema and optionally also built as the v1 results_by_year document.
+"""
+
+import argparse
+import os
+import process_candidates
+import process_fl_data_to_csv
+import process_fl_election_data
+from build_cache import BuildCache, cached_slices, iter_slices
+from election_loader import LOADER_SOURCE, find_election_files, iter_election_files, load_election_file
+from registry import REGISTRY_SOURCE
+from run_report import REPORT_DIR, RunReport
+
+# Every module whose code shapes the per-year outputs
+SOURCE_FILES = [
+    __file__,
+    LOADER_SOURCE,
+    REGISTRY_SOURCE,
+    process_candidates.__file__,
+    process_fl_data_to_csv.__file__,
+    process_fl_election_data.__file__
+]
+
+# County and congressional result CSVs written by process_fl_data_to_csv
+CSV_OUTPUTS = ['data/fl_county_election_results.csv', 'data/fl_congressional_election_results.csv']
+
+# Fields of build_year_outputs, each cached as its own slice per election file
+OUTPUT_FIELDS = ['rows', 'csv', 'json', 'candidates']
+
+def build_year_outputs(file_path):
+    """Parse one election file and run every per-year emitter on the same frame"""
+    year, df = load_election_file(file_path)
+    print(f"Processing {os.path.basename(file_path)} -> {year}")
+    if df is None:
+        return None
+    print(f"  Loaded {len(df)} rows ({df.attrs['encoding']})")
+    
+    return {
+        'rows': len(df),
+        'csv': process_fl_data_to_csv.aggregate_election_frame(df, year),
+        'json': (year, process_fl_election_data.build_year_contests(df, year)),
+        'candidates': process_candidates.build_candidate_table(df, year)
+    }
+
+def build_election_outputs(workers=1, force=False, sharded=False, v1=False, report=None):
+    """Parse each election file once and write the CSV, JSON and candidate outputs
+    
+    Each year's outputs are cached one slice per emitter, and every stage
+    streams its own slices back one year at a time, so no step holds more than
+    one year's parse. The v1 election document is only built, in a second pass
+    over the cached contests, when v1 or sharded output is asked for. Each step
+    is recorded as a stage of report, a RunReport, if one is given.
+    """
+    report = report or RunReport('build_election_outputs')
+    election_files = find_election_files()
+    print(f"Found {len(election_files)} election files")
+    
+    with report.stage('parse_and_aggregate') as stage:
+        cache = BuildCache()
+        slices = {
+            f"election_outputs/{os.path.basename(path)}": (path, [path] + SOURCE_FILES)
+            for path in election_files
+        }
+        keys = cached_slices(cache, slices,
+                             lambda paths: iter_election_files(build_year_outputs, paths, workers),
+                             force=force, fields=OUTPUT_FIELDS)
+        cache.save()
+        stage['rows'] = sum(iter_slices(cache, keys, 'rows'))
+    
+    with report.stage('county_csv', outputs=CSV_OUTPUTS) as stage:
+        county_df, congressional_df = process_fl_data_to_csv.write_election_csvs(iter_slices(cache, keys, 'csv'))
+        stage['rows'] = len(county_df) + (len(congressional_df) if congressional_df is not None else 0)
+    
+    with report.stage('candidate_index', outputs=[process_candidates.OUTPUT_FILE]) as stage:
+        candidate_index = process_candidates.write_candidate_index(iter_slices(cache, keys, 'candidates'))
+        stage['rows'] = len(candidate_index['candidates']) if candidate_index is not None else 0
+    
+    with report.stage('election_json', outputs=[process_fl_election_data.OUTPUT_FILE_V2]) as stage:
+        stage['rows'] = process_fl_election_data.write_election_json_v2(
+            contest for _, contests in iter_slices(cache, keys, 'json') for contest in contests)
+    
+    election_data = None
+    if v1 or sharded:
+        with report.stage('election_json_v1', outputs=[process_fl_election_data.OUTPUT_FILE] if v1 else ()) as stage:
+            election_data = process_fl_election_data.build_v1_document(iter_slices(cache, keys, 'json'), candidate_index)
+            if v1:
+                process_fl_election_data.write_election_json(election_data)
+            stage['rows'] = sum(len(contest['results']) for races in election_data['results_by_year'].values()
+                                for contests in races.values() for contest in contests.values())
+    
+    if sharded:
+        with report.stage('election_shards', outputs=[process_fl_election_data.SHARD_DIR]) as stage:
+            process_fl_election_data.write_sharded_results(election_data)
+            stage['rows'] = sum(len(races) for races in election_data['results_by_year'].values())
+    
+    return county_df, congressional_df, election_data, candidate_index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build all Florida election outputs from one parse of each file")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for parsing election files (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the build cache and reprocess every file")
+    parser.add_argument('--v1', action='store_true',
+                        help=f"also write the v1 results_by_year document to {process_fl_election_data.OUTPUT_FILE}")
+    parser.add_argument('--sharded', action='store_true',
+                        help=f"also write per-year, per-contest v1 JSON shards to {process_fl_election_data.SHARD_DIR}")
+    parser.add_argument('--profile', metavar='STAGE',
+                        help=f"write a cProfile dump of one stage to {REPORT_DIR}/")
+    args = parser.parse_args()
+    
+    print("Building Florida election outputs...")
+    report = RunReport('build_election_outputs', profile_stage=args.profile)
+    build_election_outputs(workers=args.workers, force=args.force, sharded=args.sharded, v1=args.v1, report=report)
+    report.write()
+    
+    print("\nFiles created:")
+    print("- data/fl_county_election_results.csv")
+    print("- data/fl_congressional_election_results.csv")
+    print(f"- {process_candidates.OUTPUT_FILE}")
+    print(f"- {process_fl_election_data.OUTPUT_FILE_V2}")
+    if args.v1:
+        print(f"- {process_fl_election_data.OUTPUT_FILE}")
+    if args.sharded:
+        print(f"- {process_fl_election_data.SHARD_DIR}/")
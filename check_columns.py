@@ -1,19 +1,11 @@
-import pandas as pd
+from results_store import build_results_store, read_results
 
-# Read the latest election data
-encodings = ['utf-8', 'latin-1', 'cp1252']
-df = None
+# Read the latest election data from the Parquet store (only rebuilt when a TSV changed)
+build_results_store()
+df = read_results(years=[2024])
 
-for enc in encodings:
-    try:
-        df = pd.read_csv('Election_Data/11052024Election.txt', sep='\t', encoding=enc, low_memory=False)
-        print(f'Successfully read with {enc}')
-        break
-    except:
-        continue
-
-if df is not None:
-    print(f'Columns in file: {list(df.columns)}')
-    print(f'Shape: {df.shape}')
-    print(f'\nFirst few rows:')
-    print(df.head(3).to_string())
+print(f'Read {len(df)} rows for 2024')
+print(f'Columns in file: {list(df.columns)}')
+print(f'Shape: {df.shape}')
+print(f'\nFirst few rows:')
+print(df.head(3).to_string())
@@ -1,32 +1,24 @@
-import pandas as pd
+from results_store import build_results_store, read_results
 
-# Read the latest election data
-encodings = ['utf-8', 'latin-1', 'cp1252']
-df = None
+# Read the latest election data from the Parquet store (only rebuilt when a TSV changed)
+build_results_store()
+df = read_results(years=[2024])
 
-for enc in encodings:
-    try:
-        df = pd.read_csv('Election_Data/11052024Election.txt', sep='\t', encoding=enc, low_memory=False)
-        print(f'Successfully read with {enc}')
-        break
-    except:
-        continue
+print(f'Read {len(df)} rows for 2024')
+contests = df['ContestName'].unique()
+print(f'\nTotal contests: {len(contests)}')
 
-if df is not None:
-    contests = df['ContestName'].unique()
-    print(f'\nTotal contests: {len(contests)}')
-    
-    # Look for congressional contests
-    congressional_terms = ['representative', 'house', 'congressional', 'district']
-    cong_contests = [c for c in contests if any(term in c.lower() for term in congressional_terms)]
-    
-    print(f'\nFound {len(cong_contests)} congressional contests:')
-    for c in cong_contests[:10]:
-        print(f' - {c}')
-    
-    # Check if we have district numbers
-    if cong_contests:
-        sample_contest = cong_contests[0]
-        sample_data = df[df['ContestName'] == sample_contest].head(3)
-        print(f'\nSample data for: {sample_contest}')
-        print(sample_data[['CountyName', 'ContestName', 'ChoiceName', 'VoteCount']].to_string())
+# Look for congressional contests
+congressional_terms = ['representative', 'house', 'congressional', 'district']
+cong_contests = [c for c in contests if any(term in c.lower() for term in congressional_terms)]
+
+print(f'\nFound {len(cong_contests)} congressional contests:')
+for c in cong_contests[:10]:
+    print(f' - {c}')
+
+# Check if we have district numbers
+if cong_contests:
+    sample_contest = cong_contests[0]
+    sample_data = df[df['ContestName'] == sample_contest].head(3)
+    print(f'\nSample data for: {sample_contest}')
+    print(sample_data[['CountyName', 'ContestName', 'ChoiceName', 'VoteCount']].to_string())
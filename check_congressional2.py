@@ -1,34 +1,26 @@
-import pandas as pd
+from results_store import build_results_store, read_results
 
-# Read the latest election data
-encodings = ['utf-8', 'latin-1', 'cp1252']
-df = None
+# Read the latest election data from the Parquet store (only rebuilt when a TSV changed)
+build_results_store()
+df = read_results(years=[2024])
 
-for enc in encodings:
-    try:
-        df = pd.read_csv('Election_Data/11052024Election.txt', sep='\t', encoding=enc, low_memory=False)
-        print(f'Successfully read with {enc}')
-        break
-    except:
-        continue
+print(f'Read {len(df)} rows for 2024')
+# Get unique office descriptions
+offices = df['OfficeDesc'].unique()
+print(f'All offices ({len(offices)}):')
+for office in sorted(offices):
+    print(f' - {office}')
 
-if df is not None:
-    # Get unique office descriptions
-    offices = df['OfficeDesc'].unique()
-    print(f'All offices ({len(offices)}):')
-    for office in sorted(offices):
-        print(f' - {office}')
-    
-    # Look for congressional races
-    congressional_offices = [office for office in offices if any(term in office.lower() for term in ['representative', 'house', 'congress', 'district'])]
-    
-    print(f'\nCongressional offices found: {len(congressional_offices)}')
-    for office in congressional_offices:
-        print(f' - {office}')
-        
-    # If we found congressional races, check if they have district info
-    if congressional_offices:
-        cong_office = congressional_offices[0]
-        cong_data = df[df['OfficeDesc'] == cong_office]
-        print(f'\nSample data for {cong_office}:')
-        print(cong_data[['CountyName', 'OfficeDesc', 'Juris1num', 'Juris2num', 'CanNameLast', 'CanVotes']].head(5).to_string())
+# Look for congressional races
+congressional_offices = [office for office in offices if any(term in office.lower() for term in ['representative', 'house', 'congress', 'district'])]
+
+print(f'\nCongressional offices found: {len(congressional_offices)}')
+for office in congressional_offices:
+    print(f' - {office}')
+
+# If we found congressional races, check if they have district info
+if congressional_offices:
+    cong_office = congressional_offices[0]
+    cong_data = df[df['OfficeDesc'] == cong_office]
+    print(f'\nSample data for {cong_office}:')
+    print(cong_data[['CountyName', 'OfficeDesc', 'Juris1num', 'Juris2num', 'CanNameLast', 'CanVotes']].head(5).to_string())
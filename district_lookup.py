@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Batch point-in-district lookup for lon/lat points.
+
+Each layer (the counties, and every plan in district_plans.PLANS) is an
+STRtree over its prepared WGS84 polygons. Points are looked up in vectorized
+batches: the tree gives the candidate polygons whose bounding box holds each
+point, and one intersects_xy call over all candidate pairs keeps the polygons
+that actually contain it. A point on a shared border goes to the lowest
+feature id; a point outside every polygon gets none. Polygons are cached as
+flat coordinate arrays in .build_cache/lookup/, keyed by the hash of the
+source file, so a lookup starts without reading or reprojecting a shapefile.
+
+    lookup = DistrictLookup()
+    lookup.lookup(lon, lat)   # DataFrame with county, congressional_district, ...
+
+or over CSV files:
+
+    python district_lookup.py polling_places.csv -o polling_places_districts.csv
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+import shapely
+from build_cache import CACHE_DIR, hash_file
+from district_plans import PLANS
+from geometry_index import read_layer
+from shapefile_cache import source_digest
+from topology_export import COUNTY_BOUNDARIES
+
+LOOKUP_DIR = os.path.join(CACHE_DIR, 'lookup')
+
+# Points per vectorized batch; bounds the memory of the candidate pairs
+BATCH_POINTS = 250_000
+
+# Rows per chunk when streaming a CSV through the CLI
+CSV_CHUNK_ROWS = 1_000_000
+
+def layer_sources(county_path=COUNTY_BOUNDARIES):
+    """Layer name -> source file, counties first"""
+    sources = {'counties': county_path}
+    sources.update((name, plan['path']) for name, plan in PLANS.items())
+    return sources
+
+def layer_column(name):
+    """Output column of a layer: 'county', or the plan's chamber + '_district'"""
+    return 'county' if name == 'counties' else f"{PLANS[name]['chamber']}_district"
+
+def lookup_path(name, source, lookup_dir=LOOKUP_DIR):
+    """Cache file for one layer, named by the hashes of its source and this module"""
+    digest = hashlib.sha256()
+    for part in (source_digest(source), hash_file(__file__)):
+        digest.update(part.encode('ascii'))
+    return os.path.join(lookup_dir, f"{name}-{digest.hexdigest()[:16]}.npz")
+
+def save_layer(ids, geometries, path):
+    """Store a layer's ids and polygons as flat coordinate and offset arrays"""
+    geometry_type, coords, offsets = shapely.to_ragged_array(geometries)
+    arrays = {'ids': np.asarray(ids), 'geometry_type': np.array(int(geometry_type)), 'coords': coords}
+    arrays.update((f"offsets{i}", offset) for i, offset in enumerate(offsets))
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def load_layer_file(path):
+    """(ids, polygons) saved by save_layer"""
+    with np.load(path, allow_pickle=False) as f:
+        offsets = [f[f"offsets{i}"] for i in range(sum(name.startswith('offsets') for name in f.files))]
+        geometries = shapely.from_ragged_array(shapely.GeometryType(int(f['geometry_type'])), f['coords'], offsets)
+        return f['ids'], geometries
+
+def load_layer(name, source, force=False):
+    """(ids, polygons) of one layer, read from the cache or built and cached on first use"""
+    path = lookup_path(name, source)
+    if not force and os.path.exists(path):
+        return load_layer_file(path)
+    
+    print(f"Building lookup layer {name}...")
+    ids, geometries = read_layer(name, county_path=source) if name == 'counties' else read_layer(name)
+    ids = np.asarray(ids, dtype=str if name == 'counties' else int)
+    # Stored in id order, so the lowest feature index on a border is also the lowest id
+    order = np.argsort(ids, kind='stable')
+    ids, geometries = ids[order], np.asarray(geometries)[order]
+    for old in glob.glob(os.path.join(os.path.dirname(path), f"{name}-*.npz")):
+        os.remove(old)
+    save_layer(ids, geometries, path)
+    print(f"  {len(ids)} features cached in {path}")
+    return ids, geometries
+
+class DistrictLookup:
+    """STRtrees over the prepared polygons of each layer, answering batched point lookups"""
+    
+    def __init__(self, layers=None, county_path=COUNTY_BOUNDARIES, force=False):
+        sources = layer_sources(county_path)
+        if layers is None:
+            # Every layer whose source is available (the county boundaries are not in the repo)
+            layers = [name for name, path in sources.items() if os.path.exists(path)]
+        
+        self.layers = {}
+        for name in layers:
+            if not os.path.exists(sources[name]):
+                raise FileNotFoundError(f"{name} source not found: {sources[name]}")
+            ids, geometries = load_layer(name, sources[name], force)
+            shapely.prepare(geometries)
+            self.layers[name] = (ids, geometries, shapely.STRtree(geometries))
+    
+    def locate(self, name, x, y, points):
+        """Index into the layer's features of the polygon holding each point, -1 where none does"""
+        _, geometries, tree = self.layers[name]
+        found = np.full(len(points), -1, dtype=np.int64)
+        
+        # Bounding-box candidates from the tree, then exact tests against the prepared polygons
+        point_idx, feature_idx = tree.query(points)
+        hit = shapely.intersects_xy(geometries[feature_idx], x[point_idx], y[point_idx])
+        point_idx, feature_idx = point_idx[hit], feature_idx[hit]
+        
+        # Border points touch two polygons; the lowest feature wins
+        order = np.lexsort((feature_idx, point_idx))
+        point_idx, feature_idx = point_idx[order], feature_idx[order]
+        first = np.r_[True, point_idx[1:] != point_idx[:-1]]
+        found[point_idx[first]] = feature_idx[first]
+        return found
+    
+    def lookup(self, lon, lat):
+        """DataFrame with one column per layer (county, congressional_district, ...) for each point.
+        
+        Points missing a coordinate, or outside every polygon of a layer, get a null there.
+        """
+        lon = np.asarray(lon, dtype=float)
+        lat = np.asarray(lat, dtype=float)
+        found = {name: np.empty(len(lon), dtype=np.int64) for name in self.layers}
+        for start in range(0, len(lon), BATCH_POINTS):
+            x, y = lon[start:start + BATCH_POINTS], lat[start:start + BATCH_POINTS]
+            points = shapely.points(x, y)
+            for name in self.layers:
+                found[name][start:start + len(x)] = self.locate(name, x, y, points)
+        
+        columns = {}
+        for name, (ids, _, _) in self.layers.items():
+            values = pd.Series(ids[np.maximum(found[name], 0)])
+            if name != 'counties':
+                values = values.astype('Int64')
+            columns[layer_column(name)] = values.where(found[name] >= 0)
+        return pd.DataFrame(columns)
+
+def lookup_csv(input_path, output_path, lookup, lon_column='lon', lat_column='lat', chunk_rows=CSV_CHUNK_ROWS):
+    """Copy a CSV of points to output_path with the lookup columns appended; returns the row count"""
+    rows = 0
+    with pd.read_csv(input_path, chunksize=chunk_rows) as reader:
+        for i, chunk in enumerate(reader):
+            for column in (lon_column, lat_column):
+                if column not in chunk.columns:
+                    raise KeyError(f"{input_path} has no {column!r} column")
+            lon = pd.to_numeric(chunk[lon_column], errors='coerce').to_numpy()
+            lat = pd.to_numeric(chunk[lat_column], errors='coerce').to_numpy()
+            found = lookup.lookup(lon, lat).set_axis(chunk.index)
+            chunk.join(found, rsuffix='_lookup').to_csv(output_path, mode='w' if i == 0 else 'a',
+                                                        header=i == 0, index=False)
+            rows += len(chunk)
+            print(f"  {rows:,} points")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assign lon/lat points in CSV files to their county and districts")
+    parser.add_argument('inputs', nargs='*',
+                        help="CSV files of points (default: only build the lookup cache)")
+    parser.add_argument('-o', '--output',
+                        help="output CSV for a single input (default: <input>_districts.csv)")
+    parser.add_argument('--lon-column', default='lon')
+    parser.add_argument('--lat-column', default='lat')
+    parser.add_argument('--layers', nargs='+', choices=list(layer_sources()),
+                        help="layers to look up (default: every layer whose source exists)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild the cached layers from their sources")
+    args = parser.parse_args()
+    
+    if args.output and len(args.inputs) != 1:
+        parser.error("--output needs exactly one input")
+    
+    lookup = DistrictLookup(args.layers, force=args.force)
+    print(f"Lookup layers: {', '.join(lookup.layers)}")
+    for input_path in args.inputs:
+        output_path = args.output or f"{os.path.splitext(input_path)[0]}_districts.csv"
+        print(f"Looking up {input_path} -> {output_path}")
+        lookup_csv(input_path, output_path, lookup, args.lon_column, args.lat_column)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Registry of district plans and the one engine that converts them.
+
+Each plan in PLANS names its shapefile, chamber and output files; converting
+a plan reads the shapefile's GeoParquet copy (see shapefile_cache.py),
+reprojects it to WGS84 and writes the map's GeoJSON plus the per-district CSV
+(population and VAP shares). plan_districts builds the same table from the
+attributes alone. Adding a plan is one PLANS entry, and stale plans are converted
+in parallel worker processes.
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from build_cache import BuildCache, shapefile_inputs, write_if_changed
+from run_report import REPORT_DIR, RunReport
+from shapefile_cache import SHAPE_CACHE_SOURCE, read_shapefile, shapefile_columns
+
+# Web maps expect WGS84 longitude/latitude
+OUTPUT_CRS = 'EPSG:4326'
+
+# District CSV columns and the shapefile fields each may come from (first found wins)
+DISTRICT_FIELDS = {
+    'district': ['DISTRICT', 'District', 'CD'],
+    'longname': ['LONGNAME', 'NAME'],
+    'shortname': ['SHORTNAME', 'SHORT'],
+    'total_population': ['TOTAL', 'TOTALPOP', 'TOTAL_POP', 'TOT_POP'],
+    'white_vap_pct': ['SRWVAP_P', 'WHITE_VAP_PCT', 'WHITEVAP_PCT', 'WHT_VAP_PCT'],
+    'black_vap_pct': ['NHBVAP_P', 'BVAP_P', 'BLACK_VAP_PCT', 'BLACKVAP_PCT', 'BLK_VAP_PCT'],
+    'hispanic_vap_pct': ['HVAP_P', 'HISPANIC_VAP_PCT', 'HISPVAP_PCT', 'HISP_VAP_PCT']
+}
+
+# Registered plans; 'fields' overrides DISTRICT_FIELDS and 'crs' is assumed
+# for shapefiles that ship without a .prj
+PLANS = {
+    'congressional': {
+        'path': 'data/S000C8004/S000C8004.shp',
+        'chamber': 'congressional',
+        'geojson': 'data/fl_congressional_districts.geojson',
+        'csv': 'data/fl_congressional_districts.csv',
+        # The congressional table reports black VAP of any ethnicity
+        'fields': {'black_vap_pct': ['BVAP_P', 'NHBVAP_P']}
+    },
+    'state_house': {
+        'path': 'H000H8013/H000H8013.shp',
+        'chamber': 'state_house',
+        'geojson': 'data/fl_state_house_districts.geojson',
+        'csv': 'data/fl_state_house_districts.csv'
+    },
+    'state_senate': {
+        'path': 'data/S027S8058/S027S8058.shp',
+        'chamber': 'state_senate',
+        'geojson': 'data/fl_state_senate_districts.geojson',
+        'csv': 'data/fl_state_senate_districts.csv'
+    }
+}
+
+def plan_id(name):
+    """The plan's shapefile name, e.g. 'S000C8004'"""
+    return os.path.splitext(os.path.basename(PLANS[name]['path']))[0]
+
+def plan_fields(name):
+    """DISTRICT_FIELDS with the plan's own overrides applied"""
+    return {**DISTRICT_FIELDS, **PLANS[name].get('fields', {})}
+
+def field_sources(name):
+    """Map each district CSV column to the plan's shapefile field that supplies it"""
+    available = set(shapefile_columns(PLANS[name]['path']))
+    sources = {}
+    for column, candidates in plan_fields(name).items():
+        source = next((f for f in candidates if f in available), None)
+        if source is None:
+            raise KeyError(f"no field for {column}; tried {', '.join(candidates)}")
+        sources[column] = source
+    return sources
+
+def read_plan(name, columns=None, geometry=True):
+    """Read a plan through its GeoParquet cache, in WGS84 when geometry is loaded.
+    
+    Duplicated shapefile columns are already reduced to the first one in the
+    cache; with geometry=False only the attribute columns are read.
+    """
+    plan = PLANS[name]
+    gdf = read_shapefile(plan['path'], columns=columns, geometry=geometry)
+    if not geometry:
+        return gdf
+    
+    if gdf.crs is None:
+        if 'crs' not in plan:
+            raise ValueError(f"{plan['path']} has no CRS; set 'crs' in its PLANS entry")
+        gdf = gdf.set_crs(plan['crs'])
+    if gdf.crs != OUTPUT_CRS:
+        gdf = gdf.to_crs(OUTPUT_CRS)
+    return gdf
+
+def district_table(df, sources):
+    """One row per district with population and VAP percentages, sorted by district"""
+    table = pd.DataFrame({column: df[source] for column, source in sources.items()})
+    table['district'] = table['district'].astype(int)
+    table['total_population'] = table['total_population'].astype(int)
+    for column in ['white_vap_pct', 'black_vap_pct', 'hispanic_vap_pct']:
+        table[column] = table[column].astype(float).round(2)
+    return table.sort_values('district').reset_index(drop=True)
+
+def plan_districts(name):
+    """A plan's district table from its attributes alone, without touching geometry"""
+    sources = field_sources(name)
+    df = read_plan(name, columns=list(dict.fromkeys(sources.values())), geometry=False)
+    return district_table(df, sources)
+
+def convert_plan(name):
+    """Write one plan's GeoJSON and district CSV; returns the district table or None on error"""
+    plan = PLANS[name]
+    try:
+        gdf = read_plan(name)
+        districts = district_table(gdf, field_sources(name))
+        
+        os.makedirs(os.path.dirname(plan['geojson']), exist_ok=True)
+        gdf.to_file(plan['geojson'], driver='GeoJSON')
+        write_if_changed(plan['csv'], districts.to_csv(index=False))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error converting {name} ({plan_id(name)}): {e}")
+        return None
+    
+    print(f"{name} ({plan_id(name)}): {len(districts)} districts saved")
+    return districts
+
+def convert_plans(names=None, workers=1, force=False):
+    """Convert every requested plan whose shapefile changed; returns {name: district table}.
+    
+    Unchanged plans are read back from their CSV. workers=0 (or None) uses one
+    process per CPU core.
+    """
+    cache = BuildCache()
+    results, stale = {}, []
+    for name in names or PLANS:
+        plan = PLANS[name]
+        inputs = shapefile_inputs(plan['path']) + [__file__, SHAPE_CACHE_SOURCE]
+        outputs = [plan['geojson'], plan['csv']]
+        if not force and cache.is_fresh(f"plan/{plan_id(name)}", inputs, outputs):
+            print(f"{name} ({plan_id(name)}): unchanged, skipping")
+            results[name] = pd.read_csv(plan['csv'])
+        else:
+            stale.append((name, inputs, outputs))
+    
+    stale_names = [name for name, _, _ in stale]
+    if workers == 1 or len(stale) < 2:
+        converted = [convert_plan(name) for name in stale_names]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or None) as pool:
+            converted = list(pool.map(convert_plan, stale_names))
+    
+    for (name, inputs, outputs), districts in zip(stale, converted):
+        results[name] = districts
+        if districts is not None:
+            cache.record(f"plan/{plan_id(name)}", inputs, outputs)
+    cache.save()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert registered district plans to GeoJSON and CSV")
+    parser.add_argument('plans', nargs='*',
+                        help=f"plans to convert, from {', '.join(PLANS)} (default: all)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="worker processes, one plan each (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="reconvert plans even if their shapefile is unchanged")
+    parser.add_argument('--profile', metavar='STAGE',
+                        help=f"write a cProfile dump of one stage to {REPORT_DIR}/")
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.plans if name not in PLANS]
+    if unknown:
+        parser.error(f"unknown plans: {', '.join(unknown)}")
+    
+    print("Converting district plans...")
+    names = args.plans or list(PLANS)
+    report = RunReport('district_plans', profile_stage=args.profile)
+    with report.stage('convert_plans', outputs=[PLANS[n][f] for n in names for f in ('geojson', 'csv')]) as stage:
+        results = convert_plans(names, workers=args.workers, force=args.force)
+        stage['rows'] = sum(len(districts) for districts in results.values() if districts is not None)
+    
+    # Imported here because the geometry index reads the plans through this module
+    from geometry_index import OUTPUT_FILE as GEOMETRY_INDEX, build_geometry_index
+    with report.stage('geometry_index', outputs=[GEOMETRY_INDEX]) as stage:
+        document = build_geometry_index(force=args.force)
+        stage['rows'] = sum(len(features) for features in document['layers'].values()) if document else 0
+    report.write()
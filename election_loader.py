@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Shared loader for the Florida Division of Elections result files.
+
+Every script that needs the raw Election_Data/*Election.txt rows goes through
+read_election_file, so each file is parsed the same way (same encodings, same
+column types) and a single build can hand one parsed frame to every emitter.
+"""
+
+import codecs
+import os
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+ELECTION_DATA_DIR = 'Election_Data'
+
+# Cached results depend on how the files are parsed, so builds hash this module too
+LOADER_SOURCE = __file__
+
+# Encodings tried in order; latin-1 maps every byte, so it always succeeds
+ENCODINGS = ['utf-8', 'latin-1', 'cp1252']
+CATCH_ALL_ENCODINGS = {'latin-1'}
+
+# Bytes decoded per step while checking a file's encoding
+DETECT_BLOCK_SIZE = 1 << 20
+
+# Column types for the result files; Juris1num/Juris2num are left to inference
+# because they are blank for statewide races. The counts are parsed as text and
+# converted afterwards (see COUNT_COLUMNS), so a blank count never fails a file.
+ELECTION_DTYPES = {
+    'ElectionDate': str,
+    'PartyCode': str,
+    'PartyName': str,
+    'RaceCode': str,
+    'OfficeDesc': str,
+    'CountyCode': str,
+    'CountyName': str,
+    'Precincts': str,
+    'PrecinctsReporting': str,
+    'CanNameLast': str,
+    'CanNameFirst': str,
+    'CanNameMiddle': str,
+    'CanVotes': str
+}
+
+# Count columns and the integer type each becomes after parsing, for whole-file
+# and streaming reads; blank or malformed counts (races not yet reporting on
+# election night) count as 0
+COUNT_COLUMNS = {
+    'Precincts': ('int64', 'int32'),
+    'PrecinctsReporting': ('int64', 'int32'),
+    'CanVotes': ('int64', 'int32')
+}
+
+# Rows per chunk when streaming a file instead of reading it whole
+STREAM_CHUNK_ROWS = 100_000
+
+# Column types for streaming reads: repeated codes and names as categoricals,
+# counts as int32 (after COUNT_COLUMNS conversion) and district numbers as
+# nullable small integers, so every chunk has the same compact types whatever
+# rows it happens to hold
+STREAM_DTYPES = {
+    'ElectionDate': 'category',
+    'PartyCode': 'category',
+    'PartyName': 'category',
+    'RaceCode': 'category',
+    'OfficeDesc': 'category',
+    'CountyCode': 'category',
+    'CountyName': 'category',
+    'Juris1num': 'Int16',
+    'Juris2num': 'Int16',
+    'Precincts': str,
+    'PrecinctsReporting': str,
+    'CanNameLast': 'category',
+    'CanNameFirst': 'category',
+    'CanNameMiddle': 'category',
+    'CanVotes': str
+}
+
+def parse_year_from_filename(filename):
+    """Extract year from filename like '11052024Election.txt' -> '2024'"""
+    date_part = os.path.basename(filename).replace('Election.txt', '')
+    return date_part[4:8]
+
+def find_election_files(data_dir=ELECTION_DATA_DIR):
+    """Return the path of every *Election.txt file in data_dir, sorted by filename"""
+    if not os.path.isdir(data_dir):
+        return []
+    return [os.path.join(data_dir, f) for f in sorted(os.listdir(data_dir)) if f.endswith('Election.txt')]
+
+def map_election_files(func, election_files, workers=1):
+    """Apply func to each election file, in separate worker processes unless workers is 1.
+    
+    Results are returned in the order of election_files no matter which worker
+    finishes first, so merged output is identical to a serial run.
+    workers=0 (or None) uses one process per CPU core.
+    """
+    return list(iter_election_files(func, election_files, workers))
+
+def iter_election_files(func, election_files, workers=1):
+    """Like map_election_files, but yield each result in order as it becomes available"""
+    if workers == 1 or len(election_files) < 2:
+        for path in election_files:
+            yield func(path)
+        return
+    with ProcessPoolExecutor(max_workers=workers or None) as pool:
+        yield from pool.map(func, election_files)
+
+def convert_counts(df, streaming=False):
+    """Convert the count columns parsed as text to integers, in place; blanks become 0"""
+    for column, (dtype, stream_dtype) in COUNT_COLUMNS.items():
+        if column in df.columns:
+            counts = pd.to_numeric(df[column], errors='coerce')
+            df[column] = counts.fillna(0).astype(stream_dtype if streaming else dtype)
+    return df
+
+def detect_encoding(file_path):
+    """Return the first of ENCODINGS that decodes the whole file, or None.
+    
+    The file is streamed through an incremental decoder in fixed-size blocks, so
+    the check costs one sequential read, no parsing and bounded memory. A
+    catch-all encoding like latin-1 is accepted without reading anything.
+    """
+    for encoding in ENCODINGS:
+        if encoding in CATCH_ALL_ENCODINGS:
+            return encoding
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(DETECT_BLOCK_SIZE), b''):
+                    decoder.decode(block)
+                decoder.decode(b'', final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return None
+
+def read_election_file(file_path):
+    """Parse an election TSV file into a typed DataFrame, or None if it can't be read.
+    
+    The encoding is detected up front so the file is parsed exactly once; the
+    one chosen is recorded in df.attrs['encoding'].
+    """
+    try:
+        encoding = detect_encoding(file_path)
+        if encoding is None:
+            print(f"Could not read {file_path}: no encoding in {ENCODINGS} fits")
+            return None
+        df = pd.read_csv(file_path, sep='\t', encoding=encoding, dtype=ELECTION_DTYPES, low_memory=False)
+    except (OSError, ValueError) as e:
+        print(f"Could not read {file_path}: {e}")
+        return None
+    
+    convert_counts(df)
+    df.attrs['encoding'] = encoding
+    return df
+
+def iter_election_chunks(file_path, chunk_rows=STREAM_CHUNK_ROWS, columns=None):
+    """Yield an election TSV as typed frames of at most chunk_rows rows.
+    
+    Only one chunk is held at a time, so memory stays flat however large the
+    file is. columns limits the fields parsed. Yields nothing if the file can't
+    be read.
+    """
+    encoding = detect_encoding(file_path)
+    if encoding is None:
+        print(f"Could not read {file_path}: no encoding in {ENCODINGS} fits")
+        return
+    
+    dtypes = {column: dtype for column, dtype in STREAM_DTYPES.items() if columns is None or column in columns}
+    try:
+        with pd.read_csv(file_path, sep='\t', encoding=encoding, dtype=dtypes, usecols=columns,
+                         chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                convert_counts(chunk, streaming=True)
+                chunk.attrs['encoding'] = encoding
+                yield chunk
+    except (OSError, ValueError) as e:
+        print(f"Could not read {file_path}: {e}")
+
+def load_election_file(file_path):
+    """Return (year, frame) for one election file"""
+    return parse_year_from_filename(file_path), read_election_file(file_path)
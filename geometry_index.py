@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Sidecar of bounding boxes, label points and centroids for every geography.
+
+For the counties and every district plan in district_plans.PLANS, each
+feature's bounding box, an interior label point (shapely's point on surface,
+always inside the polygon) and its area-weighted centroid (computed in the
+equal-area AREA_CRS) are written to data/fl_geometry_index.json, keyed by
+layer and feature id (county code or district number), together with the
+statewide extent. Each quantity is one shapely 2 array operation over the
+whole layer, and the map looks them up instead of measuring geometries in the
+browser. Coordinates are WGS84 longitude/latitude.
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+import geopandas as gpd
+import shapely
+import overlay_index
+from build_cache import BuildCache, shapefile_inputs, write_if_changed
+from district_plans import OUTPUT_CRS, PLANS
+from overlay_index import AREA_CRS, read_counties, read_districts
+from registry import COUNTIES, county_match_key
+from shapefile_cache import SHAPE_CACHE_SOURCE
+from topology_export import COUNTY_BOUNDARIES
+
+OUTPUT_FILE = 'data/fl_geometry_index.json'
+
+# Decimal places kept on coordinates (1e-5 degrees is about 1 m)
+COORDINATE_DIGITS = 5
+
+def read_layer(name, county_path=COUNTY_BOUNDARIES):
+    """(feature ids, WGS84 geometries) of the counties or of one plan's districts"""
+    if name == 'counties':
+        counties = read_counties(county_path, crs=OUTPUT_CRS)
+        codes = {county_match_key(county_name): code for code, county_name in COUNTIES.items()}
+        unknown = [key for key in counties.index if key not in codes]
+        if unknown:
+            print(f"  Skipping unknown counties {', '.join(unknown)}")
+        counties = counties[counties.index.isin(list(codes))]
+        return [codes[key] for key in counties.index], counties.geometry.values
+    
+    districts = read_districts(name, crs=OUTPUT_CRS)
+    return [str(district) for district in districts['district']], districts.geometry.values
+
+def layer_geometry(geometries):
+    """(bounds, label points, centroids) as n x 4, n x 2 and n x 2 arrays of WGS84 coordinates"""
+    bounds = shapely.bounds(geometries)
+    labels = shapely.get_coordinates(shapely.point_on_surface(geometries))
+    
+    # Centroids are area-weighted in the equal-area CRS, then brought back to WGS84
+    projected = gpd.GeoSeries(geometries, crs=OUTPUT_CRS).to_crs(AREA_CRS).values
+    centroids = gpd.GeoSeries(shapely.centroid(projected), crs=AREA_CRS).to_crs(OUTPUT_CRS).values
+    return bounds, labels, shapely.get_coordinates(centroids)
+
+def coordinates(values):
+    return [round(float(v), COORDINATE_DIGITS) for v in values]
+
+def build_layer(name, county_path=COUNTY_BOUNDARIES):
+    """({feature id: {'bbox', 'label', 'centroid'}}, bounds array) of one layer; counties also get 'name'"""
+    ids, geometries = read_layer(name, county_path)
+    bounds, labels, centroids = layer_geometry(geometries)
+    features = {
+        feature_id: {'bbox': coordinates(box), 'label': coordinates(label), 'centroid': coordinates(centroid)}
+        for feature_id, box, label, centroid in zip(ids, bounds, labels, centroids)
+    }
+    if name == 'counties':
+        # The map finds counties by name, so their canonical name rides along
+        for code, entry in features.items():
+            entry['name'] = COUNTIES[code]
+    return features, bounds
+
+def layer_sources(county_path=COUNTY_BOUNDARIES):
+    """Layer name -> source file for every layer whose source exists"""
+    sources = {'counties': county_path}
+    sources.update((name, plan['path']) for name, plan in PLANS.items())
+    return {name: path for name, path in sources.items() if os.path.exists(path)}
+
+def build_geometry_index(force=False, county_path=COUNTY_BOUNDARIES, output_file=OUTPUT_FILE):
+    """Write the sidecar for every available layer, unless no source changed; returns the document or None"""
+    sources = layer_sources(county_path)
+    if not sources:
+        print("No geography sources found")
+        return None
+    
+    inputs = [p for path in sources.values() for p in shapefile_inputs(path)]
+    inputs += [__file__, overlay_index.__file__, SHAPE_CACHE_SOURCE]
+    cache = BuildCache()
+    if not force and cache.is_fresh('geometry_index', inputs, [output_file]):
+        print(f"Geometry index up to date: {output_file}")
+        return None
+    
+    document = {'extent': None, 'layers': {}}
+    all_bounds = []
+    for name in sources:
+        features, bounds = build_layer(name, county_path)
+        document['layers'][name] = features
+        all_bounds.append(bounds)
+        print(f"  {name}: {len(features)} features")
+    
+    bounds = np.vstack(all_bounds)
+    document['extent'] = coordinates([bounds[:, 0].min(), bounds[:, 1].min(), bounds[:, 2].max(), bounds[:, 3].max()])
+    
+    write_if_changed(output_file, json.dumps(document, separators=(',', ':')))
+    cache.record('geometry_index', inputs, [output_file])
+    cache.save()
+    print(f"Saved {output_file} ({os.path.getsize(output_file):,} bytes)")
+    return document
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute bounding boxes, label points and centroids of every geography")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild the index even if no boundary file changed")
+    args = parser.parse_args()
+    
+    build_geometry_index(force=args.force)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Election-night ingest: poll a results file and publish versioned snapshots and delta patches.
+
+The watched file (an Election_Data TSV as the Division of Elections refreshes
+it during the count) is re-read whenever its size or mtime changes. Its rows
+are diffed against the last ingested rows by (race, county, candidate) key,
+and only the contests and counties with changed rows are re-aggregated into
+the live contest records, which carry precincts and precincts reporting next
+to the v2 dem/rep arrays. Every ingest that changes something bumps the
+version and writes, under data/live/:
+
+  snapshot.json       the whole v2 document at that version
+  deltas/<version>.json  the changed counties of each changed contest
+  latest.json         the current version and the oldest delta kept
+
+A map that holds version n fetches deltas n+1 .. latest and applies them
+(scripts/fl_live_results.js); one that fell further behind than the kept
+deltas reloads the snapshot. Ingest state is kept in .build_cache/live/ so a
+restarted watcher continues the version sequence.
+"""
+
+import argparse
+import json
+import os
+import pickle
+import time
+import pandas as pd
+from build_cache import CACHE_DIR, write_chunks_if_changed
+from election_loader import find_election_files, parse_year_from_filename, read_election_file
+from process_fl_election_data import SCHEMA_VERSION, iter_election_json_v2
+from registry import COUNTY_CODES, COUNTY_IDS
+
+LIVE_DIR = 'data/live'
+SNAPSHOT_FILE = 'snapshot.json'
+LATEST_FILE = 'latest.json'
+DELTA_DIR = 'deltas'
+STATE_FILE = os.path.join(CACHE_DIR, 'live', 'state.pkl')
+
+DEFAULT_INTERVAL = 5.0
+
+# A changed file is only read once its size and mtime hold still this long,
+# so a feed that is still being written is never diffed half-way
+SETTLE_SECONDS = 0.5
+
+# Deltas kept on disk; clients further behind reload the snapshot
+MAX_DELTAS = 240
+
+# A row is one candidate in one race and county (district races carry Juris1num/Juris2num)
+KEY_COLUMNS = ['RaceCode', 'CountyCode', 'Juris1num', 'Juris2num', 'PartyCode',
+               'CanNameLast', 'CanNameFirst', 'CanNameMiddle']
+VALUE_COLUMNS = ['CanVotes', 'Precincts', 'PrecinctsReporting']
+
+class IngestError(Exception):
+    """A refresh of the results file that could not be ingested"""
+
+def read_live_rows(file_path):
+    """CanVotes/Precincts/PrecinctsReporting of a results file indexed by KEY_COLUMNS; None if unreadable"""
+    df = read_election_file(file_path)
+    if df is None:
+        return None
+    keys = {}
+    for column in KEY_COLUMNS:
+        values = df[column] if column in df.columns else pd.Series('', index=df.index)
+        if column in ('Juris1num', 'Juris2num'):
+            values = pd.to_numeric(values, errors='coerce').astype('Int64').astype('string')
+        keys[column] = values.fillna('').astype(str)
+    # Races that have not reported yet come with blank counts; they count as 0
+    values = {column: pd.to_numeric(df[column], errors='coerce').fillna(0).astype('int64') for column in VALUE_COLUMNS}
+    rows = pd.DataFrame({**keys, **values})
+    return rows.groupby(KEY_COLUMNS, sort=True).agg(
+        {'CanVotes': 'sum', 'Precincts': 'max', 'PrecinctsReporting': 'max'})
+
+def changed_rows(old, new):
+    """Rows of new whose values differ from old, rows only in new, and zeroed rows only in old"""
+    if not old.index.equals(new.index):
+        index = old.index.union(new.index)
+        old = old.reindex(index, fill_value=0)
+        new = new.reindex(index, fill_value=0)
+    return new[(old != new).any(axis=1)]
+
+def aggregate_contests(rows):
+    """{(race, county id): (dem, rep, precincts, reporting)} summed over the given rows"""
+    race = rows.index.get_level_values('RaceCode')
+    party = rows.index.get_level_values('PartyCode')
+    county = rows.index.get_level_values('CountyCode').map(COUNTY_IDS)
+    votes = rows['CanVotes'].to_numpy()
+    sums = (pd.DataFrame({'race': race, 'county': county,
+                          'dem': votes * (party == 'DEM'), 'rep': votes * (party == 'REP'),
+                          'precincts': rows['Precincts'].to_numpy(),
+                          'reporting': rows['PrecinctsReporting'].to_numpy()})
+            .dropna(subset=['county'])
+            .astype({'county': int})
+            .groupby(['race', 'county'], sort=True)
+            .agg({'dem': 'sum', 'rep': 'sum', 'precincts': 'max', 'reporting': 'max'}))
+    return {key: tuple(int(v) for v in values) for key, values in zip(sums.index, sums.itertuples(index=False))}
+
+class LiveResults:
+    """Live contest records of one results file, updated in place from changed rows"""
+    
+    FIELDS = ['dem', 'rep', 'precincts', 'reporting']
+    
+    def __init__(self, source, version=0):
+        self.source = os.path.basename(source)
+        self.year = int(parse_year_from_filename(source))
+        self.version = version
+        self.rows = None
+        self.contests = {}
+    
+    @classmethod
+    def load(cls, source, state_file=STATE_FILE):
+        """Resume the saved state for source, or start after the saved version of another file"""
+        state = {}
+        if os.path.exists(state_file):
+            try:
+                with open(state_file, 'rb') as f:
+                    state = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                print(f"Ignoring unreadable live state {state_file}")
+        live = cls(source, version=state.get('version', 0))
+        if state.get('source') == live.source:
+            live.rows = state['rows']
+            live.contests = state['contests']
+        return live
+    
+    def save(self, state_file=STATE_FILE):
+        os.makedirs(os.path.dirname(state_file), exist_ok=True)
+        state = {'source': self.source, 'version': self.version, 'rows': self.rows, 'contests': self.contests}
+        tmp_path = f"{state_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, state_file)
+    
+    def contest(self, race):
+        if race not in self.contests:
+            self.contests[race] = {'year': self.year, 'race': race, 'key': f"{race.lower()}_{self.year}_1",
+                                   **{field: [None] * len(COUNTY_CODES) for field in self.FIELDS}}
+        return self.contests[race]
+    
+    def ingest(self, rows):
+        """Apply a fresh read of the results file; returns the delta document, or None if nothing changed"""
+        changed = rows if self.rows is None else changed_rows(self.rows, rows)
+        if changed.empty:
+            return None
+        
+        # Re-aggregate every (race, county) with a changed row from all of its current rows
+        affected = pd.MultiIndex.from_arrays([changed.index.get_level_values('RaceCode'),
+                                              changed.index.get_level_values('CountyCode')]).unique()
+        current = pd.MultiIndex.from_arrays([rows.index.get_level_values('RaceCode'),
+                                             rows.index.get_level_values('CountyCode')])
+        totals = aggregate_contests(rows[current.isin(affected)])
+        
+        updates = {}
+        for race, county_code in affected:
+            county_id = COUNTY_IDS.get(county_code)
+            if county_id is None:
+                continue
+            # A race that vanished from a county's rows is off its ballot again
+            values = totals.get((race, county_id), (None,) * len(self.FIELDS))
+            record = self.contest(race)
+            for field, value in zip(self.FIELDS, values):
+                record[field][county_id] = value
+            updates.setdefault(race, []).append((county_id, values))
+        
+        self.rows = rows
+        self.version += 1
+        return {
+            'schema': SCHEMA_VERSION,
+            'year': self.year,
+            'version': self.version,
+            'base': self.version - 1,
+            'contests': [
+                {'race': race, 'key': self.contests[race]['key'],
+                 'counties': [county_id for county_id, _ in sorted(counties)],
+                 **{field: [values[i] for _, values in sorted(counties)] for i, field in enumerate(self.FIELDS)}}
+                for race, counties in sorted(updates.items())
+            ]
+        }
+    
+    def snapshot_chunks(self):
+        """The v2 document of every live contest, with the version and source in its header"""
+        return iter_election_json_v2((self.contests[race] for race in sorted(self.contests)),
+                                     version=self.version, source=self.source)
+
+def write_json(path, document):
+    """Write a small JSON document so readers never see a partial file"""
+    write_chunks_if_changed(path, [json.dumps(document, separators=(',', ':'))])
+
+def publish(live, delta, live_dir=LIVE_DIR):
+    """Write the snapshot, the delta (if any) and then latest.json; prune deltas past MAX_DELTAS"""
+    delta_dir = os.path.join(live_dir, DELTA_DIR)
+    os.makedirs(delta_dir, exist_ok=True)
+    write_chunks_if_changed(os.path.join(live_dir, SNAPSHOT_FILE), live.snapshot_chunks())
+    if delta is not None:
+        write_json(os.path.join(delta_dir, f"{delta['version']}.json"), delta)
+    
+    versions = sorted(int(name[:-5]) for name in os.listdir(delta_dir)
+                      if name.endswith('.json') and name[:-5].isdigit())
+    for version in versions:
+        if version > live.version or version <= live.version - MAX_DELTAS:
+            os.remove(os.path.join(delta_dir, f"{version}.json"))
+    kept = [v for v in versions if live.version - MAX_DELTAS < v <= live.version]
+    
+    # Deltas only chain if none is missing between the oldest kept one and the current version
+    first = live.version + 1
+    for version in reversed(kept):
+        if version != first - 1:
+            break
+        first = version
+    
+    write_json(os.path.join(live_dir, LATEST_FILE), {
+        'version': live.version,
+        'year': live.year,
+        'source': live.source,
+        'snapshot': SNAPSHOT_FILE,
+        'first_delta': first if first <= live.version else None,
+        'updated': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    })
+
+def ingest_once(live, file_path, live_dir=LIVE_DIR, state_file=STATE_FILE):
+    """Read file_path, apply and publish any change; returns the delta or None.
+    
+    Raises IngestError, leaving the published version as it was, if the file cannot be read.
+    """
+    start = time.perf_counter()
+    rows = read_live_rows(file_path)
+    if rows is None:
+        raise IngestError(f"{file_path} could not be read; still at version {live.version}")
+    first_ingest = live.rows is None
+    delta = live.ingest(rows)
+    if delta is None:
+        print(f"  {live.source}: no changes")
+        return None
+    
+    # The first ingest of a file has no base to patch, so it only publishes the snapshot
+    publish(live, None if first_ingest else delta, live_dir)
+    live.save(state_file)
+    counties = sum(len(contest['counties']) for contest in delta['contests'])
+    print(f"  {live.source}: version {live.version}, {len(delta['contests'])} contests and "
+          f"{counties} county results changed ({time.perf_counter() - start:.2f}s)")
+    return delta
+
+def file_stamp(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def watch(file_path, interval=DEFAULT_INTERVAL, live_dir=LIVE_DIR, state_file=STATE_FILE):
+    """Poll file_path every interval seconds and ingest it whenever it changes"""
+    live = LiveResults.load(file_path, state_file)
+    print(f"Watching {file_path} every {interval:g}s (version {live.version})")
+    ingested = None
+    while True:
+        stamp = file_stamp(file_path)
+        if stamp is not None and stamp != ingested:
+            time.sleep(SETTLE_SECONDS)
+            if file_stamp(file_path) == stamp:
+                try:
+                    ingest_once(live, file_path, live_dir, state_file)
+                    ingested = stamp
+                except IngestError as e:
+                    # Retried on the next poll, in case the file was caught mid-replace
+                    print(f"  Ingest failed: {e}")
+        time.sleep(interval)
+
+def default_results_file():
+    """The most recently modified election file"""
+    files = find_election_files()
+    return max(files, key=os.path.getmtime) if files else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest a refreshed results file into versioned snapshots and deltas")
+    parser.add_argument('--file', default=None,
+                        help="results file to watch (default: the most recently modified election file)")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help="seconds between checks of the file")
+    parser.add_argument('--live-dir', default=LIVE_DIR,
+                        help="directory the snapshot, deltas and latest.json are written to")
+    parser.add_argument('--once', action='store_true',
+                        help="ingest the file once and exit instead of watching it")
+    parser.add_argument('--reset', action='store_true',
+                        help="start from a full snapshot instead of the saved ingest state")
+    args = parser.parse_args()
+    
+    results_file = args.file or default_results_file()
+    if results_file is None:
+        parser.error("no election files found; pass --file")
+    if args.reset and os.path.exists(STATE_FILE):
+        live = LiveResults.load(results_file)
+        live.rows = None
+        live.contests = {}
+        live.save()
+    
+    if args.once:
+        try:
+            ingest_once(LiveResults.load(results_file), results_file, args.live_dir)
+        except IngestError as e:
+            parser.exit(1, f"Ingest failed: {e}\n")
+    else:
+        try:
+            watch(results_file, args.interval, args.live_dir)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+County-to-district overlay index for estimating district results from county results.
+
+For each district plan the county boundaries are intersected with the
+districts (an STRtree finds the candidate pairs), and the share of every
+county falling in every district is stored as a sparse allocation matrix:
+one row per district, one column per county, each column summing to 1. Area
+weights split a county by land area; population weights also scale each piece
+by its district's population density, where the plan carries a population
+field. Turning any county-level result vector into district estimates is then
+one matrix multiply. Indexes are cached in .build_cache/overlay/, keyed by
+plan and by the hashes of both boundary files.
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import shapely
+from build_cache import CACHE_DIR, hash_file
+from district_plans import PLANS, plan_fields, plan_id, read_plan
+from registry import county_match_key
+from shapefile_cache import read_shapefile, shapefile_columns, source_digest
+from topology_export import COUNTY_BOUNDARIES
+
+OVERLAY_DIR = os.path.join(CACHE_DIR, 'overlay')
+ESTIMATES_DIR = 'data/district_estimates'
+COUNTY_RESULTS = 'data/fl_county_election_results.csv'
+
+# Florida GDL Albers: equal-area metres, so intersection areas are comparable
+AREA_CRS = 'EPSG:3086'
+
+# County name properties, in the order the map looks for them
+COUNTY_NAME_FIELDS = ['County', 'COUNTYNAME', 'NAME', 'name']
+
+# Pieces smaller than this share of their county are boundary slivers where
+# the county and district files disagree, and are dropped
+MIN_SHARE = 1e-4
+
+def overlay_path(name, county_path=COUNTY_BOUNDARIES, overlay_dir=OVERLAY_DIR):
+    """Cache file for one plan, named by the hashes of both inputs and this module"""
+    digest = hashlib.sha256()
+    for part in (source_digest(county_path), source_digest(PLANS[name]['path']), hash_file(__file__)):
+        digest.update(part.encode('ascii'))
+    return os.path.join(overlay_dir, f"{plan_id(name)}-{digest.hexdigest()[:16]}.npz")
+
+def read_counties(county_path=COUNTY_BOUNDARIES, crs=AREA_CRS):
+    """County polygons in crs, one per county, indexed by normalized name"""
+    available = shapefile_columns(county_path)
+    name_field = next((f for f in COUNTY_NAME_FIELDS if f in available), None)
+    if name_field is None:
+        raise KeyError(f"no county name field; tried {', '.join(COUNTY_NAME_FIELDS)}")
+    
+    gdf = read_shapefile(county_path, columns=[name_field])
+    if gdf.crs is None:
+        gdf = gdf.set_crs('EPSG:4326')
+    gdf = gdf.to_crs(crs)
+    gdf['county'] = gdf[name_field].map(county_match_key)
+    return gdf[['county', 'geometry']].dissolve(by='county').sort_index()
+
+def read_districts(name, crs=AREA_CRS):
+    """District polygons in crs with their population, when the plan has one"""
+    fields = plan_fields(name)
+    available = set(shapefile_columns(PLANS[name]['path']))
+    district_field = next(f for f in fields['district'] if f in available)
+    population_field = next((f for f in fields['total_population'] if f in available), None)
+    
+    columns = [district_field] + ([population_field] if population_field else [])
+    gdf = read_plan(name, columns=columns).to_crs(crs)
+    gdf['district'] = gdf[district_field].astype(int)
+    gdf['population'] = gdf[population_field].astype(float) if population_field else np.nan
+    return gdf[['district', 'population', 'geometry']].sort_values('district').reset_index(drop=True)
+
+def column_normalize(matrix):
+    """Scale each column of a sparse matrix to sum to 1"""
+    totals = np.asarray(matrix.sum(axis=0)).ravel()
+    totals[totals == 0] = 1
+    return (matrix @ sp.diags(1 / totals)).tocsr()
+
+def build_overlay(name, county_path=COUNTY_BOUNDARIES):
+    """Intersect counties with one plan's districts; returns the overlay dict"""
+    counties = read_counties(county_path)
+    districts = read_districts(name)
+    
+    county_geoms = counties.geometry.values
+    district_geoms = districts.geometry.values
+    tree = shapely.STRtree(district_geoms)
+    county_idx, district_idx = tree.query(county_geoms, predicate='intersects')
+    
+    pieces = shapely.area(shapely.intersection(county_geoms[county_idx], district_geoms[district_idx]))
+    keep = pieces >= MIN_SHARE * shapely.area(county_geoms[county_idx])
+    county_idx, district_idx, pieces = county_idx[keep], district_idx[keep], pieces[keep]
+    
+    shape = (len(districts), len(counties))
+    area = sp.csr_matrix((pieces, (district_idx, county_idx)), shape=shape)
+    
+    population = None
+    if districts['population'].notna().all():
+        # Spread each district's population evenly over its area
+        density = districts['population'].values / shapely.area(district_geoms)
+        population = sp.csr_matrix((pieces * density[district_idx], (district_idx, county_idx)), shape=shape)
+        population = column_normalize(population)
+    
+    return {
+        'counties': np.asarray(counties.index, dtype=str),
+        'districts': districts['district'].values,
+        'area': column_normalize(area),
+        'population': population
+    }
+
+def save_overlay(overlay, path):
+    """Store both weight matrices in a single .npz, each with its own sparsity pattern.
+    
+    The population matrix can have fewer entries than the area one (a piece in a
+    district of zero population), so it never reuses the area indices.
+    """
+    arrays = {
+        'counties': np.asarray(overlay['counties'], dtype=str),
+        'districts': overlay['districts'],
+        'shape': np.array(overlay['area'].shape)
+    }
+    for weighting in ('area', 'population'):
+        if overlay[weighting] is None:
+            continue
+        matrix = overlay[weighting].tocsr()
+        matrix.sort_indices()
+        arrays.update({weighting: matrix.data, f"{weighting}_indices": matrix.indices,
+                       f"{weighting}_indptr": matrix.indptr})
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+def load_overlay_file(path):
+    """Read an overlay saved by save_overlay"""
+    with np.load(path, allow_pickle=False) as f:
+        shape = tuple(f['shape'])
+        matrix = lambda weighting: sp.csr_matrix(
+            (f[weighting], f[f"{weighting}_indices"], f[f"{weighting}_indptr"]), shape=shape)
+        return {
+            'counties': f['counties'],
+            'districts': f['districts'],
+            'area': matrix('area'),
+            'population': matrix('population') if 'population' in f else None
+        }
+
+def load_overlay(name, county_path=COUNTY_BOUNDARIES, force=False):
+    """The overlay index for one plan, built and cached on first use"""
+    path = overlay_path(name, county_path)
+    if not force and os.path.exists(path):
+        return load_overlay_file(path)
+    
+    print(f"Building overlay index for {name} ({plan_id(name)})...")
+    overlay = build_overlay(name, county_path)
+    for old in glob.glob(os.path.join(os.path.dirname(path), f"{plan_id(name)}-*.npz")):
+        os.remove(old)
+    save_overlay(overlay, path)
+    print(f"  {len(overlay['districts'])} districts x {len(overlay['counties'])} counties, "
+          f"{overlay['area'].nnz} county/district pieces")
+    return overlay
+
+def allocate_to_districts(overlay, county_values, weighting='population'):
+    """Estimate district totals from county totals with one sparse matrix multiply.
+    
+    county_values is a Series or DataFrame indexed by county name; counties
+    missing from it count as zero. Falls back to area weights when the plan
+    has no population field.
+    """
+    matrix = overlay[weighting] if overlay[weighting] is not None else overlay['area']
+    values = county_values.copy()
+    values.index = values.index.map(county_match_key)
+    values = values.groupby(level=0).sum().reindex(overlay['counties'], fill_value=0)
+    
+    estimates = matrix @ values.to_numpy(dtype=float)
+    if isinstance(values, pd.DataFrame):
+        return pd.DataFrame(estimates, index=pd.Index(overlay['districts'], name='district'), columns=values.columns)
+    return pd.Series(estimates, index=pd.Index(overlay['districts'], name='district'), name=values.name)
+
+def estimate_district_results(name, year, weighting='population', county_results=COUNTY_RESULTS):
+    """Every county-level contest of one year allocated to one plan's districts"""
+    df = pd.read_csv(county_results)
+    df = df[df['year'] == int(year)].set_index('county')
+    vote_columns = [c for c in df.columns if c.endswith(('_dem', '_rep', '_total'))]
+    estimates = allocate_to_districts(load_overlay(name), df[vote_columns], weighting)
+    return estimates.round().astype(int)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build county-to-district overlay indexes")
+    parser.add_argument('plans', nargs='*',
+                        help=f"plans to index, from {', '.join(PLANS)} (default: all)")
+    parser.add_argument('--year', type=int,
+                        help=f"also write estimated district results for this year to {ESTIMATES_DIR}/")
+    parser.add_argument('--weighting', choices=['population', 'area'], default='population')
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild indexes even if cached")
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.plans if name not in PLANS]
+    if unknown:
+        parser.error(f"unknown plans: {', '.join(unknown)}")
+    if not os.path.exists(COUNTY_BOUNDARIES):
+        parser.error(f"county boundaries not found: {COUNTY_BOUNDARIES}")
+    
+    for name in args.plans or PLANS:
+        load_overlay(name, force=args.force)
+        if args.year:
+            path = os.path.join(ESTIMATES_DIR, f"{name}_{args.year}.csv")
+            os.makedirs(ESTIMATES_DIR, exist_ok=True)
+            estimate_district_results(name, args.year, args.weighting).to_csv(path)
+            print(f"  Saved {path}")
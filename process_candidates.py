@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Build the candidate index (data/fl_candidate_index.json) used by the map.
+
+Every distinct candidate name appears once, in a sorted list whose positions
+are the candidates' integer ids. Contests are keyed by year, race code and
+party and refer to candidates by id; a county is listed separately only where
+its candidate differs from the rest of the race (multi-district races such as
+the US House). Party names are listed per year, as they appeared on that
+year's ballot, so the page can key candidates by "Year|OfficeDesc|PartyName"
+the way the curated lookup does. The hand-curated names in data/candidateLookup.js and the
+overrides in data/candidateNameOverride.js are applied here, so the page needs
+no lookup or override tables of its own.
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import Counter, defaultdict
+import pandas as pd
+from build_cache import BuildCache, cached_map, write_if_changed
+from election_loader import LOADER_SOURCE, find_election_files, map_election_files, parse_year_from_filename, read_election_file
+
+OUTPUT_FILE = 'data/fl_candidate_index.json'
+CANDIDATE_COLUMNS = ['contest_code', 'year', 'county_code', 'party', 'party_name', 'office', 'candidate_name']
+
+# Hand-edited display names, kept as the JS objects the page used to load:
+# "Year|OfficeDesc|PartyName": name for whole contests, and name: name renames
+LOOKUP_FILE = 'data/candidateLookup.js'
+OVERRIDE_FILE = 'data/candidateNameOverride.js'
+JS_PAIR_PATTERN = re.compile(r'^\s*,?\s*"((?:[^"\\]|\\.)*)"\s*:\s*"((?:[^"\\]|\\.)*)"', re.MULTILINE)
+
+def read_js_pairs(path):
+    """The "key": "value" entries of a JS object literal file, or [] if it is missing"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return JS_PAIR_PATTERN.findall(f.read())
+
+def candidate_names(df):
+    """'First Last' for every row, skipping a missing first or last name"""
+    first = df['CanNameFirst'].fillna('').astype(str)
+    last = df['CanNameLast'].fillna('').astype(str)
+    return (first + ' ' + last).str.strip()
+
+def build_candidate_table(df, year):
+    """Name the candidate of every party in every race and county for one year"""
+
+    # Multi-district races (US House, legislature) list several candidates per
+    # county; the first one listed is kept, as the v1 results always named it
+    table = (df.assign(candidate_name=candidate_names(df))
+             .groupby(['RaceCode', 'CountyCode', 'PartyCode'])
+             .agg(party_name=('PartyName', 'first'), office=('OfficeDesc', 'first'),
+                  candidate_name=('candidate_name', 'first'))
+             .reset_index()
+             .rename(columns={'RaceCode': 'contest_code', 'CountyCode': 'county_code', 'PartyCode': 'party'}))
+    table['year'] = int(year)
+    return table[CANDIDATE_COLUMNS]
+
+def process_candidate_file(file_path):
+    """Read one election file and build its candidate table"""
+    year = parse_year_from_filename(file_path)
+    print(f"Processing {year}...")
+
+    df = read_election_file(file_path)
+    if df is None:
+        return None
+    return build_candidate_table(df, year)
+
+def override_key(name):
+    """Loose key for matching override entries, as normalizeCandidateNameKey did in the page"""
+    return ' '.join(str(name).strip().upper().replace('.', '').replace("'", '').split())
+
+def load_name_overrides(path=OVERRIDE_FILE):
+    """{override_key: display name} for every entry that actually renames a candidate"""
+    return {override_key(name): display for name, display in read_js_pairs(path) if display != name}
+
+def load_contest_names(path=LOOKUP_FILE):
+    """{(year, office, party name): display name} from the curated contest lookup"""
+    names = {}
+    for key, display in read_js_pairs(path):
+        parts = key.split('|')
+        if len(parts) == 3 and parts[0].isdigit():
+            names[(int(parts[0]), parts[1], parts[2])] = display
+    return names
+
+def contest_entry(office, counties, party_ids):
+    """Index entry for one year and race from {party: {county_code: candidate_id}}.
+
+    Each party's most common candidate is its entry in 'candidates'; counties
+    with another candidate, or none, are listed under 'counties'.
+    """
+    entry = {'office': office, 'candidates': {}}
+    for party in sorted(party_ids):
+        ids = party_ids[party]
+        usual = Counter(sorted(ids.values())).most_common(1)[0][0]
+        entry['candidates'][party] = usual
+
+        exceptions = {county: ids.get(county) for county in counties if ids.get(county) != usual}
+        if exceptions:
+            entry.setdefault('counties', {})[party] = exceptions
+    return entry
+
+def build_candidate_index(tables, overrides=None, contest_names=None):
+    """Deduplicate per-year candidate tables into the candidate index document"""
+    tables = [t for t in tables if t is not None]
+    if not tables:
+        return None
+    overrides = load_name_overrides() if overrides is None else overrides
+    contest_names = load_contest_names() if contest_names is None else contest_names
+
+    table = pd.concat(tables, ignore_index=True).sort_values(['year', 'contest_code', 'county_code', 'party'])
+
+    # Curated contest names take precedence, as they did in the page
+    curated = pd.Series([contest_names.get(key) for key in zip(table['year'], table['office'], table['party_name'])],
+                        index=table.index, dtype=object)
+    table['candidate_name'] = curated.fillna(table['candidate_name'])
+    resolved = {name: overrides.get(override_key(name), name) for name in table['candidate_name'].unique()}
+    table['candidate_name'] = table['candidate_name'].map(resolved)
+
+    candidates = sorted(table['candidate_name'].unique())
+    table['candidate_id'] = table['candidate_name'].map({name: i for i, name in enumerate(candidates)})
+
+    # (year, contest) -> office, counties on the ballot and {party: {county: id}}
+    races = {}
+    for row in table.itertuples(index=False):
+        office, counties, party_ids = races.setdefault((row.year, row.contest_code), (row.office, {}, defaultdict(dict)))
+        counties[row.county_code] = None
+        party_ids[row.party][row.county_code] = int(row.candidate_id)
+
+    contests = {}
+    for (year, contest_code), (office, counties, party_ids) in races.items():
+        contests.setdefault(str(year), {})[contest_code] = contest_entry(office, counties, party_ids)
+
+    # A party code's name is whatever that year's file called it, so each year keeps its own
+    parties = {}
+    for row in table.drop_duplicates(['year', 'party']).sort_values(['year', 'party']).itertuples(index=False):
+        parties.setdefault(str(row.year), {})[row.party] = row.party_name
+    return {
+        'candidates': candidates,
+        'parties': parties,
+        'contests': contests
+    }
+
+def candidate_id(index, year, contest_code, county_code, party):
+    """Id of a party's candidate in one race and county, or None"""
+    contest = index['contests'].get(str(year), {}).get(contest_code)
+    if contest is None:
+        return None
+    counties = contest.get('counties', {}).get(party, {})
+    if county_code in counties:
+        return counties[county_code]
+    return contest['candidates'].get(party)
+
+def write_candidate_index(tables, output_file=OUTPUT_FILE):
+    """Build the candidate index from per-year tables and save it; returns the index"""
+    index = build_candidate_index(tables)
+    if index is None:
+        return None
+
+    if write_if_changed(output_file, json.dumps(index, separators=(',', ':'), ensure_ascii=False)):
+        print(f"Saved candidate index: {len(index['candidates'])} candidates")
+    else:
+        print(f"Candidate index unchanged: {len(index['candidates'])} candidates")
+    return index
+
+def process_candidates(workers=1, force=False):
+    """Build data/fl_candidate_index.json from every election file"""
+    election_files = find_election_files()
+
+    cache = BuildCache()
+    slices = {
+        f"candidates/{os.path.basename(path)}": (path, [path, __file__, LOADER_SOURCE])
+        for path in election_files
+    }
+    results = cached_map(cache, slices,
+                         lambda paths: map_election_files(process_candidate_file, paths, workers),
+                         force=force)
+    cache.save()
+
+    return write_candidate_index(results.values())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the Florida candidate index")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for parsing election files (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the build cache and reprocess every file")
+    args = parser.parse_args()
+
+    print("Building Florida candidate index...")
+    process_candidates(workers=args.workers, force=args.force)
@@ -1,232 +1,192 @@
+import argparse
+from functools import partial
 import pandas as pd
-import geopandas as gpd
 import os
-from collections import defaultdict
+from build_cache import BuildCache, cached_map, write_if_changed
+from district_plans import convert_plans
+from election_loader import (LOADER_SOURCE, STREAM_CHUNK_ROWS, find_election_files, iter_election_chunks,
+                             map_election_files, parse_year_from_filename, read_election_file)
+from registry import OFFICE_TYPES, REGISTRY_SOURCE, canonical_county_name, classify_office
 
-def process_election_data_to_csv():
-    """Process all FL election data and convert to CSV format like NC"""
-    
-    # Election files
-    election_files = [
-        'Election_Data/11022010Election.txt',
-        'Election_Data/11032020Election.txt', 
-        'Election_Data/11042008Election.txt',
-        'Election_Data/11042014Election.txt',
-        'Election_Data/11052024Election.txt',
-        'Election_Data/11062012Election.txt',
-        'Election_Data/11062018Election.txt',
-        'Election_Data/11082016Election.txt',
-        'Election_Data/11082022Election.txt'
-    ]
-    
-    # Year mapping
-    year_mapping = {
-        '11022010Election.txt': '2010',
-        '11032020Election.txt': '2020',
-        '11042008Election.txt': '2008', 
-        '11042014Election.txt': '2014',
-        '11052024Election.txt': '2024',
-        '11062012Election.txt': '2012',
-        '11062018Election.txt': '2018',
-        '11082016Election.txt': '2016',
-        '11082022Election.txt': '2022'
-    }
+# Code the per-year aggregates depend on; editing any of it invalidates cached years
+SOURCE_FILES = [__file__, LOADER_SOURCE, REGISTRY_SOURCE]
+
+# Raw columns the county and congressional aggregates read
+AGGREGATE_COLUMNS = ['PartyCode', 'OfficeDesc', 'CountyName', 'Juris1num', 'CanVotes']
+
+def classify_election_rows(df):
+    """Reduce a raw election frame to the rows of tracked offices with dem/rep/total vote columns"""
+    # Classify each distinct OfficeDesc once instead of once per row
+    office_types = {desc: classify_office(desc) for desc in df['OfficeDesc'].unique()}
+    office = df['OfficeDesc'].map(office_types)
+    
+    tracked = office.notna()
+    df = df[tracked]
+    
+    counties = df['CountyName'].astype(str)
+    county_names = {name: canonical_county_name(name) for name in counties.unique()}
+    
+    votes = pd.to_numeric(df['CanVotes'], errors='coerce').fillna(0).astype('int64')
+    party = df['PartyCode']
+    return pd.DataFrame({
+        'county': counties.map(county_names),
+        'office': office[tracked],
+        'district': pd.to_numeric(df['Juris1num'], errors='coerce'),
+        'dem': votes.where(party == 'DEM', 0),
+        'rep': votes.where(party == 'REP', 0),
+        'total': votes
+    })
+
+def aggregate_county_results(votes, year):
+    """Pivot classified vote rows into one wide record per county for a year"""
+    if votes.empty:
+        return None
+    
+    # Counties keep the order they first appear in, as the CSV always has
+    counties = pd.unique(votes['county'])
+    
+    table = (votes.groupby(['county', 'office'], sort=False)[['dem', 'rep', 'total']].sum()
+             .unstack('office', fill_value=0)
+             .reindex(index=counties)
+             .swaplevel(axis=1)
+             .reindex(columns=pd.MultiIndex.from_product([OFFICE_TYPES, ['dem', 'rep', 'total']]), fill_value=0)
+             .astype('int64'))
+    table.columns = [f"{office}_{party}" for office, party in table.columns]
+    
+    table.insert(0, 'county', table.index)
+    table.insert(0, 'year', year)
+    return table.reset_index(drop=True)
+
+def aggregate_congressional_results(votes, year):
+    """Sum US House votes by congressional district (Juris1num) for a year"""
+    house = votes[(votes['office'] == 'us_house') & votes['district'].notna()]
+    house = house[house['district'] != 0]
+    if house.empty:
+        return None
+    
+    table = house.groupby(house['district'].astype('int64'), sort=False)[['dem', 'rep', 'total']].sum()
+    table.columns = ['us_house_dem', 'us_house_rep', 'us_house_total']
+    
+    table.insert(0, 'district', table.index)
+    table.insert(0, 'year', year)
+    return table.reset_index(drop=True)
+
+def process_election_file(file_path):
+    """Read one election TSV file and aggregate it into (county_df, congressional_df)"""
+    year = parse_year_from_filename(file_path)
+    print(f"Processing {year}...")
     
-    # Office code mapping
-    office_mapping = {
-        'PRE': 'president',
-        'USS': 'us_senate', 
-        'USR': 'us_house',
-        'GOV': 'governor',
-        'SEN': 'state_senate',
-        'REP': 'state_house'
+    df = read_election_file(file_path)
+    if df is None:
+        return None, None
+    
+    return aggregate_election_frame(df, year)
+
+def fold_votes(running, votes):
+    """Fold classified vote rows into running county/office/district sums.
+    
+    Keys keep the order they first appear in, so aggregating the running sums
+    gives exactly what aggregating every row at once would.
+    """
+    parts = [votes] if running is None else [running, votes]
+    combined = pd.concat(parts, ignore_index=True).astype({'county': str, 'office': str})
+    return (combined.groupby(['county', 'office', 'district'], sort=False, dropna=False)[['dem', 'rep', 'total']]
+            .sum().reset_index())
+
+def stream_election_file(file_path, chunk_rows=STREAM_CHUNK_ROWS):
+    """Aggregate one election TSV chunk by chunk into (county_df, congressional_df) in bounded memory"""
+    year = parse_year_from_filename(file_path)
+    print(f"Streaming {year}...")
+    
+    running = None
+    for chunk in iter_election_chunks(file_path, chunk_rows, columns=AGGREGATE_COLUMNS):
+        running = fold_votes(running, classify_election_rows(chunk))
+    if running is None:
+        return None, None
+    
+    return aggregate_county_results(running, year), aggregate_congressional_results(running, year)
+
+def aggregate_election_frame(df, year):
+    """Aggregate one year's parsed election frame into (county_df, congressional_df)"""
+    votes = classify_election_rows(df)
+    return aggregate_county_results(votes, year), aggregate_congressional_results(votes, year)
+
+def process_election_data_to_csv(workers=1, force=False, stream=False, chunk_rows=STREAM_CHUNK_ROWS):
+    """Process all FL election data and convert to CSV format like NC
+    
+    With stream=True each file is read in chunks of chunk_rows rows and folded
+    into running totals instead of being loaded whole; the output is the same.
+    """
+    
+    # Every Election_Data/*Election.txt file, one year per file
+    election_files = find_election_files()
+    
+    # Each year is a cached slice keyed on its TSV and the code that aggregates it
+    cache = BuildCache()
+    slices = {
+        f"county_csv/{os.path.basename(path)}": (path, [path] + SOURCE_FILES)
+        for path in election_files
     }
+    process = partial(stream_election_file, chunk_rows=chunk_rows) if stream else process_election_file
+    results = cached_map(cache, slices,
+                         lambda paths: map_election_files(process, paths, workers),
+                         force=force)
+    cache.save()
     
+    return write_election_csvs(results.values())
+
+def write_election_csvs(yearly_results):
+    """Concatenate per-year (county_df, congressional_df) pairs and save both CSVs"""
     all_county_data = []
     all_congressional_data = []
     
-    for file_path in election_files:
-        if not os.path.exists(file_path):
-            continue
-            
-        year = year_mapping[os.path.basename(file_path)]
-        print(f"Processing {year}...")
-        
-        # Try different encodings
-        df = None
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            try:
-                df = pd.read_csv(file_path, sep='\t', encoding=encoding, low_memory=False)
-                break
-            except:
-                continue
-                
-        if df is None:
-            print(f"Could not read {file_path}")
-            continue
-            
-        # Process county-level data
-        county_results = defaultdict(lambda: defaultdict(lambda: {'dem': 0, 'rep': 0, 'total': 0}))
-        
-        # Process congressional district data  
-        congressional_results = defaultdict(lambda: defaultdict(lambda: {'dem': 0, 'rep': 0, 'total': 0}))
-        
-        for _, row in df.iterrows():
-            county = row['CountyName']
-            
-            # Map county names to match GeoJSON naming
-            county_name_mapping = {
-                'Desoto': 'DeSoto'  # Fix capitalization mismatch
-            }
-            county = county_name_mapping.get(county, county)
-            
-            office_desc = row['OfficeDesc']
-            party = row['PartyCode']
-            votes = int(row['CanVotes']) if pd.notna(row['CanVotes']) else 0
-            
-            # Map office types
-            office_type = None
-            if 'President' in office_desc:
-                office_type = 'president'
-            elif 'United States Senator' in office_desc:
-                office_type = 'us_senate'
-            elif 'United States Representative' in office_desc:
-                office_type = 'us_house'
-                # Also process congressional district data
-                district = int(row['Juris1num']) if pd.notna(row['Juris1num']) else None
-                if district:
-                    if party == 'DEM':
-                        congressional_results[district][office_type]['dem'] += votes
-                    elif party == 'REP':
-                        congressional_results[district][office_type]['rep'] += votes
-                    congressional_results[district][office_type]['total'] += votes
-            elif 'Governor' in office_desc:
-                office_type = 'governor'
-            elif 'Attorney General' in office_desc:
-                office_type = 'attorney_general'
-            elif 'Chief Financial Officer' in office_desc:
-                office_type = 'cfo'
-            elif 'Commissioner of Agriculture' in office_desc:
-                office_type = 'agriculture_commissioner'
-            elif 'State Representative' in office_desc:
-                office_type = 'state_house'
-            elif 'State Senator' in office_desc:
-                office_type = 'state_senate'
-            
-            if office_type:
-                # County level aggregation
-                if party == 'DEM':
-                    county_results[county][office_type]['dem'] += votes
-                elif party == 'REP':
-                    county_results[county][office_type]['rep'] += votes
-                county_results[county][office_type]['total'] += votes
-        
-        # Convert county results to records
-        for county, offices in county_results.items():
-            county_record = {
-                'year': year,
-                'county': county,
-                'president_dem': offices['president']['dem'],
-                'president_rep': offices['president']['rep'], 
-                'president_total': offices['president']['total'],
-                'governor_dem': offices['governor']['dem'],
-                'governor_rep': offices['governor']['rep'],
-                'governor_total': offices['governor']['total'],
-                'us_senate_dem': offices['us_senate']['dem'],
-                'us_senate_rep': offices['us_senate']['rep'],
-                'us_senate_total': offices['us_senate']['total'],
-                'attorney_general_dem': offices['attorney_general']['dem'],
-                'attorney_general_rep': offices['attorney_general']['rep'],
-                'attorney_general_total': offices['attorney_general']['total'],
-                'cfo_dem': offices['cfo']['dem'],
-                'cfo_rep': offices['cfo']['rep'],
-                'cfo_total': offices['cfo']['total'],
-                'agriculture_commissioner_dem': offices['agriculture_commissioner']['dem'],
-                'agriculture_commissioner_rep': offices['agriculture_commissioner']['rep'],
-                'agriculture_commissioner_total': offices['agriculture_commissioner']['total'],
-                'us_house_dem': offices['us_house']['dem'],
-                'us_house_rep': offices['us_house']['rep'],
-                'us_house_total': offices['us_house']['total'],
-                'state_senate_dem': offices['state_senate']['dem'],
-                'state_senate_rep': offices['state_senate']['rep'],
-                'state_senate_total': offices['state_senate']['total'],
-                'state_house_dem': offices['state_house']['dem'],
-                'state_house_rep': offices['state_house']['rep'],
-                'state_house_total': offices['state_house']['total']
-            }
-            all_county_data.append(county_record)
-            
-        # Convert congressional results to records
-        for district, offices in congressional_results.items():
-            cong_record = {
-                'year': year,
-                'district': district,
-                'us_house_dem': offices['us_house']['dem'],
-                'us_house_rep': offices['us_house']['rep'],
-                'us_house_total': offices['us_house']['total']
-            }
-            all_congressional_data.append(cong_record)
+    for county_df, congressional_df in yearly_results:
+        if county_df is not None:
+            all_county_data.append(county_df)
+        if congressional_df is not None:
+            all_congressional_data.append(congressional_df)
     
     # Save county data
-    county_df = pd.DataFrame(all_county_data)
-    county_df.to_csv('data/fl_county_election_results.csv', index=False)
-    print(f"Saved county election data: {len(county_df)} records")
+    county_df = pd.concat(all_county_data, ignore_index=True) if all_county_data else pd.DataFrame()
+    if write_if_changed('data/fl_county_election_results.csv', county_df.to_csv(index=False)):
+        print(f"Saved county election data: {len(county_df)} records")
+    else:
+        print(f"County election data unchanged: {len(county_df)} records")
     
     # Save congressional data
     if all_congressional_data:
-        congressional_df = pd.DataFrame(all_congressional_data)
-        congressional_df.to_csv('data/fl_congressional_election_results.csv', index=False)
-        print(f"Saved congressional election data: {len(congressional_df)} records")
+        congressional_df = pd.concat(all_congressional_data, ignore_index=True)
+        if write_if_changed('data/fl_congressional_election_results.csv', congressional_df.to_csv(index=False)):
+            print(f"Saved congressional election data: {len(congressional_df)} records")
+        else:
+            print(f"Congressional election data unchanged: {len(congressional_df)} records")
     
     return county_df, congressional_df if all_congressional_data else None
 
-def process_congressional_districts_to_csv():
+def process_congressional_districts_to_csv(force=False):
     """Convert congressional district shapefile to CSV with basic info"""
-    try:
-        # Remove duplicate columns and convert to CSV
-        gdf = gpd.read_file('data/S035C8060/S035C8060.shp')
-        
-        # Remove duplicate columns
-        gdf = gdf.loc[:, ~gdf.columns.duplicated()]
-        
-        # Extract key demographic data for CSV
-        district_data = []
-        for _, row in gdf.iterrows():
-            district_record = {
-                'district': int(row['DISTRICT']),
-                'longname': row['LONGNAME'],
-                'shortname': row['SHORTNAME'], 
-                'total_population': int(row['TOTAL']),
-                'white_vap_pct': round(float(row['SRWVAP_P']), 2),
-                'black_vap_pct': round(float(row['NHBVAP_P']), 2),
-                'hispanic_vap_pct': round(float(row['HVAP_P']), 2)
-            }
-            district_data.append(district_record)
-        
-        # Save district info
-        district_df = pd.DataFrame(district_data)
-        district_df = district_df.sort_values('district')
-        district_df.to_csv('data/fl_congressional_districts.csv', index=False)
-        print(f"Saved congressional district data: {len(district_df)} districts")
-        
-        # Also save the GeoJSON (fix duplicate columns issue)
-        gdf.to_file('data/fl_congressional_districts.geojson', driver='GeoJSON')
-        print("Saved congressional districts GeoJSON")
-        
-        return district_df
-        
-    except Exception as e:
-        print(f"Error processing congressional districts: {e}")
-        return None
+    return convert_plans(['congressional'], force=force)['congressional']
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process Florida election data to CSV")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for parsing election files (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the build cache and reprocess every input")
+    parser.add_argument('--stream', action='store_true',
+                        help="read each file in fixed-size chunks with bounded memory (same output)")
+    parser.add_argument('--chunk-rows', type=int, default=STREAM_CHUNK_ROWS,
+                        help="rows per chunk in --stream mode")
+    args = parser.parse_args()
+    
     print("Processing Florida election data to CSV format...")
     
     # Process election data
-    county_df, congressional_df = process_election_data_to_csv()
+    county_df, congressional_df = process_election_data_to_csv(workers=args.workers, force=args.force,
+                                                               stream=args.stream, chunk_rows=args.chunk_rows)
     
     # Process congressional districts
-    district_df = process_congressional_districts_to_csv()
+    district_df = process_congressional_districts_to_csv(force=args.force)
     
     print("\nSummary:")
     print(f"County election data: {len(county_df)} records across {county_df['year'].nunique()} years")
@@ -234,7 +194,7 @@ if __name__ == "__main__":
         print(f"Congressional election data: {len(congressional_df)} records")
     if district_df is not None:
         print(f"Congressional districts: {len(district_df)} districts")
-        
+    
     print("\nFiles created:")
     print("- data/fl_county_election_results.csv")
     print("- data/fl_congressional_election_results.csv") 
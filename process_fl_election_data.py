@@ -1,130 +1,310 @@
 #!/usr/bin/env python3
 """
 Process Florida election TSV files into JSON format for the political map.
+
+The v2 document (data/fl_election_v2.json) lists every contest that has votes
+as one record per line: year, race code, contest key and parallel dem/rep vote
+arrays indexed by county id (the position in county_codes, as in registry.py),
+null where the race was not on a county's ballot. Candidates are looked up in
+the candidate index (process_candidates.py) by year, race and county. The file
+is streamed out contest by contest.
+
+The v1 document (data/fl_election.json, --v1) nests one record per county
+under results_by_year; its county results name their candidates by
+dem_candidate_id / rep_candidate_id, positions in the candidate index.
 """
 
-import pandas as pd
+import argparse
 import json
 import os
 from collections import defaultdict
+import pandas as pd
+import process_candidates
+from build_cache import BuildCache, cached_slices, iter_slices, write_chunks_if_changed, write_if_changed
+from election_loader import LOADER_SOURCE, find_election_files, iter_election_files, parse_year_from_filename, read_election_file
+from registry import COUNTIES, COUNTY_CODES, COUNTY_IDS, REGISTRY_SOURCE
 
-def parse_year_from_filename(filename):
-    """Extract year from filename like '11052024Election.txt' -> '2024'"""
-    date_part = filename.replace('Election.txt', '')
-    return date_part[4:8]
-
-def normalize_county_name(county_name):
-    """Normalize county names to match GeoJSON"""
-    # Handle common variations
-    name = county_name.strip()
-    if name == 'Miami-Dade' or name == 'Dade':
-        return 'Miami-Dade'
-    return name
+OUTPUT_FILE = 'data/fl_election.json'
+OUTPUT_FILE_V2 = 'data/fl_election_v2.json'
+SCHEMA_VERSION = 2
+SHARD_DIR = 'data/results_by_year'
+SHARD_MANIFEST = 'manifest.json'
 
-def process_election_files():
-    """Process all election TSV files in Election_Data folder"""
+def build_year_contests(df, year):
+    """Sum the DEM and REP votes of every race into v2 contest records for one year.
     
-    results_by_year = defaultdict(lambda: defaultdict(lambda: defaultdict(dict)))
+    Each record holds parallel dem/rep arrays indexed by county id, with None
+    for counties where the race was not on the ballot.
+    """
+    county_ids = df['CountyCode'].map(COUNTY_IDS)
+    unknown = sorted(set(df['CountyCode'][county_ids.isna()]))
+    if unknown:
+        print(f"  Skipping unknown county codes {', '.join(map(str, unknown))}")
     
-    # Get all election files
-    election_files = [f for f in os.listdir('Election_Data') if f.endswith('Election.txt')]
-    print(f"Found {len(election_files)} election files")
+    votes = df['CanVotes']
+    sums = (pd.DataFrame({'race': df['RaceCode'], 'county': county_ids,
+                          'dem': votes.where(df['PartyCode'] == 'DEM', 0),
+                          'rep': votes.where(df['PartyCode'] == 'REP', 0)})
+            .dropna(subset=['county'])
+            .astype({'county': int})
+            .groupby(['race', 'county'], sort=True)[['dem', 'rep']].sum())
+    offices = df.groupby('RaceCode', sort=True)['OfficeDesc'].first()
     
-    for filename in election_files:
-        year = parse_year_from_filename(filename)
-        print(f"Processing {filename} -> {year}")
+    contests = []
+    for race_code, race_sums in sums.groupby(level='race', sort=True):
+        print(f"  Processing {race_code}: {offices[race_code]}")
         
-        try:
-            # Read TSV file, handling encoding issues
-            try:
-                df = pd.read_csv(f'Election_Data/{filename}', sep='\t', encoding='utf-8')
-            except UnicodeDecodeError:
-                try:
-                    df = pd.read_csv(f'Election_Data/{filename}', sep='\t', encoding='latin-1')
-                except UnicodeDecodeError:
-                    df = pd.read_csv(f'Election_Data/{filename}', sep='\t', encoding='cp1252')
-            print(f"  Loaded {len(df)} rows")
+        dem = [None] * len(COUNTY_CODES)
+        rep = [None] * len(COUNTY_CODES)
+        counties = race_sums.index.get_level_values('county')
+        for county_id, dem_votes, rep_votes in zip(counties, race_sums['dem'].tolist(), race_sums['rep'].tolist()):
+            dem[county_id] = dem_votes
+            rep[county_id] = rep_votes
+        
+        contests.append({
+            'year': int(year),
+            'race': race_code,
+            'key': f"{race_code.lower()}_{year}_1",
+            'dem': dem,
+            'rep': rep
+        })
+        print(f"    Added {len(race_sums)} county results")
+    
+    return contests
+
+def expand_year_contests(contests):
+    """Build the v1 {race_code: {contest_key: {'results': ...}}} mapping from v2 contest records"""
+    year_results = defaultdict(dict)
+    
+    for contest in contests:
+        race_code = contest['race']
+        county_results = {}
+        
+        for county_code, dem_votes, rep_votes in zip(COUNTY_CODES, contest['dem'], contest['rep']):
+            if dem_votes is None:
+                continue
             
-            # Group by race code
-            for race_code, race_df in df.groupby('RaceCode'):
-                office_desc = race_df['OfficeDesc'].iloc[0]
-                contest_key = f"{race_code.lower()}_{year}_1"
-                
-                print(f"  Processing {race_code}: {office_desc}")
-                
-                # Aggregate by county (since this is county-level data)
-                county_results = {}
-                
-                for county_code, county_df in race_df.groupby('CountyCode'):
-                    county_name = normalize_county_name(county_df['CountyName'].iloc[0])
-                    
-                    # Create a synthetic precinct ID for this county
-                    precinct_id = f"{county_name}_{county_code}_{race_code}"
-                    
-                    dem_votes = 0
-                    rep_votes = 0
-                    dem_candidate = ""
-                    rep_candidate = ""
-                    
-                    # Sum votes by party
-                    for _, row in county_df.iterrows():
-                        if row['PartyCode'] == 'DEM':
-                            dem_votes += row['CanVotes']
-                            if not dem_candidate:
-                                dem_candidate = f"{row['CanNameFirst']} {row['CanNameLast']}"
-                        elif row['PartyCode'] == 'REP':
-                            rep_votes += row['CanVotes']
-                            if not rep_candidate:
-                                rep_candidate = f"{row['CanNameFirst']} {row['CanNameLast']}"
-                    
-                    county_results[precinct_id] = {
-                        'precinct': precinct_id,
-                        'county': county_name,
-                        'dem_votes': dem_votes,
-                        'rep_votes': rep_votes,
-                        'total_votes': dem_votes + rep_votes,
-                        'dem_candidate': dem_candidate,
-                        'rep_candidate': rep_candidate
-                    }
-                
-                # Store results
-                results_by_year[year][race_code.lower()][contest_key] = {
-                    'results': county_results
-                }
-                
-                print(f"    Added {len(county_results)} county results")
+            # Create a synthetic precinct ID for this county
+            county_name = COUNTIES[county_code]
+            precinct_id = f"{county_name}_{county_code}_{race_code}"
+            county_results[precinct_id] = {
+                'precinct': precinct_id,
+                'county': county_name,
+                'dem_votes': dem_votes,
+                'rep_votes': rep_votes,
+                'total_votes': dem_votes + rep_votes
+            }
         
-        except Exception as e:
-            print(f"  Error processing {filename}: {e}")
-            continue
+        year_results[race_code.lower()][contest['key']] = {
+            'results': county_results
+        }
+    
+    return dict(year_results)
+
+def build_year_results(df, year):
+    """Build {race_code: {contest_key: {'results': ...}}} from one year's election frame"""
+    return expand_year_contests(build_year_contests(df, year))
+
+def process_election_file(file_path):
+    """Process one election TSV file into (year, contests)"""
+    filename = os.path.basename(file_path)
+    year = parse_year_from_filename(filename)
+    print(f"Processing {filename} -> {year}")
+    
+    df = read_election_file(file_path)
+    if df is None:
+        return year, []
+    print(f"  Loaded {len(df)} rows ({df.attrs['encoding']})")
+    
+    try:
+        return year, build_year_contests(df, year)
+    except Exception as e:
+        print(f"  Error processing {filename}: {e}")
+        return year, []
+
+def merge_year_results(per_file_results):
+    """Merge (year, year_results) pairs, in order, into the results_by_year document"""
+    results_by_year = defaultdict(lambda: defaultdict(dict))
+    
+    for year, year_results in per_file_results:
+        for contest_type, contests in year_results.items():
+            results_by_year[year][contest_type].update(contests)
     
     # Convert to regular dict for JSON serialization
-    election_data = {
+    return {
         'results_by_year': {
             year: {
-                contest_type: dict(contests) 
+                contest_type: dict(contests)
                 for contest_type, contests in year_data.items()
             }
             for year, year_data in results_by_year.items()
         }
     }
+
+def join_candidate_ids(election_data, index):
+    """Add each county result's DEM and REP candidate ids from the candidate index
+    
+    A party with no candidate in a county gets no id field.
+    """
+    county_codes = {name: code for code, name in COUNTIES.items()}
     
+    for year, year_data in election_data['results_by_year'].items():
+        for contest_type, contests in year_data.items():
+            for contest in contests.values():
+                for result in contest['results'].values():
+                    county_code = county_codes.get(result['county'])
+                    for party, field in (('DEM', 'dem_candidate_id'), ('REP', 'rep_candidate_id')):
+                        candidate = process_candidates.candidate_id(index, year, contest_type.upper(), county_code, party)
+                        if candidate is not None:
+                            result[field] = candidate
+    return election_data
+
+def is_empty_contest(contest):
+    """True for placeholder contests with no DEM or REP votes in any county"""
+    return not any(contest['dem']) and not any(contest['rep'])
+
+def iter_election_json_v2(contests, **fields):
+    """Yield the v2 document as text, one contest record per line; fields are added to the header"""
+    header = {'schema': SCHEMA_VERSION, **fields,
+              'county_codes': COUNTY_CODES, 'county_names': list(COUNTIES.values())}
+    yield json.dumps(header, separators=(',', ':'))[:-1] + ',"contests":['
+    separator = '\n'
+    for contest in contests:
+        yield separator + json.dumps(contest, separators=(',', ':'))
+        separator = ',\n'
+    yield '\n]}\n'
+
+def write_election_json_v2(contests, output_file=OUTPUT_FILE_V2):
+    """Stream v2 contest records to output_file, skipping empty ones; returns how many were written"""
+    written = 0
+    
+    def kept():
+        nonlocal written
+        for contest in contests:
+            if not is_empty_contest(contest):
+                written += 1
+                yield contest
+    
+    if write_chunks_if_changed(output_file, iter_election_json_v2(kept())):
+        print(f"\nSaved {written} contests to {output_file}")
+    else:
+        print(f"\nElection data unchanged: {output_file} ({written} contests)")
+    return written
+
+def write_election_json(election_data, output_file=OUTPUT_FILE):
+    """Write the results_by_year document, leaving the file alone if it is unchanged"""
+    if write_if_changed(output_file, json.dumps(election_data, indent=2)):
+        print(f"\nSaved election data to {output_file}")
+    else:
+        print(f"\nElection data unchanged: {output_file}")
+
+def write_sharded_results(election_data, shard_dir=SHARD_DIR):
+    """Write one compact JSON shard per year and contest type plus a manifest of them.
+    
+    Each shard <shard_dir>/<year>/<race_code>.json holds exactly what
+    results_by_year[year][race_code] holds in the monolithic file, so the map can
+    fetch manifest.json first and then only the contest being viewed.
+    """
+    manifest = {'years': [], 'contests': {}}
+    shard_paths = set()
+    written = 0
+    
+    for year in sorted(election_data['results_by_year']):
+        year_data = election_data['results_by_year'][year]
+        manifest['years'].append(year)
+        manifest['contests'][year] = {}
+        
+        for contest_type in sorted(year_data):
+            relative_path = f"{year}/{contest_type}.json"
+            text = json.dumps(year_data[contest_type], separators=(',', ':'))
+            if write_if_changed(os.path.join(shard_dir, relative_path), text):
+                written += 1
+            shard_paths.add(os.path.normpath(os.path.join(shard_dir, relative_path)))
+            
+            manifest['contests'][year][contest_type] = {
+                'path': relative_path,
+                'bytes': len(text.encode('utf-8')),
+                'contest_keys': sorted(year_data[contest_type])
+            }
+    
+    # Drop shards for contests that are no longer in the data
+    for root, _, files in os.walk(shard_dir):
+        for filename in files:
+            path = os.path.normpath(os.path.join(root, filename))
+            if filename.endswith('.json') and filename != SHARD_MANIFEST and path not in shard_paths:
+                os.remove(path)
+    
+    write_if_changed(os.path.join(shard_dir, SHARD_MANIFEST), json.dumps(manifest, separators=(',', ':')))
+    print(f"Saved {len(shard_paths)} contest shards to {shard_dir} ({written} changed)")
+    return manifest
+
+def process_election_files(workers=1, force=False):
+    """Process all election TSV files in Election_Data folder; returns an iter_year_contests callable
+    
+    Each file's (year, contests) is cached as it is processed and not kept, and
+    every call of the returned function streams them back in filename order,
+    one cached year at a time.
+    """
+    
+    # Get all election files
+    election_files = find_election_files()
+    print(f"Found {len(election_files)} election files")
+    
+    # Only files whose contents (or this script) changed are reprocessed
+    cache = BuildCache()
+    slices = {
+        f"election_json/{os.path.basename(path)}": (path, [path, __file__, LOADER_SOURCE, REGISTRY_SOURCE])
+        for path in election_files
+    }
+    keys = cached_slices(cache, slices,
+                         lambda paths: iter_election_files(process_election_file, paths, workers),
+                         force=force)
+    cache.save()
+    
+    def iter_year_contests():
+        return iter_slices(cache, keys)
+    return iter_year_contests
+
+def build_v1_document(per_file_contests, candidate_index=None):
+    """The v1 results_by_year document, with candidate ids joined from candidate_index if given"""
+    election_data = merge_year_results((year, expand_year_contests(contests))
+                                       for year, contests in per_file_contests)
+    if candidate_index is not None:
+        join_candidate_ids(election_data, candidate_index)
     return election_data
 
 if __name__ == "__main__":
-    print("Processing Florida election data...")
+    parser = argparse.ArgumentParser(description="Process Florida election TSV files into JSON")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for parsing election files (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the build cache and reprocess every file")
+    parser.add_argument('--v1', action='store_true',
+                        help=f"also write the v1 results_by_year document to {OUTPUT_FILE}")
+    parser.add_argument('--sharded', action='store_true',
+                        help=f"also write one v1 JSON shard per year and contest to {SHARD_DIR}")
+    args = parser.parse_args()
     
-    # Process the data
-    election_data = process_election_files()
+    print("Processing Florida election data...")
     
-    # Save to JSON
-    output_file = 'data/fl_election.json'
-    with open(output_file, 'w') as f:
-        json.dump(election_data, f, indent=2)
+    # Process the data and stream it out as v2 JSON
+    iter_year_contests = process_election_files(workers=args.workers, force=args.force)
+    summary = []
+    def stream_contests():
+        for year, contests in iter_year_contests():
+            summary.append((year, len(contests)))
+            yield from contests
+    write_election_json_v2(stream_contests())
     
-    print(f"\nSaved election data to {output_file}")
-    print(f"Years: {list(election_data['results_by_year'].keys())}")
+    # The v1 document is built whole, in a second pass, with candidates named from the candidate index
+    if args.v1 or args.sharded:
+        candidate_index = process_candidates.process_candidates(workers=args.workers, force=args.force)
+        election_data = build_v1_document(iter_year_contests(), candidate_index)
+        if args.v1:
+            write_election_json(election_data)
+        if args.sharded:
+            write_sharded_results(election_data)
     
     # Print summary
-    for year, year_data in election_data['results_by_year'].items():
-        print(f"  {year}: {list(year_data.keys())}")
+    for year, count in summary:
+        print(f"  {year}: {count} contests")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Publish the generated data files as a content-hashed, precompressed bundle.
+
+Every file the map loads is copied to data/bundle/ under a name carrying a
+hash of its contents (fl_county_election_results.3f9c1a2b7d4e.csv), next to
+.gz and, when the brotli module is installed, .br variants for hosts that
+serve precompressed files (nginx gzip_static/brotli_static, most CDNs). Since
+a hashed name always holds the same bytes, the host can cache it forever.
+data/bundle/manifest.json maps each logical name (the keys of CONFIG.paths in
+index.html) to its hashed path and sizes; the map reads it at start-up, so the
+manifest is the only file a repeat visit has to revalidate. Files of the last
+few publishes are kept (data/bundle/generations.json lists them), so a browser
+or CDN still holding an older manifest keeps finding the files it names.
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+from build_cache import write_if_changed
+from topology_export import COUNTY_BOUNDARIES, TOPO_DIR
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; only .gz variants are written without it
+    brotli = None
+
+BUNDLE_DIR = 'data/bundle'
+MANIFEST_FILE = 'manifest.json'
+GENERATIONS_FILE = 'generations.json'
+
+# Publishes whose hashed files stay in the bundle, the current one included
+KEEP_GENERATIONS = 3
+
+# Hex digits of the SHA-256 kept in hashed filenames
+HASH_LENGTH = 12
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Logical name -> generated file, matching CONFIG.paths in index.html
+BUNDLE_FILES = {
+    'counties': COUNTY_BOUNDARIES,
+    'districts': 'data/fl_congressional_districts.geojson',
+    'state_house': 'data/fl_state_house_districts.geojson',
+    'state_senate': 'data/fl_state_senate_districts.geojson',
+    'election': 'data/fl_county_election_results.csv',
+    'congressional': 'data/fl_congressional_election_results.csv',
+    'districts_info': 'data/fl_congressional_districts.csv',
+    'state_house_info': 'data/fl_state_house_districts.csv',
+    'state_senate_info': 'data/fl_state_senate_districts.csv',
+    'election_v2': 'data/fl_election_v2.json',
+    'candidate_index': 'data/fl_candidate_index.json',
+    'geometry': 'data/fl_geometry_index.json'
+}
+
+def bundle_sources():
+    """Every logical name and source file to publish, including the TopoJSON levels if exported.
+    
+    Each level data/topo/<layer>/<level>.topojson is published as topo/<layer>/<level>.
+    data/topo/manifest.json is left out: it names the unhashed level paths, and the
+    bundle manifest lists the hashed ones in its place.
+    """
+    sources = dict(BUNDLE_FILES)
+    for path in sorted(glob.glob(os.path.join(TOPO_DIR, '*', '*.topojson'))):
+        layer = os.path.basename(os.path.dirname(path))
+        sources[f"topo/{layer}/{os.path.splitext(os.path.basename(path))[0]}"] = path
+    return sources
+
+def hashed_name(path, data, stem=None):
+    """'dir/name.ext' -> 'name.<hash>.ext' (or '<stem>.<hash>.ext') for the given contents"""
+    name, ext = os.path.splitext(os.path.basename(path))
+    return f"{stem or name}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+
+def gzip_compress(data):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+def encodings():
+    """(suffix, manifest field, compressor) for every available encoding"""
+    available = [('.gz', 'gzip_bytes', gzip_compress)]
+    if brotli is not None:
+        available.append(('.br', 'br_bytes', brotli_compress))
+    return available
+
+def publish_file(source, bundle_dir=BUNDLE_DIR, stem=None):
+    """Write one file and its compressed variants under its hashed name; returns its manifest entry"""
+    with open(source, 'rb') as f:
+        data = f.read()
+    name = hashed_name(source, data, stem)
+    entry = {'path': f"{bundle_dir}/{name}", 'bytes': len(data)}
+    
+    # A hashed name always holds the same bytes, so only missing files are written
+    path = os.path.join(bundle_dir, name)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    for suffix, field, compress in encodings():
+        if not os.path.exists(path + suffix):
+            with open(path + suffix, 'wb') as f:
+                f.write(compress(data))
+        entry[field] = os.path.getsize(path + suffix)
+    return entry
+
+def load_generations(bundle_dir=BUNDLE_DIR):
+    """Hashed file names of each recent publish, oldest first"""
+    path = os.path.join(bundle_dir, GENERATIONS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def publish_bundle(bundle_dir=BUNDLE_DIR, keep_generations=KEEP_GENERATIONS):
+    """Publish every generated data file that exists and write the manifest; returns the manifest"""
+    os.makedirs(bundle_dir, exist_ok=True)
+    manifest = {'files': {}}
+    
+    for logical_name, source in bundle_sources().items():
+        if not os.path.exists(source):
+            print(f"  Skipping {logical_name}: {source} not found")
+            continue
+        # TopoJSON levels share file names across layers, so their hashed names carry the layer
+        stem = logical_name[len('topo/'):].replace('/', '-') if logical_name.startswith('topo/') else None
+        entry = publish_file(source, bundle_dir, stem)
+        manifest['files'][logical_name] = entry
+        sizes = ''.join(f", {entry[field]:,} {suffix}" for suffix, field, _ in encodings())
+        print(f"  {logical_name}: {entry['path']} ({entry['bytes']:,} bytes{sizes})")
+    
+    # Drop hashed files that none of the last keep_generations manifests names
+    published = sorted(os.path.basename(entry['path']) for entry in manifest['files'].values())
+    generations = load_generations(bundle_dir)
+    if not generations or generations[-1] != published:
+        generations.append(published)
+    generations = generations[-max(keep_generations, 1):]
+    kept = {filename for generation in generations for filename in generation}
+    for filename in os.listdir(bundle_dir):
+        base = filename[:-3] if filename.endswith(('.gz', '.br')) else filename
+        if filename not in (MANIFEST_FILE, GENERATIONS_FILE) and base not in kept:
+            os.remove(os.path.join(bundle_dir, filename))
+    write_if_changed(os.path.join(bundle_dir, GENERATIONS_FILE), json.dumps(generations, indent=2))
+    
+    write_if_changed(os.path.join(bundle_dir, MANIFEST_FILE), json.dumps(manifest, indent=2))
+    print(f"Published {len(manifest['files'])} files to {bundle_dir}")
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish generated data as a content-hashed, precompressed bundle")
+    parser.add_argument('--bundle-dir', default=BUNDLE_DIR,
+                        help="directory to publish into, relative to the site root")
+    parser.add_argument('--keep-generations', type=int, default=KEEP_GENERATIONS,
+                        help="recent publishes whose files stay available to clients with an older manifest")
+    args = parser.parse_args()
+    
+    if brotli is None:
+        print("brotli is not installed; writing gzip variants only")
+    publish_bundle(args.bundle_dir, args.keep_generations)
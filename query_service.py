@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Local HTTP service answering slice queries over the built election results.
+
+One asyncio process loads the county and congressional result CSVs once and
+serves small slices of them, so map clients fetch only what they show:
+
+  GET /slice?year=2020&office=president&level=county
+  GET /slice?year=2022&office=governor&level=state_house
+  GET /history?county=Alachua
+  GET /meta
+
+Levels are county, congressional, state_house and state_senate; district
+levels other than actual US House results are estimated from county results
+through the overlay index (overlay_index.py). Responses are column-oriented
+JSON, or Arrow IPC with format=arrow. Rendered responses are kept in an LRU
+cache with their gzip form and an ETag, so hot slices cost one lookup and
+clients revalidating with If-None-Match get a bodiless 304. The cache is
+cleared when the result files are rebuilt.
+
+Cache hits are answered on the event loop itself. Cache misses (which may
+build an overlay on first use) and reloads of rebuilt result files run in
+worker threads, one at a time under a lock, so they never stall the clients
+whose responses are already cached.
+"""
+
+import argparse
+import asyncio
+import functools
+import gzip
+import hashlib
+import json
+import os
+import threading
+import traceback
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote, urlsplit
+import pandas as pd
+from overlay_index import COUNTY_BOUNDARIES, allocate_to_districts, load_overlay
+from registry import OFFICE_TYPES, county_match_key
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; format=arrow is refused without it
+    pa = None
+
+COUNTY_RESULTS = 'data/fl_county_election_results.csv'
+CONGRESSIONAL_RESULTS = 'data/fl_congressional_election_results.csv'
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Rendered responses kept in memory, one per distinct query and format
+DEFAULT_CACHE_SIZE = 512
+
+# Responses smaller than this are sent uncompressed
+MIN_GZIP_BYTES = 1024
+
+LEVELS = ['county', 'congressional', 'state_house', 'state_senate']
+PARTIES = ['dem', 'rep', 'total']
+FORMATS = {'json': 'application/json', 'arrow': 'application/vnd.apache.arrow.stream'}
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 406: 'Not Acceptable', 500: 'Internal Server Error',
+               503: 'Service Unavailable'}
+
+class QueryError(Exception):
+    """A query that cannot be answered, with the HTTP status to answer it with"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def encode_body(meta, columns, fmt):
+    """Serialize a slice: compact JSON, or an Arrow IPC stream with meta in the schema metadata"""
+    if fmt == 'json':
+        return json.dumps({**meta, **columns}, separators=(',', ':')).encode('utf-8')
+    if pa is None:
+        raise QueryError(406, "format=arrow needs pyarrow, which is not installed")
+    table = pa.Table.from_pydict(columns).replace_schema_metadata({'meta': json.dumps(meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+class ResultsService:
+    """Result slices rendered from the result CSVs, with an LRU cache of rendered responses"""
+    
+    def __init__(self, county_results=COUNTY_RESULTS, congressional_results=CONGRESSIONAL_RESULTS,
+                 county_path=COUNTY_BOUNDARIES, cache_size=DEFAULT_CACHE_SIZE):
+        self.sources = [county_results, congressional_results]
+        self.county_path = county_path
+        self.overlays = {}
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        # cache_lock guards the LRU dict and is only held for a lookup or insert;
+        # lock serializes renders and reloads, which run in worker threads
+        self.cache_lock = threading.Lock()
+        self.lock = threading.Lock()
+        self.versions = None
+        self.refresh()
+    
+    def source_versions(self):
+        return [(os.stat(path).st_mtime_ns, os.stat(path).st_size) if os.path.exists(path) else None
+                for path in self.sources]
+    
+    def changed(self):
+        """Whether any result file changed on disk since it was loaded"""
+        return self.source_versions() != self.versions
+    
+    def refresh(self):
+        """Reload the result files and clear the cache if any of them changed on disk"""
+        with self.lock:
+            versions = self.source_versions()
+            if versions == self.versions:
+                return
+            
+            county_results, congressional_results = self.sources
+            self.county = pd.read_csv(county_results)
+            self.congressional = (pd.read_csv(congressional_results) if os.path.exists(congressional_results)
+                                  else pd.DataFrame(columns=['year', 'district']))
+            self.county_keys = {county_match_key(name): name for name in self.county['county'].unique()}
+            self.versions = versions
+            with self.cache_lock:
+                self.cache.clear()
+        print(f"Loaded {len(self.county)} county rows and {len(self.congressional)} congressional rows")
+    
+    def meta(self):
+        return {
+            'years': sorted(int(y) for y in self.county['year'].unique()),
+            'offices': OFFICE_TYPES,
+            'levels': LEVELS,
+            'counties': sorted(self.county['county'].unique()),
+            'formats': [fmt for fmt in FORMATS if fmt == 'json' or pa is not None]
+        }
+    
+    def overlay(self, level):
+        if level not in self.overlays:
+            if not os.path.exists(self.county_path):
+                raise QueryError(503, f"{level} estimates need the county boundaries ({self.county_path})")
+            self.overlays[level] = load_overlay(level, self.county_path)
+        return self.overlays[level]
+    
+    def slice_columns(self, year, office, level):
+        """{'id': [...], 'dem': [...], 'rep': [...], 'total': [...]} for one year, office and level"""
+        columns = [f"{office}_{party}" for party in PARTIES]
+        if level == 'congressional' and office == 'us_house':
+            rows = self.congressional[self.congressional['year'] == year].set_index('district')[columns]
+        else:
+            rows = self.county[self.county['year'] == year].set_index('county')[columns]
+            if level != 'county':
+                rows = allocate_to_districts(self.overlay(level), rows).round().astype(int)
+        
+        if rows.empty or not rows[f"{office}_total"].any():
+            raise QueryError(404, f"no {office} results for {year}")
+        result = {'id': [str(i) if level == 'county' else int(i) for i in rows.index]}
+        for party, column in zip(PARTIES, columns):
+            result[party] = [int(v) for v in rows[column]]
+        return result
+    
+    def history_columns(self, county):
+        """Every year and office of one county, as parallel columns"""
+        name = self.county_keys.get(county_match_key(county))
+        if name is None:
+            raise QueryError(404, f"unknown county {county!r}")
+        rows = self.county[self.county['county'] == name].sort_values('year')
+        
+        result = {'year': [], 'office': [], 'dem': [], 'rep': [], 'total': []}
+        for row in rows.itertuples(index=False):
+            for office in OFFICE_TYPES:
+                total = int(getattr(row, f"{office}_total"))
+                if total:
+                    result['year'].append(int(row.year))
+                    result['office'].append(office)
+                    result['dem'].append(int(getattr(row, f"{office}_dem")))
+                    result['rep'].append(int(getattr(row, f"{office}_rep")))
+                    result['total'].append(total)
+        return name, result
+    
+    def cached(self, query):
+        """The cached render of a parsed query, or None; cheap enough for the event loop"""
+        with self.cache_lock:
+            rendered = self.cache.get(query)
+            if rendered is not None:
+                self.cache.move_to_end(query)
+            return rendered
+    
+    def render(self, query):
+        """Render a parsed query and cache it; may be slow, so run it off the event loop"""
+        with self.lock:
+            rendered = self.cached(query)
+            if rendered is None:
+                rendered = self._render(*query)
+                with self.cache_lock:
+                    self.cache[query] = rendered
+                    if len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+            return rendered
+    
+    def _render(self, kind, key, fmt):
+        """(body, gzipped body or None, etag) of one query; cached by self.render"""
+        if kind == 'slice':
+            year, office, level = key
+            meta = {'year': year, 'office': office, 'level': level}
+            body = encode_body(meta, self.slice_columns(year, office, level), fmt)
+        elif kind == 'history':
+            name, columns = self.history_columns(key)
+            body = encode_body({'county': name}, columns, fmt)
+        else:
+            body = json.dumps(self.meta(), separators=(',', ':')).encode('utf-8')
+        
+        etag = f'"{hashlib.sha256(body).hexdigest()[:20]}"'
+        compressed = gzip.compress(body, mtime=0) if len(body) >= MIN_GZIP_BYTES else None
+        return body, compressed, etag
+    
+    def parse(self, path, params):
+        """Parse a request path and query string into a (kind, key, format) query"""
+        def param(name, choices=None, default=None):
+            value = params.get(name, [default])[0]
+            if value is None:
+                raise QueryError(400, f"missing parameter {name!r}")
+            if choices is not None and value not in choices:
+                raise QueryError(400, f"{name} must be one of {', '.join(choices)}")
+            return value
+        
+        fmt = param('format', FORMATS, 'json')
+        if path == '/slice':
+            year = param('year')
+            if not year.isdigit():
+                raise QueryError(400, "year must be a number")
+            return 'slice', (int(year), param('office', OFFICE_TYPES), param('level', LEVELS)), fmt
+        if path == '/history':
+            return 'history', param('county'), fmt
+        if path.startswith('/history/'):
+            return 'history', unquote(path[len('/history/'):]), fmt
+        if path == '/meta':
+            return 'meta', None, 'json'
+        raise QueryError(404, f"unknown path {path}")
+
+def response(status, headers, body=b''):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Content-Length: {len(body)}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+def error_response(status, message):
+    return response(status, {'Content-Type': 'application/json'}, json.dumps({'error': message}).encode('utf-8'))
+
+async def handle_request(service, method, target, headers):
+    """Bytes of the HTTP response to one request.
+    
+    A cached response is answered right here on the event loop; a miss or a
+    reload of changed result files runs in the loop's default executor.
+    """
+    if method not in ('GET', 'HEAD'):
+        return response(405, {'Allow': 'GET, HEAD'})
+    url = urlsplit(target)
+    loop = asyncio.get_running_loop()
+    try:
+        query = service.parse(url.path, parse_qs(url.query))
+        if service.changed():
+            await loop.run_in_executor(None, service.refresh)
+        rendered = service.cached(query)
+        if rendered is None:
+            rendered = await loop.run_in_executor(None, service.render, query)
+    except QueryError as e:
+        return error_response(e.status, str(e))
+    except Exception as e:
+        traceback.print_exc()
+        return error_response(500, f"internal error: {e}")
+    body, compressed, etag = rendered
+    fmt = query[2]
+    
+    # Clients may keep a copy but must revalidate it; a matching ETag costs no body
+    out = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding',
+           'Access-Control-Allow-Origin': '*'}
+    if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+        return response(304, out)
+    out['Content-Type'] = FORMATS[fmt]
+    if compressed is not None and 'gzip' in headers.get('accept-encoding', ''):
+        out['Content-Encoding'] = 'gzip'
+        body = compressed
+    return response(200, out, b'' if method == 'HEAD' else body)
+
+async def serve_connection(service, reader, writer):
+    """Answer requests on one keep-alive connection until the client closes it"""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            
+            parts = request_line.decode('latin-1').split()
+            if len(parts) != 3:
+                writer.write(error_response(400, "malformed request line"))
+                await writer.drain()
+                break
+            method, target, version = parts
+            writer.write(await handle_request(service, method, target, headers))
+            await writer.drain()
+            if headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0':
+                break
+    except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def run_service(host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=DEFAULT_CACHE_SIZE):
+    service = ResultsService(cache_size=cache_size)
+    server = await asyncio.start_server(functools.partial(serve_connection, service), host, port)
+    print(f"Serving election results on http://{host}:{port}/ (cache {cache_size} responses)")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve slices of the election results over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help="rendered responses kept in the LRU cache")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(run_service(args.host, args.port, args.cache_size))
+    except KeyboardInterrupt:
+        pass
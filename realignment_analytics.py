@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Precompute realignment analytics from the county election results.
+
+data/fl_county_election_results.csv is loaded into one dense
+year x county x office x party array (dem, rep, total votes), and the derived
+views are whole-array NumPy operations: two-party margins, the shift since the
+previous contest for the same office, the shift from a baseline year,
+turnout change, and how consistently each county shifted across offices.
+Margins and shifts are in percentage points, (dem - rep) / (dem + rep), so
+positive is Democratic, as on the map. Tables are written to data/analytics/.
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from build_cache import write_if_changed
+from registry import OFFICE_TYPES
+
+COUNTY_RESULTS = 'data/fl_county_election_results.csv'
+ANALYTICS_DIR = 'data/analytics'
+
+# Party axis of the results array
+PARTIES = ['dem', 'rep', 'total']
+
+def load_results_array(path=COUNTY_RESULTS):
+    """Load the county CSV as (years, counties, votes[year, county, office, party]).
+    
+    County/year pairs missing from the CSV are NaN.
+    """
+    df = pd.read_csv(path)
+    years = np.sort(df['year'].unique())
+    counties = np.sort(df['county'].unique())
+    
+    columns = [f"{office}_{party}" for office in OFFICE_TYPES for party in PARTIES]
+    full = pd.MultiIndex.from_product([years, counties], names=['year', 'county'])
+    values = df.set_index(['year', 'county'])[columns].reindex(full).to_numpy(dtype=float)
+    return years, counties, values.reshape(len(years), len(counties), len(OFFICE_TYPES), len(PARTIES))
+
+def two_party_margin(votes):
+    """(dem - rep) / (dem + rep) in points; NaN where the contest had no major-party votes"""
+    dem, rep = votes[..., 0], votes[..., 1]
+    two_party = dem + rep
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(two_party > 0, 100 * (dem - rep) / two_party, np.nan)
+
+def previous_contest(valid):
+    """For each year, the index of the latest earlier year where the contest was held (-1 if none)"""
+    years = np.arange(valid.shape[0]).reshape((-1,) + (1,) * (valid.ndim - 1))
+    last_held = np.maximum.accumulate(np.where(valid, years, -1), axis=0)
+    previous = np.full_like(last_held, -1)
+    previous[1:] = last_held[:-1]
+    return previous
+
+def take_previous(values, previous):
+    """values at each cell's previous-contest year, NaN where there is none"""
+    taken = np.take_along_axis(values, np.maximum(previous, 0), axis=0)
+    return np.where(previous >= 0, taken, np.nan)
+
+def compute_analytics(years, votes, baseline=None):
+    """Every derived view of a [year, county, office, party] vote array, as a dict of arrays"""
+    margin = two_party_margin(votes)
+    total = votes[..., 2]
+    held = ~np.isnan(margin)
+    
+    previous = previous_contest(held)
+    shift = margin - take_previous(margin, previous)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        turnout_change = 100 * (total / take_previous(total, previous) - 1)
+    
+    baseline_year = years[0] if baseline is None else baseline
+    if baseline_year not in years:
+        raise ValueError(f"no results for baseline year {baseline_year}")
+    baseline_shift = margin - margin[np.searchsorted(years, baseline_year)]
+    
+    # Consistency across offices: the share of offices that moved the same way
+    # as the county's average shift that year
+    compared = ~np.isnan(shift)
+    count = compared.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_shift = np.where(count > 0, np.nansum(shift, axis=-1) / count, np.nan)
+        spread = np.sqrt(np.nansum((shift - mean_shift[..., None]) ** 2, axis=-1) / count)
+        agreeing = (np.sign(shift) == np.sign(mean_shift)[..., None]) & compared
+        consistency = np.where(count > 0, agreeing.sum(axis=-1) / count, np.nan)
+    
+    return {
+        'margin': margin,
+        'shift': shift,
+        'baseline_shift': baseline_shift,
+        'turnout_change': turnout_change,
+        'offices_compared': count,
+        'mean_shift': mean_shift,
+        'shift_std': spread,
+        'consistency': consistency,
+        'baseline_year': baseline_year
+    }
+
+def county_office_table(years, counties, votes, analytics):
+    """Long table: one row per year, county and contested office"""
+    index = pd.MultiIndex.from_product([years, counties, OFFICE_TYPES], names=['year', 'county', 'office'])
+    table = pd.DataFrame({
+        'dem': votes[..., 0].ravel(),
+        'rep': votes[..., 1].ravel(),
+        'total': votes[..., 2].ravel(),
+        'margin': analytics['margin'].ravel(),
+        'shift': analytics['shift'].ravel(),
+        f"shift_since_{analytics['baseline_year']}": analytics['baseline_shift'].ravel(),
+        'turnout_change': analytics['turnout_change'].ravel()
+    }, index=index)
+    table = table[table['margin'].notna()]
+    table[['dem', 'rep', 'total']] = table[['dem', 'rep', 'total']].astype('int64')
+    return table.round(2).reset_index()
+
+def county_consistency_table(years, counties, analytics):
+    """One row per year and county: how uniformly the county shifted across offices"""
+    index = pd.MultiIndex.from_product([years, counties], names=['year', 'county'])
+    table = pd.DataFrame({
+        'offices_compared': analytics['offices_compared'].ravel(),
+        'mean_shift': analytics['mean_shift'].ravel(),
+        'shift_std': analytics['shift_std'].ravel(),
+        'consistency': analytics['consistency'].ravel()
+    }, index=index)
+    return table[table['offices_compared'] > 0].round(3).reset_index()
+
+def statewide_table(years, votes, baseline=None):
+    """Statewide margins and shifts per year and office, from the summed county votes"""
+    statewide = np.nansum(votes, axis=1, keepdims=True)
+    analytics = compute_analytics(years, statewide, baseline)
+    return county_office_table(years, ['Florida'], statewide, analytics).drop(columns='county')
+
+def write_analytics(baseline=None, results_path=COUNTY_RESULTS, output_dir=ANALYTICS_DIR):
+    """Compute every analytics table and write them to output_dir"""
+    years, counties, votes = load_results_array(results_path)
+    
+    start = time.perf_counter()
+    analytics = compute_analytics(years, votes, baseline)
+    tables = {
+        'county_margins.csv': county_office_table(years, counties, votes, analytics),
+        'county_shift_consistency.csv': county_consistency_table(years, counties, analytics),
+        'statewide_margins.csv': statewide_table(years, votes, baseline)
+    }
+    elapsed = time.perf_counter() - start
+    print(f"Computed {votes.shape[0]} years x {votes.shape[1]} counties x {votes.shape[2]} offices in {elapsed * 1000:.0f} ms")
+    
+    for filename, table in tables.items():
+        path = os.path.join(output_dir, filename)
+        if write_if_changed(path, table.to_csv(index=False)):
+            print(f"Saved {path}: {len(table)} rows")
+        else:
+            print(f"{path} unchanged: {len(table)} rows")
+    return tables
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute margins, shifts and turnout change from county results")
+    parser.add_argument('--baseline', type=int,
+                        help="year shifts are also measured from (default: the first year)")
+    args = parser.parse_args()
+    
+    write_analytics(baseline=args.baseline)
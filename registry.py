@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Canonical registry of the counties, offices and parties in the results.
+
+Every county has a fixed integer id (its position in COUNTIES, keyed by the
+Division of Elections CountyCode) and one canonical name, so scripts join on
+ids or on canonical_county_name instead of each patching spellings like
+'Desoto' or 'Dade' on its own. Offices and parties get ids the same way.
+"""
+
+# Scripts whose output depends on the registry hash this module
+REGISTRY_SOURCE = __file__
+
+# CountyCode -> canonical county name (as the county boundaries spell it);
+# a county's id is its position here
+COUNTIES = {
+    'ALA': 'Alachua',
+    'BAK': 'Baker',
+    'BAY': 'Bay',
+    'BRA': 'Bradford',
+    'BRE': 'Brevard',
+    'BRO': 'Broward',
+    'CAL': 'Calhoun',
+    'CHA': 'Charlotte',
+    'CIT': 'Citrus',
+    'CLA': 'Clay',
+    'CLL': 'Collier',
+    'CLM': 'Columbia',
+    'DAD': 'Miami-Dade',
+    'DES': 'DeSoto',
+    'DIX': 'Dixie',
+    'DUV': 'Duval',
+    'ESC': 'Escambia',
+    'FLA': 'Flagler',
+    'FRA': 'Franklin',
+    'GAD': 'Gadsden',
+    'GIL': 'Gilchrist',
+    'GLA': 'Glades',
+    'GUL': 'Gulf',
+    'HAM': 'Hamilton',
+    'HAR': 'Hardee',
+    'HEN': 'Hendry',
+    'HER': 'Hernando',
+    'HIG': 'Highlands',
+    'HIL': 'Hillsborough',
+    'HOL': 'Holmes',
+    'IND': 'Indian River',
+    'JAC': 'Jackson',
+    'JEF': 'Jefferson',
+    'LAF': 'Lafayette',
+    'LAK': 'Lake',
+    'LEE': 'Lee',
+    'LEO': 'Leon',
+    'LEV': 'Levy',
+    'LIB': 'Liberty',
+    'MAD': 'Madison',
+    'MAN': 'Manatee',
+    'MON': 'Monroe',
+    'MRN': 'Marion',
+    'MRT': 'Martin',
+    'NAS': 'Nassau',
+    'OKA': 'Okaloosa',
+    'OKE': 'Okeechobee',
+    'ORA': 'Orange',
+    'OSC': 'Osceola',
+    'PAL': 'Palm Beach',
+    'PAS': 'Pasco',
+    'PIN': 'Pinellas',
+    'POL': 'Polk',
+    'PUT': 'Putnam',
+    'SAN': 'Santa Rosa',
+    'SAR': 'Sarasota',
+    'SEM': 'Seminole',
+    'STJ': 'St. Johns',
+    'STL': 'St. Lucie',
+    'SUM': 'Sumter',
+    'SUW': 'Suwannee',
+    'TAY': 'Taylor',
+    'UNI': 'Union',
+    'VOL': 'Volusia',
+    'WAK': 'Wakulla',
+    'WAL': 'Walton',
+    'WAS': 'Washington'
+}
+COUNTY_CODES = list(COUNTIES)
+COUNTY_IDS = {code: i for i, code in enumerate(COUNTY_CODES)}
+
+# Spellings found in the source data or other files, mapped to the canonical name
+COUNTY_ALIASES = {
+    'Desoto': 'DeSoto',
+    'De Soto': 'DeSoto',
+    'Dade': 'Miami-Dade',
+    'Miami Dade': 'Miami-Dade'
+}
+
+# Office types in the column order of the county CSV; an office's id is its position
+OFFICE_TYPES = [
+    'president',
+    'governor',
+    'us_senate',
+    'attorney_general',
+    'cfo',
+    'agriculture_commissioner',
+    'us_house',
+    'state_senate',
+    'state_house'
+]
+OFFICE_IDS = {office: i for i, office in enumerate(OFFICE_TYPES)}
+
+# OfficeDesc substrings checked in order - the first match wins
+OFFICE_PATTERNS = [
+    ('President', 'president'),
+    ('United States Senator', 'us_senate'),
+    ('United States Representative', 'us_house'),
+    ('Governor', 'governor'),
+    ('Attorney General', 'attorney_general'),
+    ('Chief Financial Officer', 'cfo'),
+    ('Commissioner of Agriculture', 'agriculture_commissioner'),
+    ('State Representative', 'state_house'),
+    ('State Senator', 'state_senate')
+]
+
+# Party axis of the results cube; every PartyCode other than DEM/REP counts as other
+PARTIES = ['dem', 'rep', 'other']
+PARTY_IDS = {'DEM': 0, 'REP': 1}
+OTHER_PARTY_ID = 2
+
+def canonical_county_name(name):
+    """The registry spelling of a county name ('Desoto' -> 'DeSoto', 'Dade' -> 'Miami-Dade')"""
+    name = str(name).strip()
+    return COUNTY_ALIASES.get(name, name)
+
+def county_match_key(name):
+    """Loose key for joining county names across files ('St. Lucie' == 'ST LUCIE')"""
+    name = canonical_county_name(name)
+    return ' '.join(''.join(c for c in name if c.isalnum() or c == ' ').split()).upper()
+
+def classify_office(office_desc):
+    """Map an OfficeDesc like 'United States Senator' to an office type, or None"""
+    if not isinstance(office_desc, str):
+        return None
+    for pattern, office_type in OFFICE_PATTERNS:
+        if pattern in office_desc:
+            return office_type
+    return None
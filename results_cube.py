@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Integer-indexed results cube saved in a memory-mappable format.
+
+Every tracked contest's votes are summed into one fixed-shape int32 array,
+cube[year, county, office, party], with the axes numbered by registry.py
+(counties by CountyCode, offices, and dem/rep/other parties). The array is
+written to data/results_cube/cube.npy next to registry.json, which lists the
+labels of each axis. open_results_cube maps the file read-only, so any script
+can index it without parsing or copying it, and processes share one copy
+through the page cache.
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+from build_cache import BuildCache, cached_map, write_if_changed
+from election_loader import LOADER_SOURCE, find_election_files, map_election_files, parse_year_from_filename, read_election_file
+from registry import (COUNTIES, COUNTY_CODES, COUNTY_IDS, OFFICE_IDS, OFFICE_TYPES, OTHER_PARTY_ID, PARTIES,
+                      PARTY_IDS, REGISTRY_SOURCE, classify_office)
+
+CUBE_DIR = 'data/results_cube'
+CUBE_FILE = 'cube.npy'
+REGISTRY_FILE = 'registry.json'
+CUBE_DTYPE = np.int32
+
+SOURCE_FILES = [__file__, LOADER_SOURCE, REGISTRY_SOURCE]
+
+def year_slice(file_path):
+    """Sum one election file's votes into a [county, office, party] int64 array, or None"""
+    df = read_election_file(file_path)
+    if df is None:
+        return None
+    
+    office_ids = {desc: OFFICE_IDS.get(classify_office(desc), -1) for desc in df['OfficeDesc'].unique()}
+    office = df['OfficeDesc'].map(office_ids).to_numpy()
+    county = df['CountyCode'].map(COUNTY_IDS).fillna(-1).astype(int).to_numpy()
+    party = df['PartyCode'].map(PARTY_IDS).fillna(OTHER_PARTY_ID).astype(int).to_numpy()
+    votes = pd.to_numeric(df['CanVotes'], errors='coerce').fillna(0).astype('int64').to_numpy()
+    
+    unknown = sorted(set(df['CountyCode'][county < 0]))
+    if unknown:
+        print(f"  {file_path}: skipping unknown county codes {', '.join(map(str, unknown))}")
+    
+    tracked = (office >= 0) & (county >= 0)
+    counts = np.zeros((len(COUNTY_CODES), len(OFFICE_TYPES), len(PARTIES)), dtype=np.int64)
+    np.add.at(counts, (county[tracked], office[tracked], party[tracked]), votes[tracked])
+    return counts
+
+def cube_registry(years):
+    """Labels for every axis of the cube, in id order"""
+    return {
+        'axes': ['year', 'county', 'office', 'party'],
+        'years': [int(y) for y in years],
+        'counties': [{'id': i, 'code': code, 'name': COUNTIES[code]} for i, code in enumerate(COUNTY_CODES)],
+        'offices': OFFICE_TYPES,
+        'parties': PARTIES,
+        'dtype': np.dtype(CUBE_DTYPE).name,
+        'shape': [len(years), len(COUNTY_CODES), len(OFFICE_TYPES), len(PARTIES)]
+    }
+
+def build_results_cube(workers=1, force=False, cube_dir=CUBE_DIR):
+    """Build the cube from every election file, reusing cached per-year slices"""
+    election_files = find_election_files()
+    
+    cache = BuildCache()
+    slices = {
+        f"cube/{os.path.basename(path)}": (path, [path] + SOURCE_FILES)
+        for path in election_files
+    }
+    results = cached_map(cache, slices,
+                         lambda paths: map_election_files(year_slice, paths, workers),
+                         force=force)
+    cache.save()
+    
+    by_year = {}
+    for path, counts in zip(election_files, results.values()):
+        if counts is not None:
+            by_year[int(parse_year_from_filename(path))] = counts
+    years = sorted(by_year)
+    
+    empty = np.zeros((0, len(COUNTY_CODES), len(OFFICE_TYPES), len(PARTIES)), dtype=np.int64)
+    cube = np.stack([by_year[year] for year in years]) if years else empty
+    if cube.size and cube.max() > np.iinfo(CUBE_DTYPE).max:
+        raise OverflowError(f"vote counts exceed {np.dtype(CUBE_DTYPE).name}")
+    cube = cube.astype(CUBE_DTYPE)
+    
+    # Written under a temporary name so readers mapping the old file never see a partial one
+    os.makedirs(cube_dir, exist_ok=True)
+    cube_path = os.path.join(cube_dir, CUBE_FILE)
+    tmp_path = f"{cube_path}.{os.getpid()}.tmp.npy"
+    np.save(tmp_path, cube)
+    os.replace(tmp_path, cube_path)
+    write_if_changed(os.path.join(cube_dir, REGISTRY_FILE), json.dumps(cube_registry(years), indent=2))
+    
+    print(f"Results cube: {' x '.join(map(str, cube.shape))} {cube.dtype} ({cube.nbytes:,} bytes) -> {cube_path}")
+    return cube_path
+
+def open_results_cube(cube_dir=CUBE_DIR):
+    """Return (registry, cube) with the cube memory-mapped read-only"""
+    with open(os.path.join(cube_dir, REGISTRY_FILE)) as f:
+        registry = json.load(f)
+    cube = np.load(os.path.join(cube_dir, CUBE_FILE), mmap_mode='r')
+    return registry, cube
+
+def axis_index(registry, axis, label):
+    """Integer id of a label on one axis, e.g. axis_index(registry, 'county', 'DES')"""
+    if axis == 'county':
+        return COUNTY_IDS[label]
+    labels = {'year': registry['years'], 'office': registry['offices'], 'party': registry['parties']}[axis]
+    return labels.index(int(label) if axis == 'year' else label)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped results cube")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for parsing election files (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="ignore the build cache and reprocess every file")
+    args = parser.parse_args()
+    
+    build_results_cube(workers=args.workers, force=args.force)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Indexed SQLite database of the raw election rows and the derived tables.
+
+build_results_db bulk-loads every Election_Data row (table election_rows,
+with a year column) together with the county and congressional result CSVs
+and the district info CSVs into data/fl_results.sqlite. Rows go in with
+batched executemany calls inside a single transaction, and the indexes are
+created after the load: (year, RaceCode, CountyCode) for county lookups and
+(year, RaceCode, Juris1num) for district lookups. The database is built under
+a temporary name and swapped in whole, and only rebuilt when an input changed.
+
+The query functions return pandas frames, e.g. every US House row for
+district 7 since 2012:
+
+    race_rows('USR', district=7, since=2012)
+"""
+
+import argparse
+import contextlib
+import os
+import sqlite3
+import pandas as pd
+from build_cache import BuildCache
+from election_loader import LOADER_SOURCE, find_election_files, map_election_files, parse_year_from_filename, read_election_file
+
+DB_FILE = 'data/fl_results.sqlite'
+
+# Rows per executemany batch
+BATCH_ROWS = 50_000
+
+# Raw Election_Data columns and their SQLite types
+ROW_COLUMNS = {
+    'year': 'INTEGER',
+    'ElectionDate': 'TEXT',
+    'PartyCode': 'TEXT',
+    'PartyName': 'TEXT',
+    'RaceCode': 'TEXT',
+    'OfficeDesc': 'TEXT',
+    'CountyCode': 'TEXT',
+    'CountyName': 'TEXT',
+    'Juris1num': 'INTEGER',
+    'Juris2num': 'INTEGER',
+    'Precincts': 'INTEGER',
+    'PrecinctsReporting': 'INTEGER',
+    'CanNameLast': 'TEXT',
+    'CanNameFirst': 'TEXT',
+    'CanNameMiddle': 'TEXT',
+    'CanVotes': 'INTEGER'
+}
+
+# Derived tables loaded from the CSV outputs, with the columns they are indexed on
+DERIVED_TABLES = {
+    'county_results': ('data/fl_county_election_results.csv', ['year', 'county']),
+    'congressional_results': ('data/fl_congressional_election_results.csv', ['year', 'district']),
+    'congressional_districts': ('data/fl_congressional_districts.csv', ['district']),
+    'state_house_districts': ('data/fl_state_house_districts.csv', ['district']),
+    'state_senate_districts': ('data/fl_state_senate_districts.csv', ['district'])
+}
+
+INDEXES = {
+    'election_rows_county': ('election_rows', ['year', 'RaceCode', 'CountyCode']),
+    'election_rows_district': ('election_rows', ['year', 'RaceCode', 'Juris1num'])
+}
+
+def read_year_rows(file_path):
+    """One election file as rows ready to insert, in ROW_COLUMNS order; None if unreadable"""
+    df = read_election_file(file_path)
+    if df is None:
+        return None
+    df = df.assign(year=int(parse_year_from_filename(file_path)))
+    for column, sql_type in ROW_COLUMNS.items():
+        if column not in df.columns:
+            df[column] = None
+        elif sql_type == 'INTEGER':
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+    # Missing values become None so SQLite stores NULL
+    rows = df[list(ROW_COLUMNS)].astype(object)
+    return rows.where(rows.notna(), None)
+
+def sql_type(dtype):
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+def create_table(conn, table, column_types):
+    columns = ', '.join(f"{name} {column_type}" for name, column_type in column_types.items())
+    conn.execute(f"CREATE TABLE {table} ({columns})")
+
+def insert_batches(conn, table, columns, rows):
+    """executemany rows (an iterable of tuples) into table in BATCH_ROWS batches; returns the count"""
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    batch, count = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_ROWS:
+            conn.executemany(sql, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+        count += len(batch)
+    return count
+
+def load_database(path, frames, derived):
+    """Create a fresh database at path from election row frames and {table: (frame, index columns)}"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        # The file is private until it is swapped in, so durability can wait for the final commit
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        conn.execute('BEGIN')
+        
+        create_table(conn, 'election_rows', ROW_COLUMNS)
+        rows = sum(insert_batches(conn, 'election_rows', list(ROW_COLUMNS), df.itertuples(index=False, name=None))
+                   for df in frames)
+        print(f"  election_rows: {rows} rows")
+        
+        for table, (df, _) in derived.items():
+            create_table(conn, table, {column: sql_type(dtype) for column, dtype in df.dtypes.items()})
+            rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+            print(f"  {table}: {insert_batches(conn, table, list(df.columns), rows)} rows")
+        
+        indexes = dict(INDEXES)
+        for table, (_, index_columns) in derived.items():
+            indexes[f"{table}_lookup"] = (table, index_columns)
+        for name, (table, index_columns) in indexes.items():
+            conn.execute(f"CREATE INDEX {name} ON {table} ({', '.join(index_columns)})")
+        
+        conn.execute('COMMIT')
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+
+def build_results_db(workers=1, force=False, db_path=DB_FILE):
+    """Rebuild the database if any election file, derived CSV or this script changed"""
+    election_files = find_election_files()
+    derived_files = [path for path, _ in DERIVED_TABLES.values() if os.path.exists(path)]
+    inputs = election_files + derived_files + [__file__, LOADER_SOURCE]
+    
+    cache = BuildCache()
+    if not force and cache.is_fresh('results_db', inputs, [db_path]):
+        print(f"Results database up to date: {db_path}")
+        return db_path
+    
+    print(f"Building results database {db_path}...")
+    frames = [df for df in map_election_files(read_year_rows, election_files, workers) if df is not None]
+    derived = {table: (pd.read_csv(path), index_columns)
+               for table, (path, index_columns) in DERIVED_TABLES.items() if os.path.exists(path)}
+    
+    # Built under a temporary name so open connections never see a half-loaded file
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    load_database(tmp_path, frames, derived)
+    os.replace(tmp_path, db_path)
+    
+    cache.record('results_db', inputs, [db_path])
+    cache.save()
+    print(f"Saved {db_path} ({os.path.getsize(db_path):,} bytes)")
+    return db_path
+
+def connect(db_path=DB_FILE):
+    """Read-only connection to the results database"""
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"{db_path} not found; run python results_db.py first")
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+def query(sql, params=(), db_path=DB_FILE):
+    """Run any SQL against the database and return the result as a DataFrame"""
+    with contextlib.closing(connect(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+def row_filter(year=None, since=None, race_code=None, county_code=None, district=None, party=None):
+    """WHERE clause and parameters for the usual election_rows filters"""
+    conditions, params = [], []
+    for column, op, value in (('year', '=', year), ('year', '>=', since), ('RaceCode', '=', race_code),
+                              ('CountyCode', '=', county_code), ('Juris1num', '=', district),
+                              ('PartyCode', '=', party)):
+        if value is not None:
+            conditions.append(f"{column} {op} ?")
+            params.append(value)
+    return (f"WHERE {' AND '.join(conditions)}" if conditions else ''), params
+
+def race_rows(race_code=None, year=None, since=None, county_code=None, district=None, party=None, db_path=DB_FILE):
+    """Raw election rows matching the given filters, e.g. race_rows('USR', district=7, since=2012)"""
+    where, params = row_filter(year, since, race_code, county_code, district, party)
+    return query(f"SELECT * FROM election_rows {where} ORDER BY year, RaceCode, Juris1num, CountyCode",
+                 params, db_path)
+
+def vote_totals(by, race_code=None, year=None, since=None, county_code=None, district=None, party=None,
+                db_path=DB_FILE):
+    """Summed CanVotes grouped by the election_rows columns in by, for rows matching the filters"""
+    unknown = [column for column in by if column not in ROW_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown columns: {', '.join(unknown)}")
+    where, params = row_filter(year, since, race_code, county_code, district, party)
+    group = ', '.join(by)
+    return query(f"SELECT {group}, SUM(CanVotes) AS votes FROM election_rows {where} "
+                 f"GROUP BY {group} ORDER BY {group}", params, db_path)
+
+def county_results(year=None, county=None, db_path=DB_FILE):
+    """Rows of the county results table, optionally for one year and/or county"""
+    conditions = [(column, value) for column, value in (('year', year), ('county', county)) if value is not None]
+    where = f"WHERE {' AND '.join(f'{column} = ?' for column, _ in conditions)}" if conditions else ''
+    return query(f"SELECT * FROM county_results {where} ORDER BY year, county",
+                 [value for _, value in conditions], db_path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load election rows and result tables into SQLite")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for parsing election files (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild the database even if no input changed")
+    args = parser.parse_args()
+    
+    build_results_db(workers=args.workers, force=args.force)
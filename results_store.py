@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Columnar Parquet store of the raw Election_Data rows, partitioned by year.
+
+Each TSV is converted once into data/results_parquet/year=YYYY/part-0.parquet
+with the repeated code and name columns dictionary-encoded and vote counts
+stored as int32. A partition whose election file is gone is removed on the
+next build. read_results then loads just the columns and years a script
+asks for, memory-mapped, instead of reparsing the tab-separated text.
+"""
+
+import argparse
+import functools
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from build_cache import BuildCache
+from election_loader import LOADER_SOURCE, find_election_files, map_election_files, parse_year_from_filename, read_election_file
+
+STORE_DIR = 'data/results_parquet'
+
+# Low-cardinality strings repeated on every row; stored as Arrow dictionaries
+DICTIONARY_COLUMNS = [
+    'ElectionDate',
+    'PartyCode',
+    'PartyName',
+    'RaceCode',
+    'OfficeDesc',
+    'CountyCode',
+    'CountyName',
+    'CanNameLast',
+    'CanNameFirst',
+    'CanNameMiddle'
+]
+
+# Counts narrowed to compact integers; district numbers stay nullable
+INTEGER_COLUMNS = {
+    'Juris1num': 'Int16',
+    'Juris2num': 'Int16',
+    'Precincts': 'int32',
+    'PrecinctsReporting': 'int32',
+    'CanVotes': 'int32'
+}
+
+def partition_path(year, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"year={year}", 'part-0.parquet')
+
+def to_arrow_table(df):
+    """Convert a parsed election frame to an Arrow table with compact column types"""
+    df = df.copy()
+    for column in DICTIONARY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    for column, dtype in INTEGER_COLUMNS.items():
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(dtype)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def write_year_partition(file_path, store_dir=STORE_DIR):
+    """Convert one election TSV into its year's Parquet partition; returns the path or None"""
+    year = parse_year_from_filename(file_path)
+    df = read_election_file(file_path)
+    if df is None:
+        return None
+    
+    path = partition_path(year, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(to_arrow_table(df), path, compression='zstd')
+    print(f"  {year}: {len(df)} rows -> {path} ({os.path.getsize(path):,} bytes)")
+    return path
+
+def build_results_store(workers=1, force=False, store_dir=STORE_DIR):
+    """Convert every election file whose TSV changed since the last build"""
+    election_files = find_election_files()
+    
+    cache = BuildCache()
+    stale = []
+    for path in election_files:
+        key = f"parquet/{os.path.basename(path)}"
+        inputs = [path, __file__, LOADER_SOURCE]
+        output = partition_path(parse_year_from_filename(path), store_dir)
+        if force or not cache.is_fresh(key, inputs, [output]):
+            stale.append(path)
+    
+    written = map_election_files(functools.partial(write_year_partition, store_dir=store_dir), stale, workers)
+    for path, output in zip(stale, written):
+        if output is not None:
+            cache.record(f"parquet/{os.path.basename(path)}", [path, __file__, LOADER_SOURCE], [output])
+    cache.save()
+    
+    # Drop partitions whose election file is gone
+    years = {f"year={parse_year_from_filename(path)}" for path in election_files}
+    if os.path.isdir(store_dir):
+        for partition in sorted(os.listdir(store_dir)):
+            if partition.startswith('year=') and partition not in years:
+                shutil.rmtree(os.path.join(store_dir, partition))
+                print(f"  Removed {partition}: its election file is gone")
+    
+    print(f"Results store: {len(stale)} of {len(election_files)} years converted")
+    return store_dir
+
+def open_results_dataset(store_dir=STORE_DIR):
+    """Open the store as a memory-mapped, year-partitioned Arrow dataset"""
+    return ds.dataset(store_dir, format='parquet', partitioning='hive',
+                      filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+def read_results(columns=None, years=None, store_dir=STORE_DIR):
+    """Load selected columns for selected years as a DataFrame.
+    
+    Only the requested columns of the requested year partitions are read;
+    dictionary columns come back as pandas categoricals.
+    """
+    dataset = open_results_dataset(store_dir)
+    row_filter = None
+    if years is not None:
+        row_filter = ds.field('year').isin([int(y) for y in years])
+    table = dataset.to_table(columns=columns, filter=row_filter)
+    return table.to_pandas()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert Election_Data TSVs into a year-partitioned Parquet store")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="worker processes for converting election files (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="reconvert every file even if its TSV is unchanged")
+    args = parser.parse_args()
+    
+    print(f"Building results store in {STORE_DIR}...")
+    build_results_store(workers=args.workers, force=args.force)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Per-stage instrumentation for the build scripts.
+
+A RunReport times each named stage of a run: wall time, CPU time (including
+worker processes), rows or features processed and rows per second, the peak
+RSS of this process during the stage and the size of the files the stage
+wrote. On Linux the stage peak is exact: the high-water mark is reset when the
+stage starts (/proc/self/clear_refs) and read when it ends (VmHWM). Elsewhere
+only a lifetime peak exists, so a stage's peak is known only when it raised
+that peak, and is null otherwise. Worker processes are reported by the largest
+peak of any finished child so far, which is cumulative over the run.
+
+write() saves the whole run as build_reports/<run>-<timestamp>.json, so a slow
+nightly build can be traced to the stage that slowed down. One stage can also
+be profiled with cProfile; its stats are dumped next to the report for
+`python -m pstats` or snakeviz. The multi-stage builds are the ones
+instrumented: build_election_outputs.py and district_plans.py.
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; peak RSS is then not reported
+    resource = None
+
+REPORT_DIR = 'build_reports'
+
+CLEAR_REFS = '/proc/self/clear_refs'
+PROC_STATUS = '/proc/self/status'
+
+def peak_rss_mb():
+    """Peak resident set size so far of this process and of its largest finished child, in MB"""
+    if resource is None:
+        return None, None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return round(own, 1), round(children, 1)
+
+def high_water_mark_mb():
+    """VmHWM of this process in MB, or None without /proc"""
+    try:
+        with open(PROC_STATUS) as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def start_rss_window():
+    """Begin measuring the peak RSS of a stage; pass the result to window_peak_rss_mb"""
+    try:
+        # Writing 5 resets the high-water mark to the current RSS (Linux 4.0+)
+        with open(CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return 'hwm', None
+    except OSError:
+        return 'lifetime', peak_rss_mb()[0]
+
+def window_peak_rss_mb(window):
+    """Peak RSS of this process since start_rss_window, in MB; None if it cannot be told"""
+    method, lifetime_before = window
+    if method == 'hwm':
+        return high_water_mark_mb()
+    # Only a stage that raised the lifetime peak is known to have reached it
+    lifetime = peak_rss_mb()[0]
+    return lifetime if lifetime is not None and lifetime_before is not None and lifetime > lifetime_before else None
+
+def cpu_seconds():
+    """CPU time used so far by this process and its finished children"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+def output_bytes(paths):
+    """Total size of the given files, and of every file under given directories"""
+    total = 0
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        elif os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+class RunReport:
+    """Stage timings and resource use for one run of a build script"""
+    
+    def __init__(self, run, profile_stage=None, report_dir=REPORT_DIR):
+        self.run = run
+        self.profile_stage = profile_stage
+        self.report_dir = report_dir
+        self.started = datetime.now()
+        self._start_wall = time.perf_counter()
+        self._start_cpu = cpu_seconds()
+        self._peak_rss = peak_rss_mb()[0]
+        self.stages = []
+    
+    @contextlib.contextmanager
+    def stage(self, name, outputs=()):
+        """Measure the enclosed block as one stage.
+        
+        Yields a dict; set its 'rows' to the number of rows or features the
+        stage processed. outputs lists files or directories the stage writes.
+        """
+        record = {'stage': name, 'rows': None}
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        self._note_peak_rss(high_water_mark_mb())
+        rss_window = start_rss_window()
+        start_wall, start_cpu = time.perf_counter(), cpu_seconds()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+            wall = time.perf_counter() - start_wall
+            stage_rss = window_peak_rss_mb(rss_window)
+            self._note_peak_rss(stage_rss)
+            record.update({
+                'wall_seconds': round(wall, 4),
+                'cpu_seconds': round(cpu_seconds() - start_cpu, 4),
+                'rows_per_sec': round(record['rows'] / wall) if record['rows'] and wall else None,
+                'peak_rss_mb': stage_rss,
+                'cumulative_peak_child_rss_mb': peak_rss_mb()[1],
+                'output_bytes': output_bytes(outputs)
+            })
+            if profiler:
+                record['profile'] = self._dump_profile(profiler, name)
+            self.stages.append(record)
+    
+    def _note_peak_rss(self, rss):
+        # Resetting the high-water mark also resets ru_maxrss, so the run peak is kept here
+        if rss is not None:
+            self._peak_rss = rss if self._peak_rss is None else max(self._peak_rss, rss)
+    
+    def _dump_profile(self, profiler, name):
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, f"{self.run}-{self.started:%Y%m%dT%H%M%S}-{name}.prof")
+        profiler.dump_stats(path)
+        return path
+    
+    def summary(self):
+        self._note_peak_rss(high_water_mark_mb())
+        self._note_peak_rss(peak_rss_mb()[0])
+        return {
+            'run': self.run,
+            'started': self.started.isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - self._start_wall, 4),
+            'cpu_seconds': round(cpu_seconds() - self._start_cpu, 4),
+            'peak_rss_mb': self._peak_rss,
+            'cumulative_peak_child_rss_mb': peak_rss_mb()[1],
+            'stages': self.stages
+        }
+    
+    def write(self):
+        """Save the report as JSON and print a one-line summary per stage; returns its path"""
+        summary = self.summary()
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, f"{self.run}-{self.started:%Y%m%dT%H%M%S}.json")
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        
+        print(f"\nRun report ({summary['wall_seconds']:.2f} s wall, {summary['cpu_seconds']:.2f} s CPU):")
+        for record in self.stages:
+            rows = f"{record['rows']:,} rows" if record['rows'] is not None else ''
+            print(f"  {record['stage']:24s} {record['wall_seconds']:8.2f} s  {rows:>14s}  "
+                  f"{record['output_bytes']:>12,} bytes out")
+        print(f"Saved {path}")
+        return path
@@ -1,8 +1,8 @@
-// Loads and parses the candidate CSV, and provides a lookup function for candidate names by contest, year, county, and party.
+// Loads the candidate index, and provides a lookup function for candidate names by contest, year, county, and party.
 // This file is loaded before the main map logic in index.html.
 
 window.FL_CANDIDATE_LOOKUP = (function() {
-  let candidateMap = {};
+  let index = null;
   let loaded = false;
 
   function normalizeCountyCode(code) {
@@ -20,35 +20,32 @@ window.FL_CANDIDATE_LOOKUP = (function() {
     return (party || '').toUpperCase();
   }
 
-  function loadCSV(url, callback) {
-    Papa.parse(url, {
-      download: true,
-      header: false,
-      skipEmptyLines: true,
-      complete: function(results) {
-        // CSV columns: contest, year, county_code, party, candidate
-        results.data.forEach(row => {
-          if (row.length < 5) return;
-          const [contest, year, county, party, candidate] = row;
-          const key = [normalizeContestType(contest), year, normalizeCountyCode(county), normalizeParty(party)].join('|');
-          candidateMap[key] = candidate;
-        });
+  function loadIndex(url, callback) {
+    // data/fl_candidate_index.json: candidate names once, contests refer to them by id
+    fetch(url)
+      .then(r => r.json())
+      .then(data => {
+        index = data;
         loaded = true;
         if (callback) callback();
-      }
-    });
+      });
   }
 
   function getCandidate(contest, year, county, party) {
-    const key = [normalizeContestType(contest), String(year), normalizeCountyCode(county), normalizeParty(party)].join('|');
-    return candidateMap[key] || null;
+    if (!index) return null;
+    const entry = (index.contests[String(year)] || {})[normalizeContestType(contest)];
+    if (!entry) return null;
+    const counties = (entry.counties || {})[normalizeParty(party)] || {};
+    const countyCode = normalizeCountyCode(county);
+    const id = countyCode in counties ? counties[countyCode] : entry.candidates[normalizeParty(party)];
+    return id === undefined || id === null ? null : index.candidates[id];
   }
 
   function isLoaded() { return loaded; }
 
   // Expose API
   return {
-    loadCSV,
+    loadIndex,
     getCandidate,
     isLoaded
   };
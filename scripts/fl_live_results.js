@@ -0,0 +1,110 @@
+// Follows the election-night feed written by live_ingest.py: loads data/live/snapshot.json once,
+// then polls latest.json and applies the small delta patches instead of reloading everything.
+// Contests are v2 records ({ race, key, dem, rep, precincts, reporting }) with arrays indexed by county id.
+
+window.FL_LIVE_RESULTS = (function() {
+  let baseUrl = './data/live/';
+  let snapshot = null;
+  let contests = {};
+  let timer = null;
+  let polling = false;
+
+  async function fetchJSON(name) {
+    // Everything under data/live changes in place, so always revalidate
+    const r = await fetch(baseUrl + name, { cache: 'no-cache' });
+    if (!r.ok) throw new Error(`${name} fetch failed: ${r.status}`);
+    return r.json();
+  }
+
+  async function loadSnapshot() {
+    snapshot = await fetchJSON('snapshot.json');
+    contests = {};
+    for (const contest of snapshot.contests) contests[contest.race] = contest;
+    return snapshot.version;
+  }
+
+  function applyDelta(delta) {
+    // Deltas hold absolute values for the changed counties; null means the race left that county
+    const size = snapshot.county_codes.length;
+    for (const change of delta.contests) {
+      let contest = contests[change.race];
+      if (!contest) {
+        contest = { year: delta.year, race: change.race, key: change.key,
+                    dem: new Array(size).fill(null), rep: new Array(size).fill(null),
+                    precincts: new Array(size).fill(null), reporting: new Array(size).fill(null) };
+        contests[change.race] = contest;
+        snapshot.contests.push(contest);
+      }
+      change.counties.forEach((countyId, i) => {
+        contest.dem[countyId] = change.dem[i];
+        contest.rep[countyId] = change.rep[i];
+        contest.precincts[countyId] = change.precincts[i];
+        contest.reporting[countyId] = change.reporting[i];
+      });
+    }
+    snapshot.version = delta.version;
+  }
+
+  async function update() {
+    // Returns the races that changed, or null when the whole snapshot was reloaded
+    const latest = await fetchJSON('latest.json');
+    if (snapshot && latest.version === snapshot.version) return [];
+    const canPatch = snapshot && latest.first_delta !== null &&
+      latest.first_delta <= snapshot.version + 1 && snapshot.version < latest.version;
+    if (!canPatch) {
+      await loadSnapshot();
+      return null;
+    }
+
+    const changed = new Set();
+    for (let version = snapshot.version + 1; version <= latest.version; version++) {
+      const delta = await fetchJSON(`deltas/${version}.json`);
+      if (delta.base !== snapshot.version) {
+        await loadSnapshot();
+        return null;
+      }
+      applyDelta(delta);
+      delta.contests.forEach(change => changed.add(change.race));
+    }
+    return Array.from(changed);
+  }
+
+  function start(onUpdate, intervalMs = 5000, url = baseUrl) {
+    // onUpdate(snapshot, changedRaces) runs after every poll that found a new version
+    baseUrl = url;
+    stop();
+    async function poll() {
+      if (polling) return;
+      polling = true;
+      try {
+        const before = snapshot ? snapshot.version : null;
+        const changed = await update();
+        if (snapshot.version !== before && onUpdate) onUpdate(snapshot, changed);
+      } catch (err) {
+        console.log('Live results poll failed:', err.message);
+      } finally {
+        polling = false;
+      }
+    }
+    poll();
+    timer = setInterval(poll, intervalMs);
+  }
+
+  function stop() {
+    if (timer) clearInterval(timer);
+    timer = null;
+  }
+
+  function getContest(race) { return contests[(race || '').toUpperCase()] || null; }
+  function getVersion() { return snapshot ? snapshot.version : null; }
+
+  // Expose API
+  return {
+    start,
+    stop,
+    update,
+    applyDelta,
+    getContest,
+    getVersion
+  };
+})();
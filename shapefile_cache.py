@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+GeoParquet copies of the district shapefiles for fast, column-selective reads.
+
+The first read of a shapefile converts it once to
+.build_cache/shapes/<name>-<hash>.parquet, with duplicated columns (such as
+the two TARGET_DEV fields) reduced to the first. After that, readers load just
+the columns they ask for, and attribute-only reads skip geometry entirely, so
+district reports never decode polygons. The file name carries a hash of the
+shapefile's components, so an edited shapefile gets a fresh copy and parallel
+workers never share a manifest.
+"""
+
+import glob
+import hashlib
+import os
+import geopandas as gpd
+import pandas as pd
+import pyarrow.parquet as pq
+import pyogrio
+from build_cache import CACHE_DIR, hash_file, shapefile_inputs
+
+SHAPE_CACHE_DIR = os.path.join(CACHE_DIR, 'shapes')
+
+# Outputs built from cached shapes depend on how they are read, so builds hash this module too
+SHAPE_CACHE_SOURCE = __file__
+
+def source_digest(path):
+    """Hash of every component file of a shapefile (or of a single-file source)"""
+    digest = hashlib.sha256()
+    for component in shapefile_inputs(path):
+        digest.update(os.path.basename(component).encode('utf-8'))
+        digest.update(hash_file(component).encode('ascii'))
+    return digest.hexdigest()[:16]
+
+def cached_parquet(path, cache_dir=SHAPE_CACHE_DIR):
+    """Return the GeoParquet copy of a vector file, converting it if it is missing or stale"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    parquet_path = os.path.join(cache_dir, f"{stem}-{source_digest(path)}.parquet")
+    if os.path.exists(parquet_path):
+        return parquet_path
+    
+    columns = list(dict.fromkeys(pyogrio.read_info(path)['fields']))
+    gdf = gpd.read_file(path, columns=columns)
+    gdf = gdf.loc[:, ~gdf.columns.duplicated()]
+    
+    # Copies of older versions of the file are dropped; the write goes through a
+    # temporary name so a concurrent reader never sees a partial file
+    os.makedirs(cache_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(cache_dir, f"{stem}-*.parquet")):
+        os.remove(old)
+    tmp_path = f"{parquet_path}.{os.getpid()}.tmp"
+    gdf.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+def shapefile_columns(path):
+    """Attribute column names of a vector file, read from its cached schema"""
+    names = pq.read_schema(cached_parquet(path)).names
+    return [name for name in names if name != 'geometry']
+
+def read_shapefile(path, columns=None, geometry=True):
+    """Read a vector file through its GeoParquet copy.
+    
+    columns limits the attributes loaded; with geometry=False a plain
+    DataFrame is returned and no geometry is read or decoded.
+    """
+    parquet_path = cached_parquet(path)
+    if not geometry:
+        return pd.read_parquet(parquet_path, columns=columns if columns is not None else shapefile_columns(path))
+    if columns is not None:
+        columns = list(columns) + ['geometry']
+    return gpd.read_parquet(parquet_path, columns=columns)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Generate schema-faithful synthetic inputs at multiples of the real data size.
+
+For each scale, every Election_Data file is written with each row repeated
+scale times (extra copies get jittered vote counts, like precinct-level rows
+that sum into the same counties and races), and a synthetic district plan is
+written with scale times as many districts as the state house plan, each with
+about as many vertices as a real district. Output goes to
+.build_cache/synthetic/x<scale>/ with the same layout as the repo, so the
+benchmarks can point any stage at it.
+"""
+
+import argparse
+import math
+import os
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from build_cache import CACHE_DIR
+from election_loader import ELECTION_DATA_DIR, detect_encoding, find_election_files
+from shapefile_cache import read_shapefile
+
+SYNTHETIC_DIR = os.path.join(CACHE_DIR, 'synthetic')
+SCALES = [1, 10, 100]
+SEED = 2024
+
+# Plan whose size, extent, vertex density and attributes the synthetic plans copy
+TEMPLATE_PLAN = 'H000H8013/H000H8013.shp'
+SYNTHETIC_PLAN = 'plans/synthetic_plan.shp'
+
+def scale_dir(scale, synthetic_dir=SYNTHETIC_DIR):
+    return os.path.join(synthetic_dir, f"x{scale}")
+
+def synthetic_election_file(template_path, output_path, scale, rng):
+    """Write template_path with every row repeated scale times; copies get jittered votes"""
+    encoding = detect_encoding(template_path)
+    df = pd.read_csv(template_path, sep='\t', encoding=encoding, dtype=str, keep_default_na=False)
+    
+    votes = pd.to_numeric(df['CanVotes'], errors='coerce').fillna(0).to_numpy()
+    copies = [df]
+    for _ in range(scale - 1):
+        copy = df.copy()
+        copy['CanVotes'] = np.round(votes * rng.uniform(0.5, 1.5, len(df))).astype('int64').astype(str)
+        copies.append(copy)
+    
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    pd.concat(copies, ignore_index=True).to_csv(output_path, sep='\t', index=False, encoding=encoding)
+
+def synthetic_plan(output_path, scale, rng, template_path=TEMPLATE_PLAN):
+    """Write a grid plan with scale x the template's districts over the template's extent"""
+    template = read_shapefile(template_path)
+    count = len(template) * scale
+    minx, miny, maxx, maxy = template.total_bounds
+    columns = math.ceil(math.sqrt(count * (maxx - minx) / (maxy - miny)))
+    rows = math.ceil(count / columns)
+    width, height = (maxx - minx) / columns, (maxy - miny) / rows
+    
+    # Densify edges so each district has roughly the template's vertex count
+    vertices = shapely.get_num_coordinates(template.geometry.values).mean()
+    step = 2 * (width + height) / vertices
+    
+    cells = [shapely.box(minx + (i % columns) * width, miny + (i // columns) * height,
+                         minx + (i % columns + 1) * width, miny + (i // columns + 1) * height)
+             for i in range(count)]
+    attributes = template.drop(columns='geometry').iloc[rng.integers(0, len(template), count)].reset_index(drop=True)
+    attributes['DISTRICT'] = np.arange(1, count + 1)
+    attributes['LONGNAME'] = [f"District {d}" for d in attributes['DISTRICT']]
+    attributes['SHORTNAME'] = [f"D{d}" for d in attributes['DISTRICT']]
+    
+    gdf = gpd.GeoDataFrame(attributes, geometry=shapely.segmentize(cells, step), crs=template.crs)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    gdf.to_file(output_path)
+
+def generate(scale, regenerate=False, synthetic_dir=SYNTHETIC_DIR):
+    """Create the synthetic inputs for one scale unless they already exist; returns their directory"""
+    root = scale_dir(scale, synthetic_dir)
+    plan_path = os.path.join(root, SYNTHETIC_PLAN)
+    if not regenerate and os.path.exists(plan_path):
+        return root
+    
+    print(f"Generating synthetic data at {scale}x in {root}...")
+    rng = np.random.default_rng(SEED + scale)
+    for path in find_election_files():
+        synthetic_election_file(path, os.path.join(root, ELECTION_DATA_DIR, os.path.basename(path)), scale, rng)
+    synthetic_plan(plan_path, scale, rng)
+    return root
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic election files and district plans")
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES,
+                        help="multiples of the real data size to generate")
+    parser.add_argument('--regenerate', action='store_true',
+                        help="overwrite synthetic data that already exists")
+    args = parser.parse_args()
+    
+    for scale in args.scales:
+        generate(scale, regenerate=args.regenerate)
@@ -0,0 +1,57 @@
+"""Only slices whose inputs changed are recomputed; unchanged outputs are left untouched."""
+
+import os
+from build_cache import BuildCache, cached_map, cached_slices, iter_slices, write_chunks_if_changed, write_if_changed
+
+def test_only_changed_inputs_are_recomputed(tmp_path):
+    sources = {name: tmp_path / f"{name}.txt" for name in ('a', 'b')}
+    for name, path in sources.items():
+        path.write_text(name)
+    keys_and_inputs = {f"test/{name}": (str(path), [str(path)]) for name, path in sources.items()}
+    computed = []
+    
+    def compute(paths):
+        computed.extend(paths)
+        return [open(path).read().upper() for path in paths]
+    
+    cache = BuildCache(str(tmp_path / 'cache'))
+    assert cached_map(cache, keys_and_inputs, compute) == {'test/a': 'A', 'test/b': 'B'}
+    cache.save()
+    
+    sources['b'].write_text('bb')
+    computed.clear()
+    cache = BuildCache(str(tmp_path / 'cache'))
+    assert cached_map(cache, keys_and_inputs, compute) == {'test/a': 'A', 'test/b': 'BB'}
+    assert computed == [str(sources['b'])]
+
+def test_sliced_fields_stream_back_in_order(tmp_path):
+    paths = []
+    for name in ('x', 'y', 'z'):
+        paths.append(tmp_path / f"{name}.txt")
+        paths[-1].write_text(name)
+    keys_and_inputs = {f"test/{path.name}": (str(path), [str(path)]) for path in paths}
+    
+    def compute(stale):
+        for path in stale:
+            text = open(path).read()
+            yield None if text == 'y' else {'upper': text.upper(), 'length': len(text)}
+    
+    cache = BuildCache(str(tmp_path / 'cache'))
+    keys = cached_slices(cache, keys_and_inputs, compute, fields=['upper', 'length'])
+    assert keys == list(keys_and_inputs)
+    assert list(iter_slices(cache, keys, 'upper')) == ['X', 'Z']
+    assert list(iter_slices(cache, keys, 'length')) == [1, 1]
+    
+    # Fresh slices are not recomputed
+    assert cached_slices(cache, keys_and_inputs, lambda stale: iter(stale), fields=['upper', 'length']) == keys
+
+def test_identical_output_is_not_rewritten(tmp_path):
+    path = str(tmp_path / 'out' / 'data.json')
+    assert write_if_changed(path, '{"a":1}')
+    mtime = os.stat(path).st_mtime_ns
+    assert not write_if_changed(path, '{"a":1}')
+    assert not write_chunks_if_changed(path, iter(['{"a"', ':1}']))
+    assert os.stat(path).st_mtime_ns == mtime
+    assert write_chunks_if_changed(path, iter(['{"a"', ':2}']))
+    assert open(path).read() == '{"a":2}'
+    assert os.listdir(os.path.dirname(path)) == ['data.json']
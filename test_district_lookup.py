@@ -0,0 +1,41 @@
+"""Points resolve to the district holding them, borders to the lowest id, and outside points to null."""
+
+import functools
+import os
+import numpy as np
+import pytest
+import shapely
+import district_lookup
+from district_lookup import DistrictLookup
+from district_plans import PLANS
+
+@pytest.fixture(autouse=True)
+def lookup_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(district_lookup, 'lookup_path',
+                        functools.partial(district_lookup.lookup_path, lookup_dir=str(tmp_path / 'lookup')))
+    return tmp_path / 'lookup'
+
+def test_border_points_go_to_the_lowest_district(monkeypatch, lookup_dir):
+    # Two unit squares sharing the edge x = 1, listed with the higher id first
+    squares = np.array([shapely.box(1, 0, 2, 1), shapely.box(0, 0, 1, 1)])
+    monkeypatch.setattr(district_lookup, 'read_layer', lambda name: ([8, 3], squares))
+    monkeypatch.setattr(district_lookup, 'layer_sources', lambda county_path: {'congressional': __file__})
+    
+    lookup = DistrictLookup(layers=['congressional'])
+    found = lookup.lookup([0.5, 1.5, 1.0, 5.0, np.nan], [0.5, 0.5, 0.5, 0.5, 0.5])
+    assert found['congressional_district'].fillna(0).tolist() == [3, 8, 3, 0, 0]
+    assert len(os.listdir(lookup_dir)) == 1
+    
+    # A second lookup reads the cached polygons
+    monkeypatch.setattr(district_lookup, 'read_layer', lambda name: pytest.fail("layer was rebuilt"))
+    assert DistrictLookup(layers=['congressional']).lookup([1.5], [0.5])['congressional_district'].tolist() == [8]
+
+def test_every_district_contains_its_representative_point():
+    if not os.path.exists(PLANS['congressional']['path']):
+        pytest.skip(f"{PLANS['congressional']['path']} not found")
+    lookup = DistrictLookup(layers=['congressional'])
+    ids, geometries, _ = lookup.layers['congressional']
+    points = shapely.point_on_surface(geometries)
+    
+    found = lookup.lookup(np.append(shapely.get_x(points), -40.0), np.append(shapely.get_y(points), 0.0))
+    assert found['congressional_district'].fillna(0).tolist() == ids.tolist() + [0]
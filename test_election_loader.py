@@ -0,0 +1,46 @@
+"""Result files with blank count cells still load, with the blanks counted as 0."""
+
+import process_fl_election_data
+from election_loader import iter_election_chunks, read_election_file
+
+HEADER = ['ElectionDate', 'PartyCode', 'PartyName', 'RaceCode', 'OfficeDesc', 'CountyCode', 'CountyName',
+          'Juris1num', 'Juris2num', 'Precincts', 'PrecinctsReporting', 'CanNameLast', 'CanNameFirst',
+          'CanNameMiddle', 'CanVotes']
+
+ROWS = [
+    ['11/5/2024', 'REP', 'Republican', 'PRE', 'President of the United States', 'ALA', 'Alachua',
+     '', '', '63', '63', 'Trump', 'Donald', 'J.', '52939'],
+    ['11/5/2024', 'DEM', 'Democrat', 'PRE', 'President of the United States', 'ALA', 'Alachua',
+     '', '', '63', '63', 'Harris', 'Kamala', 'D.', '89000'],
+    # A county that has not reported yet: blank counts
+    ['11/5/2024', 'DEM', 'Democrat', 'PRE', 'President of the United States', 'BAK', 'Baker',
+     '', '', '9', '', 'Harris', 'Kamala', 'D.', ''],
+]
+
+def write_fixture(tmp_path):
+    path = tmp_path / '11052024Election.txt'
+    path.write_text('\n'.join('\t'.join(row) for row in [HEADER] + ROWS) + '\n', encoding='utf-8')
+    return str(path)
+
+def test_blank_counts_read_as_zero(tmp_path):
+    df = read_election_file(write_fixture(tmp_path))
+    
+    assert df is not None
+    assert len(df) == 3
+    assert df['CanVotes'].tolist() == [52939, 89000, 0]
+    assert df['PrecinctsReporting'].tolist() == [63, 63, 0]
+    assert str(df['CanVotes'].dtype) == 'int64'
+
+def test_blank_counts_stream_as_zero(tmp_path):
+    chunks = list(iter_election_chunks(write_fixture(tmp_path), chunk_rows=2))
+    
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert [v for chunk in chunks for v in chunk['CanVotes']] == [52939, 89000, 0]
+    assert all(str(chunk['CanVotes'].dtype) == 'int32' for chunk in chunks)
+
+def test_blank_counts_keep_the_year(tmp_path):
+    year, contests = process_fl_election_data.process_election_file(write_fixture(tmp_path))
+    
+    assert year == '2024'
+    assert [contest['race'] for contest in contests] == ['PRE']
+    assert contests[0]['dem'][:2] == [89000, 0]
@@ -0,0 +1,39 @@
+"""Election-night refreshes with blank counts are ingested; unreadable ones fail loudly."""
+
+import json
+import os
+import pytest
+import live_ingest
+from test_election_loader import HEADER, ROWS
+
+def write_feed(path, rows):
+    path.write_text('\n'.join('\t'.join(row) for row in [HEADER] + rows) + '\n', encoding='utf-8')
+
+def test_blank_counts_are_published_then_patched(tmp_path):
+    feed = tmp_path / '11052024Election.txt'
+    live_dir, state_file = str(tmp_path / 'live'), str(tmp_path / 'state.pkl')
+    live = live_ingest.LiveResults.load(str(feed), state_file)
+    
+    write_feed(feed, ROWS)
+    live_ingest.ingest_once(live, str(feed), live_dir, state_file)
+    with open(os.path.join(live_dir, live_ingest.LATEST_FILE)) as f:
+        assert json.load(f)['version'] == 1
+    
+    # Baker reports
+    reported = [row[:] for row in ROWS]
+    reported[2][10], reported[2][14] = '9', '4100'
+    write_feed(feed, reported)
+    delta = live_ingest.ingest_once(live, str(feed), live_dir, state_file)
+    
+    assert delta['version'] == 2
+    assert delta['contests'] == [{'race': 'PRE', 'key': 'pre_2024_1', 'counties': [1],
+                                  'dem': [4100], 'rep': [0], 'precincts': [9], 'reporting': [9]}]
+    assert os.path.exists(os.path.join(live_dir, live_ingest.DELTA_DIR, '2.json'))
+
+def test_unreadable_refresh_raises(tmp_path):
+    live = live_ingest.LiveResults(str(tmp_path / '11052024Election.txt'))
+    
+    with pytest.raises(live_ingest.IngestError):
+        live_ingest.ingest_once(live, str(tmp_path / '11052024Election.txt'), str(tmp_path / 'live'),
+                                str(tmp_path / 'state.pkl'))
+    assert live.version == 0
@@ -0,0 +1,43 @@
+"""Saved overlays keep each weighting's own sparsity; allocation conserves county totals."""
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from overlay_index import allocate_to_districts, column_normalize, load_overlay_file, save_overlay
+
+def overlay():
+    # Two counties split over three districts; district 3 has no population
+    area = column_normalize(sp.csr_matrix([[3.0, 0.0], [1.0, 2.0], [0.0, 2.0]]))
+    population = column_normalize(sp.csr_matrix([[1.0, 0.0], [1.0, 4.0], [0.0, 0.0]]))
+    return {
+        'counties': np.array(['ST LUCIE', 'BAKER']),
+        'districts': np.array(['1', '2', '3']),
+        'area': area,
+        'population': population
+    }
+
+def test_weightings_round_trip_with_their_own_sparsity(tmp_path):
+    original = overlay()
+    path = str(tmp_path / 'overlay' / 'plan.npz')
+    save_overlay(original, path)
+    loaded = load_overlay_file(path)
+    
+    assert list(loaded['counties']) == list(original['counties'])
+    assert list(loaded['districts']) == list(original['districts'])
+    assert loaded['area'].nnz == 4 and loaded['population'].nnz == 3
+    for weighting in ('area', 'population'):
+        np.testing.assert_allclose(loaded[weighting].toarray(), original[weighting].toarray())
+
+def test_allocation_conserves_county_totals():
+    votes = pd.DataFrame({'dem': [100, 60], 'rep': [40, 20]}, index=['St. Lucie', 'Baker'])
+    
+    for weighting in ('area', 'population'):
+        estimates = allocate_to_districts(overlay(), votes, weighting)
+        assert list(estimates.index) == ['1', '2', '3']
+        np.testing.assert_allclose(estimates.sum().to_numpy(), votes.sum().to_numpy())
+    assert estimates.loc['3'].sum() == 0
+    
+    # Without population weights the area ones are used
+    no_population = dict(overlay(), population=None)
+    np.testing.assert_allclose(allocate_to_districts(no_population, votes['dem']).to_numpy(),
+                               allocate_to_districts(overlay(), votes['dem'], 'area').to_numpy())
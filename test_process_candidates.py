@@ -0,0 +1,29 @@
+"""Multi-district races keep the first candidate listed; party names are kept per year."""
+
+import pandas as pd
+from process_candidates import build_candidate_index, build_candidate_table, candidate_id
+
+COLUMNS = ['RaceCode', 'OfficeDesc', 'CountyCode', 'PartyCode', 'PartyName', 'CanNameFirst', 'CanNameLast']
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+def test_multi_district_race_keeps_first_candidate():
+    df = frame([
+        ['STR', 'State Representative', 'ALA', 'DEM', 'Democrat', 'Leonard', 'Bembry'],
+        ['STR', 'State Representative', 'ALA', 'DEM', 'Democrat', 'Jon', 'Paugh'],
+        ['STR', 'State Representative', 'ALA', 'REP', 'Republican', 'Keith', 'Perry'],
+    ])
+    index = build_candidate_index([build_candidate_table(df, '2010')], overrides={}, contest_names={})
+    
+    assert index['candidates'][candidate_id(index, 2010, 'STR', 'ALA', 'DEM')] == 'Leonard Bembry'
+    assert index['candidates'][candidate_id(index, 2010, 'STR', 'ALA', 'REP')] == 'Keith Perry'
+
+def test_party_names_are_kept_per_year():
+    tables = [
+        build_candidate_table(frame([['USS', 'United States Senator', 'ALA', 'LBT', 'Libertarian', 'A', 'B']]), '2010'),
+        build_candidate_table(frame([['USS', 'United States Senator', 'ALA', 'LBT', 'Libertarian Party', 'C', 'D']]), '2012'),
+    ]
+    index = build_candidate_index(tables, overrides={}, contest_names={})
+    
+    assert index['parties'] == {'2010': {'LBT': 'Libertarian'}, '2012': {'LBT': 'Libertarian Party'}}
@@ -0,0 +1,25 @@
+"""Files of the last few publishes stay in the bundle for clients holding an older manifest."""
+
+import os
+import publish_bundle
+
+def publish(tmp_path, monkeypatch, text, keep_generations=2):
+    source = tmp_path / 'fl_election_v2.json'
+    source.write_text(text)
+    monkeypatch.setattr(publish_bundle, 'bundle_sources', lambda: {'election_v2': str(source)})
+    manifest = publish_bundle.publish_bundle(str(tmp_path / 'bundle'), keep_generations)
+    return manifest['files']['election_v2']['path']
+
+def test_previous_generations_are_kept(tmp_path, monkeypatch):
+    first = publish(tmp_path, monkeypatch, '{"v":1}')
+    second = publish(tmp_path, monkeypatch, '{"v":2}')
+    assert first != second
+    assert os.path.exists(first) and os.path.exists(first + '.gz')
+    
+    # Republishing the same files does not push older generations out
+    publish(tmp_path, monkeypatch, '{"v":2}')
+    assert os.path.exists(first)
+    
+    third = publish(tmp_path, monkeypatch, '{"v":3}')
+    assert not os.path.exists(first) and not os.path.exists(first + '.gz')
+    assert os.path.exists(second) and os.path.exists(third)
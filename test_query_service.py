@@ -0,0 +1,64 @@
+"""Cached slices are answered while a miss renders; malformed and failing requests still get a reply."""
+
+import asyncio
+import functools
+import threading
+import pytest
+from query_service import ResultsService, handle_request, serve_connection
+
+HIT = '/slice?year=2020&office=president&level=county'
+MISS = '/slice?year=2016&office=president&level=county'
+
+@pytest.fixture(scope='module')
+def service():
+    return ResultsService()
+
+def status(response):
+    return int(response.split(b' ', 2)[1])
+
+def test_hits_are_served_while_a_miss_renders(service):
+    async def scenario():
+        assert status(await handle_request(service, 'GET', HIT, {})) == 200
+        
+        # Hold the next render until the cached slice has been answered
+        started, release = threading.Event(), threading.Event()
+        render = service._render
+        def slow_render(*query):
+            started.set()
+            release.wait(5)
+            return render(*query)
+        service._render = slow_render
+        try:
+            miss = asyncio.ensure_future(handle_request(service, 'GET', MISS, {}))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            hit = await asyncio.wait_for(handle_request(service, 'GET', HIT, {}), timeout=1)
+            assert status(hit) == 200 and not miss.done()
+        finally:
+            release.set()
+            service._render = render
+        assert status(await miss) == 200
+    
+    asyncio.run(scenario())
+
+def test_unexpected_errors_answer_500(service):
+    render = service._render
+    service._render = lambda *query: 1 / 0
+    try:
+        response = asyncio.run(handle_request(service, 'GET', '/history?county=Baker', {}))
+    finally:
+        service._render = render
+    assert status(response) == 500
+
+def test_malformed_request_line_answers_400(service):
+    async def scenario():
+        server = await asyncio.start_server(functools.partial(serve_connection, service), '127.0.0.1', 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(b'GARBAGE\r\n\r\n')
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=5)
+            writer.close()
+        return response
+    
+    assert status(asyncio.run(scenario())) == 400
@@ -0,0 +1,38 @@
+"""The results database loads the raw rows and derived tables, and is rebuilt only when an input changes."""
+
+import results_db
+from build_cache import BuildCache
+from test_election_loader import write_fixture
+
+def build(tmp_path, monkeypatch):
+    election_file = write_fixture(tmp_path)
+    county_csv = tmp_path / 'county_results.csv'
+    county_csv.write_text('year,county,president_dem,president_rep\n'
+                          '2024,Alachua,89000,52939\n2024,Baker,0,0\n2020,Alachua,89704,50972\n')
+    monkeypatch.setattr(results_db, 'BuildCache', lambda: BuildCache(str(tmp_path / 'cache')))
+    monkeypatch.setattr(results_db, 'find_election_files', lambda: [election_file])
+    monkeypatch.setattr(results_db, 'DERIVED_TABLES', {'county_results': (str(county_csv), ['year', 'county'])})
+    return results_db.build_results_db(db_path=str(tmp_path / 'results.sqlite'))
+
+def test_rows_and_tables_are_queryable(tmp_path, monkeypatch):
+    db_path = build(tmp_path, monkeypatch)
+    
+    rows = results_db.race_rows('PRE', year=2024, db_path=db_path)
+    assert len(rows) == 3
+    assert rows['year'].tolist() == [2024] * 3
+    assert rows['Juris1num'].isna().all()
+    
+    totals = results_db.vote_totals(['CountyCode', 'PartyCode'], race_code='PRE', db_path=db_path)
+    assert totals.values.tolist() == [['ALA', 'DEM', 89000], ['ALA', 'REP', 52939], ['BAK', 'DEM', 0]]
+    assert results_db.vote_totals(['year'], party='REP', db_path=db_path)['votes'].tolist() == [52939]
+    
+    alachua = results_db.county_results(county='Alachua', db_path=db_path)
+    assert alachua['year'].tolist() == [2020, 2024]
+    assert alachua['president_dem'].tolist() == [89704, 89000]
+
+def test_unchanged_inputs_are_not_reloaded(tmp_path, monkeypatch, capsys):
+    build(tmp_path, monkeypatch)
+    capsys.readouterr()
+    
+    build(tmp_path, monkeypatch)
+    assert 'up to date' in capsys.readouterr().out
@@ -0,0 +1,25 @@
+"""A year partition is removed once its election file is gone."""
+
+import os
+import results_store
+from build_cache import BuildCache
+from test_election_loader import HEADER, ROWS
+
+def write_election_file(path):
+    path.write_text('\n'.join('\t'.join(row) for row in [HEADER] + ROWS) + '\n', encoding='utf-8')
+    return str(path)
+
+def test_partitions_without_a_source_are_removed(tmp_path, monkeypatch):
+    files = [write_election_file(tmp_path / '11032020Election.txt'),
+             write_election_file(tmp_path / '11052024Election.txt')]
+    store_dir = str(tmp_path / 'store')
+    monkeypatch.setattr(results_store, 'BuildCache', lambda: BuildCache(str(tmp_path / 'cache')))
+    monkeypatch.setattr(results_store, 'find_election_files', lambda: list(files))
+    
+    results_store.build_results_store(store_dir=store_dir)
+    assert sorted(os.listdir(store_dir)) == ['year=2020', 'year=2024']
+    
+    files.pop(0)
+    results_store.build_results_store(store_dir=store_dir)
+    assert os.listdir(store_dir) == ['year=2024']
+    assert set(results_store.read_results(['year'], store_dir=store_dir)['year']) == {2024}
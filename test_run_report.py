@@ -0,0 +1,23 @@
+"""Each stage reports its own peak RSS, not the peak of the run so far."""
+
+import pytest
+import run_report
+from run_report import RunReport
+
+def allocate(mb):
+    block = bytearray(mb * 1024 * 1024)
+    block[::4096] = b'\1' * len(block[::4096])   # touch every page so it counts as resident
+    return len(block)
+
+def test_small_stage_after_large_one_reports_its_own_peak(tmp_path):
+    if run_report.start_rss_window()[0] != 'hwm':
+        pytest.skip("no resettable high-water mark on this platform")
+    report = RunReport('test', report_dir=str(tmp_path))
+    with report.stage('large') as stage:
+        stage['rows'] = allocate(200)
+    with report.stage('small') as stage:
+        stage['rows'] = allocate(1)
+    
+    large, small = report.stages
+    assert large['peak_rss_mb'] - small['peak_rss_mb'] > 150
+    assert report.summary()['peak_rss_mb'] >= large['peak_rss_mb']
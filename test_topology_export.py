@@ -0,0 +1,59 @@
+"""Every exported TopoJSON level decodes to valid districts that never overlap their neighbours."""
+
+import json
+import os
+import numpy as np
+import pytest
+import shapely
+import topology_export
+from topology_export import SIMPLIFY_LEVELS, TOPOLOGY_LAYERS, conflicting_arcs
+
+def decode_topology(doc):
+    """{feature id: MultiPolygon} of the one object in a TopoJSON document"""
+    scale, translate = np.array(doc['transform']['scale']), np.array(doc['transform']['translate'])
+    arcs = [np.cumsum(np.array(arc), axis=0) * scale + translate for arc in doc['arcs']]
+    
+    def ring(indices):
+        coords = []
+        for i in indices:
+            arc = arcs[i] if i >= 0 else arcs[~i][::-1]
+            coords.extend(arc if not coords else arc[1:])
+        return coords
+    
+    (collection,) = doc['objects'].values()
+    features = {}
+    for geometry in collection['geometries']:
+        polygons = [geometry['arcs']] if geometry['type'] == 'Polygon' else geometry['arcs']
+        features[geometry['id']] = shapely.MultiPolygon(
+            [shapely.Polygon(ring(polygon[0]), [ring(hole) for hole in polygon[1:]]) for polygon in polygons])
+    return features
+
+def test_conflicting_arcs():
+    arcs = [
+        [(0, 0), (10, 0), (10, 10)],
+        [(10, 10), (0, 10), (0, 0)],   # meets the first arc only at their junctions
+        [(5, -5), (5, 5)],             # crosses the first arc
+        [(20, 0), (30, 10), (30, 0), (20, 10)]   # crosses itself
+    ]
+    assert conflicting_arcs(arcs) == [0, 2, 3]
+
+@pytest.mark.parametrize('name', ['congressional', 'state_house', 'state_senate'])
+def test_levels_are_valid_and_do_not_overlap(name, tmp_path):
+    if not os.path.exists(TOPOLOGY_LAYERS[name]['path']):
+        pytest.skip(f"{TOPOLOGY_LAYERS[name]['path']} not found")
+    topology_export.export_layer(name, str(tmp_path))
+    
+    for level in SIMPLIFY_LEVELS:
+        with open(tmp_path / name / f"{level}.topojson") as f:
+            features = decode_topology(json.load(f))
+        ids = list(features)
+        geometries = np.array([features[i] for i in ids])
+        
+        invalid = [ids[i] for i in np.flatnonzero(~shapely.is_valid(geometries))]
+        assert invalid == [], f"{name} {level}: invalid districts {invalid}"
+        
+        left, right = shapely.STRtree(geometries).query(geometries, predicate='intersects')
+        pairs = left < right
+        areas = shapely.area(shapely.intersection(geometries[left[pairs]], geometries[right[pairs]]))
+        overlaps = [(ids[i], ids[j]) for i, j, area in zip(left[pairs], right[pairs], areas) if area > 1e-12]
+        assert overlaps == [], f"{name} {level}: overlapping districts {overlaps}"
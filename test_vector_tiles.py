@@ -0,0 +1,29 @@
+"""The TileJSON tile template resolves to the tiles written next to metadata.json."""
+
+import glob
+import json
+import os
+import pathlib
+from urllib.parse import urljoin
+import pytest
+import vector_tiles
+from build_cache import BuildCache
+from topology_export import TOPOLOGY_LAYERS
+
+def test_tile_template_resolves_to_generated_tiles(tmp_path, monkeypatch):
+    if not os.path.exists(TOPOLOGY_LAYERS['congressional']['path']):
+        pytest.skip("congressional plan not found")
+    monkeypatch.setattr(vector_tiles, 'BuildCache', lambda: BuildCache(str(tmp_path / 'cache')))
+    tiles_dir = str(tmp_path / 'tiles')
+    vector_tiles.generate_tiles(['congressional'], min_zoom=4, max_zoom=5, force=True, tiles_dir=tiles_dir)
+    
+    metadata_path = os.path.join(tiles_dir, 'congressional', 'metadata.json')
+    with open(metadata_path) as f:
+        (template,) = json.load(f)['tiles']
+    tiles = glob.glob(os.path.join(tiles_dir, 'congressional', '5', '*', '*.pbf'))
+    assert tiles
+    
+    # Resolve the template as a browser would, against the URL metadata.json was fetched from
+    z, x, y = tiles[0][:-len('.pbf')].split(os.sep)[-3:]
+    url = urljoin(pathlib.Path(metadata_path).as_uri(), template.replace('{z}', z).replace('{x}', x).replace('{y}', y))
+    assert url == pathlib.Path(tiles[0]).as_uri()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Export the district layers as multi-resolution TopoJSON.
+
+Each layer's rings are quantized and split at junctions into arcs, and every
+border shared by two districts is stored once. Simplification runs on those
+shared arcs with their endpoints fixed, so at every level neighbouring
+districts still meet exactly: no gaps or overlaps. Simplified arcs are snapped
+to the level's grid and checked against each other; an arc that crosses itself
+or touches another arc anywhere but a shared endpoint is simplified again at a
+quarter of the tolerance, down to none at all. Where snapping alone still
+makes arcs cross, the level is written on a finer grid, so every district
+that is valid in the source stays valid at every level. Each layer is written once
+per zoom level (statewide, regional, street), and data/topo/manifest.json lists
+the files so the map can load the coarse level first and refine on zoom.
+"""
+
+import argparse
+import json
+import math
+import os
+import numpy as np
+import pandas as pd
+import shapely
+from build_cache import BuildCache, shapefile_inputs, write_if_changed
+from shapefile_cache import read_shapefile
+
+TOPO_DIR = 'data/topo'
+
+# County boundaries are not part of the repo; the layer is skipped if the file is absent
+COUNTY_BOUNDARIES = './Florida_County_Boundaries_with_FDOT_Districts_6074369993038631266.geojson'
+
+# Layers to export: source file, id field and the properties kept on each feature
+TOPOLOGY_LAYERS = {
+    'congressional': {
+        'path': 'data/S000C8004/S000C8004.shp',
+        'id': 'DISTRICT',
+        'properties': ['DISTRICT', 'LONGNAME', 'SHORTNAME']
+    },
+    'state_house': {
+        'path': 'H000H8013/H000H8013.shp',
+        'id': 'DISTRICT',
+        'properties': ['DISTRICT', 'LONGNAME', 'SHORTNAME']
+    },
+    'state_senate': {
+        'path': 'data/S027S8058/S027S8058.shp',
+        'id': 'DISTRICT',
+        'properties': ['DISTRICT', 'LONGNAME', 'SHORTNAME']
+    },
+    'counties': {
+        'path': COUNTY_BOUNDARIES,
+        'id': None,
+        'properties': None
+    }
+}
+
+# Quantization the shared arcs are built at (grid steps across the layer's extent)
+BASE_QUANTIZATION = 1_000_000
+
+# Per zoom level: simplification tolerance in degrees (~111 km per degree),
+# output quantization and the zoom the level is meant to be shown from
+SIMPLIFY_LEVELS = {
+    'statewide': {'tolerance': 0.005, 'quantization': 10_000, 'min_zoom': 0},
+    'regional': {'tolerance': 0.0008, 'quantization': 100_000, 'min_zoom': 8},
+    'street': {'tolerance': 0.00005, 'quantization': 1_000_000, 'min_zoom': 11}
+}
+
+# Times a conflicting arc's tolerance is quartered before it is kept unsimplified
+MAX_REFINEMENTS = 4
+
+def polygon_parts(geometry):
+    """Return a list of polygons, each a list of rings of (x, y) coordinate tuples"""
+    if geometry is None or geometry.is_empty:
+        return []
+    polygons = geometry.geoms if geometry.geom_type == 'MultiPolygon' else [geometry]
+    return [
+        [list(polygon.exterior.coords)] + [list(ring.coords) for ring in polygon.interiors]
+        for polygon in polygons
+    ]
+
+def quantize_ring(ring, x0, y0, kx, ky):
+    """Snap a ring to the integer grid, dropping repeated points; None if it collapses"""
+    points = []
+    for x, y in ring:
+        point = (int(round((x - x0) * kx)), int(round((y - y0) * ky)))
+        if not points or point != points[-1]:
+            points.append(point)
+    if points[0] != points[-1]:
+        points.append(points[0])
+    return points if len(points) >= 4 else None
+
+def find_junctions(rings):
+    """Points where rings stop sharing a border: seen with more than one pair of neighbours"""
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring) - 1
+        for i in range(n):
+            previous, following = ring[i - 1] if i else ring[n - 1], ring[i + 1]
+            pair = (previous, following) if previous < following else (following, previous)
+            seen = neighbours.setdefault(ring[i], pair)
+            if seen != pair:
+                junctions.add(ring[i])
+    return junctions
+
+def split_ring(ring, junctions):
+    """Cut a closed ring into arcs that start and end at junctions"""
+    points = ring[:-1]
+    cuts = [i for i, point in enumerate(points) if point in junctions]
+    if not cuts:
+        # A ring touching nothing is one closed arc; start it at its smallest point
+        # so the same ring seen from another feature produces the same arc
+        start = points.index(min(points))
+        rotated = points[start:] + points[:start]
+        return [rotated + [rotated[0]]]
+    
+    rotated = points[cuts[0]:] + points[:cuts[0]]
+    rotated.append(rotated[0])
+    arcs = []
+    current = [rotated[0]]
+    for point in rotated[1:]:
+        current.append(point)
+        if point in junctions:
+            arcs.append(current)
+            current = [point]
+    return arcs
+
+def build_topology(gdf):
+    """Build shared arcs for a layer.
+    
+    Returns (arcs, features, transform), where each feature is a list of
+    polygons, each polygon a list of rings, and each ring a list of arc indices
+    (~index for an arc used backwards).
+    """
+    x0, y0, x1, y1 = gdf.total_bounds
+    kx = (BASE_QUANTIZATION - 1) / ((x1 - x0) or 1)
+    ky = (BASE_QUANTIZATION - 1) / ((y1 - y0) or 1)
+    
+    quantized = []
+    for geometry in gdf.geometry:
+        feature = []
+        for polygon in polygon_parts(geometry):
+            rings = [quantize_ring(ring, x0, y0, kx, ky) for ring in polygon]
+            if rings[0] is not None:
+                feature.append([ring for ring in rings if ring is not None])
+        quantized.append(feature)
+    
+    junctions = find_junctions(ring for feature in quantized for polygon in feature for ring in polygon)
+    
+    arcs = []
+    arc_index = {}
+    features = []
+    for feature in quantized:
+        topo_feature = []
+        for polygon in feature:
+            topo_polygon = []
+            for ring in polygon:
+                ring_arcs = []
+                for arc in split_ring(ring, junctions):
+                    key = tuple(arc)
+                    if key in arc_index:
+                        ring_arcs.append(arc_index[key])
+                    elif key[::-1] in arc_index:
+                        ring_arcs.append(~arc_index[key[::-1]])
+                    else:
+                        arc_index[key] = len(arcs)
+                        ring_arcs.append(len(arcs))
+                        arcs.append(arc)
+                topo_polygon.append(ring_arcs)
+            topo_feature.append(topo_polygon)
+        features.append(topo_feature)
+    
+    transform = {
+        'scale': [1 / kx, 1 / ky],
+        'translate': [float(x0), float(y0)]
+    }
+    return arcs, features, transform
+
+def simplify_arc(arc, tolerance):
+    """Douglas-Peucker simplification of one arc with its endpoints fixed.
+    
+    The farthest interior point is always kept (two for a closed arc) so a
+    ring never collapses below a triangle, whatever the tolerance.
+    """
+    n = len(arc)
+    if n <= 2:
+        return arc
+    points = np.asarray(arc, dtype=float)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    
+    closed = arc[0] == arc[-1]
+    if closed:
+        far = int(np.argmax(((points - points[0]) ** 2).sum(axis=1)))
+        keep[far] = True
+        stack = [(0, far, True), (far, n - 1, True)]
+    else:
+        stack = [(0, n - 1, True)]
+    
+    while stack:
+        a, b, force = stack.pop()
+        if b - a < 2:
+            continue
+        segment = points[b] - points[a]
+        offsets = points[a + 1:b] - points[a]
+        length = math.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        i = int(np.argmax(distances))
+        if force or distances[i] > tolerance:
+            keep[a + 1 + i] = True
+            stack.append((a, a + 1 + i, False))
+            stack.append((a + 1 + i, b, False))
+    
+    return [arc[i] for i in np.flatnonzero(keep)]
+
+def requantize_arc(arc, factor):
+    """Snap an arc to the output grid (factor times the base grid), dropping repeated points"""
+    points = []
+    for x, y in arc:
+        point = (int(round(x * factor)), int(round(y * factor)))
+        if not points or point != points[-1]:
+            points.append(point)
+    if len(points) == 1:
+        points.append(points[0])
+    return points
+
+def conflicting_arcs(arcs):
+    """Indices of output-grid arcs that collapsed, cross themselves, or meet another arc off their endpoints"""
+    sizes = np.array([len(arc) for arc in arcs])
+    lines = shapely.linestrings(np.concatenate(arcs), indices=np.repeat(np.arange(len(arcs)), sizes))
+    ends = shapely.multipoints([point for arc in arcs for point in (arc[0], arc[-1])],
+                               indices=np.repeat(np.arange(len(arcs)), 2))
+    closed = np.array([arc[0] == arc[-1] for arc in arcs])
+    
+    # A closed arc needs three distinct points to stay a ring, an open one two
+    bad = set(np.flatnonzero((closed & (sizes < 4)) | (~closed & (sizes < 2))).tolist())
+    bad.update(np.flatnonzero(~shapely.is_simple(lines)).tolist())
+    
+    # Arcs may only meet at the junctions they share
+    left, right = shapely.STRtree(lines).query(lines, predicate='intersects')
+    pairs = left < right
+    left, right = left[pairs], right[pairs]
+    shared = shapely.intersection(ends[left], ends[right])
+    stray = ~shapely.is_empty(shapely.difference(shapely.intersection(lines[left], lines[right]), shared))
+    bad.update(left[stray].tolist())
+    bad.update(right[stray].tolist())
+    return sorted(bad)
+
+def simplify_arcs(arcs, tolerance, factor):
+    """Simplify and requantize every arc, refining the tolerance of arcs that conflict.
+    
+    Returns (arcs, conflicts): the indices of arcs that still conflict unsimplified.
+    """
+    tolerances = [tolerance] * len(arcs)
+    simplified = [requantize_arc(simplify_arc(arc, tolerance), factor) for arc in arcs]
+    for refinement in range(MAX_REFINEMENTS + 1):
+        conflicts = [i for i in conflicting_arcs(simplified) if tolerances[i] > 0]
+        if not conflicts:
+            break
+        for i in conflicts:
+            tolerances[i] = tolerances[i] / 4 if refinement < MAX_REFINEMENTS else 0
+            simplified[i] = requantize_arc(simplify_arc(arcs[i], tolerances[i]), factor)
+    return simplified, [i for i in conflicting_arcs(simplified) if tolerances[i] == 0]
+
+def encode_arcs(arcs):
+    """Delta-encode output-grid arcs as TopoJSON expects"""
+    encoded = []
+    for points in arcs:
+        deltas = [list(points[0])]
+        deltas.extend([x - px, y - py] for (px, py), (x, y) in zip(points, points[1:]))
+        encoded.append(deltas)
+    return encoded
+
+def json_value(value):
+    """Convert numpy/pandas scalars to plain JSON values"""
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NA:
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def layer_topology(name, gdf, arcs, features, transform, level):
+    """Assemble the TopoJSON document for one layer at one simplification level"""
+    settings = SIMPLIFY_LEVELS[level]
+    tolerance = settings['tolerance'] / transform['scale'][0]
+    quantization = settings['quantization']
+    while True:
+        factor = (quantization - 1) / (BASE_QUANTIZATION - 1)
+        simplified, conflicts = simplify_arcs(arcs, tolerance, factor)
+        if not conflicts or quantization >= BASE_QUANTIZATION:
+            break
+        # Snapping to this grid alone makes arcs cross; the base grid never does
+        quantization = min(quantization * 2, BASE_QUANTIZATION)
+        print(f"  {level}: {len(conflicts)} arcs cross on the output grid, quantizing to {quantization:,}")
+    
+    properties = [c for c in gdf.columns if c != 'geometry']
+    geometries = []
+    for (_, row), polygons in zip(gdf.iterrows(), features):
+        if not polygons:
+            continue
+        geometry = {
+            'type': 'Polygon' if len(polygons) == 1 else 'MultiPolygon',
+            'arcs': polygons[0] if len(polygons) == 1 else polygons,
+            'properties': {column: json_value(row[column]) for column in properties}
+        }
+        layer_id = TOPOLOGY_LAYERS[name]['id']
+        if layer_id:
+            geometry['id'] = json_value(row[layer_id])
+        geometries.append(geometry)
+    
+    return {
+        'type': 'Topology',
+        'transform': {
+            'scale': [s / factor for s in transform['scale']],
+            'translate': transform['translate']
+        },
+        'objects': {name: {'type': 'GeometryCollection', 'geometries': geometries}},
+        'arcs': encode_arcs(simplified)
+    }
+
+def read_layer(name):
+    """Read a layer in WGS84 with just the properties it exports"""
+    layer = TOPOLOGY_LAYERS[name]
+    gdf = read_shapefile(layer['path'], columns=layer['properties'])
+    if gdf.crs is not None and gdf.crs != 'EPSG:4326':
+        gdf = gdf.to_crs('EPSG:4326')
+    return gdf
+
+def export_layer(name, topo_dir=TOPO_DIR):
+    """Write every simplification level of one layer; returns {level: (path, bytes)}"""
+    print(f"Building topology for {name}...")
+    gdf = read_layer(name)
+    arcs, features, transform = build_topology(gdf)
+    print(f"  {len(gdf)} features, {len(arcs)} shared arcs, {sum(len(a) for a in arcs):,} vertices")
+    
+    written = {}
+    for level in SIMPLIFY_LEVELS:
+        path = os.path.join(topo_dir, name, f"{level}.topojson")
+        text = json.dumps(layer_topology(name, gdf, arcs, features, transform, level), separators=(',', ':'))
+        write_if_changed(path, text)
+        written[level] = (path, len(text.encode('utf-8')))
+        print(f"  {level}: {written[level][1]:,} bytes -> {path}")
+    return written
+
+def export_topology(layers=None, force=False, topo_dir=TOPO_DIR):
+    """Export the requested layers (default: all whose source exists) and update the manifest"""
+    cache = BuildCache()
+    manifest_path = os.path.join(topo_dir, 'manifest.json')
+    manifest = {'levels': {level: {'min_zoom': s['min_zoom']} for level, s in SIMPLIFY_LEVELS.items()}, 'layers': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest['layers'] = json.load(f).get('layers', {})
+    
+    for name in layers or TOPOLOGY_LAYERS:
+        source = TOPOLOGY_LAYERS[name]['path']
+        if not os.path.exists(source):
+            print(f"Skipping {name}: {source} not found")
+            continue
+        
+        inputs = shapefile_inputs(source) + [__file__]
+        outputs = [os.path.join(topo_dir, name, f"{level}.topojson") for level in SIMPLIFY_LEVELS]
+        if not force and name in manifest['layers'] and cache.is_fresh(f"topology/{name}", inputs, outputs):
+            print(f"{name}: unchanged, skipping")
+            continue
+        
+        written = export_layer(name, topo_dir)
+        manifest['layers'][name] = {
+            level: {'path': os.path.relpath(path, topo_dir), 'bytes': size}
+            for level, (path, size) in written.items()
+        }
+        cache.record(f"topology/{name}", inputs, outputs)
+    
+    write_if_changed(manifest_path, json.dumps(manifest, indent=2))
+    cache.save()
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export district layers as multi-resolution TopoJSON")
+    parser.add_argument('layers', nargs='*',
+                        help=f"layers to export, from {', '.join(TOPOLOGY_LAYERS)} (default: all)")
+    parser.add_argument('--force', action='store_true',
+                        help="rebuild layers even if their source is unchanged")
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.layers if name not in TOPOLOGY_LAYERS]
+    if unknown:
+        parser.error(f"unknown layers: {', '.join(unknown)}")
+    
+    export_topology(args.layers or None, force=args.force)
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Cut the county and district layers into an offline vector tile pyramid.
+
+Each layer becomes a z/x/y directory of Mapbox Vector Tiles under
+data/tiles/<layer>/ plus a TileJSON metadata.json, so the map can add it as a
+{type: 'vector'} source and stream only the tiles on screen. Tiles carry just
+the properties needed for styling: the feature id/name and, where results
+exist, a two-party margin per contest. Zoom levels are rendered in parallel
+worker processes, and a layer is only re-tiled when its source changes.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import struct
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import shapely
+from shapely.geometry.polygon import orient
+from build_cache import BuildCache, shapefile_inputs, write_if_changed
+from registry import county_match_key
+from topology_export import TOPOLOGY_LAYERS, read_layer
+
+TILES_DIR = 'data/tiles'
+MIN_ZOOM = 4
+MAX_ZOOM = 10
+
+# MVT tile coordinate space and the margin kept around each tile so polygon
+# edges don't show seams where tiles meet
+EXTENT = 4096
+BUFFER = 64
+
+# Half the width of the Web Mercator world in metres
+MERCATOR_HALF_WORLD = 20037508.342789244
+
+# Result columns joined onto each layer for styling
+TILE_LAYERS = {
+    'counties': {
+        'name_field': None,
+        'results': 'data/fl_county_election_results.csv',
+        'join': 'county'
+    },
+    'congressional': {
+        'name_field': 'DISTRICT',
+        'results': 'data/fl_congressional_election_results.csv',
+        'join': 'district',
+        # S000C8004 is the plan in force from the 2022 election on
+        'years': [2022, 2024]
+    },
+    'state_senate': {
+        'name_field': 'DISTRICT',
+        'results': None
+    },
+    'state_house': {
+        'name_field': 'DISTRICT',
+        'results': None
+    }
+}
+
+# Features of the layers being rendered, loaded once per worker process
+_LAYER_DATA = {}
+
+def result_margins(results_path, join, years=None):
+    """Map each county/district to {'<office>_<year>': margin in tenths of a percent}.
+    
+    Margin is (dem - rep) / (dem + rep), the same definition the map uses;
+    contests without votes are left out.
+    """
+    df = pd.read_csv(results_path)
+    if years is not None:
+        df = df[df['year'].isin(years)]
+    
+    margins = {}
+    offices = [c[:-len('_dem')] for c in df.columns if c.endswith('_dem')]
+    for _, row in df.iterrows():
+        key = county_match_key(row[join]) if join == 'county' else int(row[join])
+        entry = margins.setdefault(key, {})
+        for office in offices:
+            dem, rep = row[f"{office}_dem"], row[f"{office}_rep"]
+            if dem + rep > 0:
+                entry[f"{office}_{row['year']}"] = int(round(1000 * (dem - rep) / (dem + rep)))
+    return margins
+
+def feature_properties(name, row, margins):
+    """The small property set each tile feature carries"""
+    config = TILE_LAYERS[name]
+    if config['name_field']:
+        key = int(row[config['name_field']])
+        properties = {'district': key}
+    else:
+        label = row.get('COUNTYNAME', row.get('NAME', row.get('County', '')))
+        key = county_match_key(label)
+        properties = {'county': str(label)}
+    properties.update(margins.get(key, {}))
+    return properties
+
+def load_layer(name):
+    """Read a layer, project it to Web Mercator and attach its styling properties"""
+    gdf = read_layer(name).to_crs('EPSG:3857')
+    
+    config = TILE_LAYERS[name]
+    margins = {}
+    if config['results'] and os.path.exists(config['results']):
+        margins = result_margins(config['results'], config['join'], config.get('years'))
+    
+    properties = [feature_properties(name, row, margins) for _, row in gdf.iterrows()]
+    return gdf.geometry.values, properties
+
+def _init_worker(names):
+    for name in names:
+        _LAYER_DATA[name] = load_layer(name)
+
+def tile_bounds(z, x, y):
+    """Web Mercator bounds (minx, miny, maxx, maxy) of a tile"""
+    size = 2 * MERCATOR_HALF_WORLD / (1 << z)
+    minx = -MERCATOR_HALF_WORLD + x * size
+    maxy = MERCATOR_HALF_WORLD - y * size
+    return minx, maxy - size, minx + size, maxy
+
+def tile_range(bounds, z):
+    """Inclusive x and y tile index ranges covering Web Mercator bounds"""
+    size = 2 * MERCATOR_HALF_WORLD / (1 << z)
+    last = (1 << z) - 1
+    minx, miny, maxx, maxy = bounds
+    x0 = min(last, max(0, int((minx + MERCATOR_HALF_WORLD) // size)))
+    x1 = min(last, max(0, int((maxx + MERCATOR_HALF_WORLD) // size)))
+    y0 = min(last, max(0, int((MERCATOR_HALF_WORLD - maxy) // size)))
+    y1 = min(last, max(0, int((MERCATOR_HALF_WORLD - miny) // size)))
+    return range(x0, x1 + 1), range(y0, y1 + 1)
+
+# --- Minimal protobuf / MVT encoding ---
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+def _field(number, wire_type):
+    return _varint((number << 3) | wire_type)
+
+def _bytes_field(number, payload):
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+def _packed_field(number, values):
+    return _bytes_field(number, b''.join(_varint(v) for v in values))
+
+def _encode_value(value):
+    if isinstance(value, bool):
+        return _field(7, 0) + _varint(int(value))
+    if isinstance(value, int):
+        if value >= 0:
+            return _field(5, 0) + _varint(value)
+        return _field(6, 0) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _field(3, 1) + struct.pack('<d', value)
+    return _bytes_field(1, str(value).encode('utf-8'))
+
+def _encode_polygon_rings(polygons):
+    """MVT geometry commands for polygons whose rings are in integer tile coordinates"""
+    commands = []
+    cx = cy = 0
+    for polygon in polygons:
+        for ring in [polygon.exterior] + list(polygon.interiors):
+            points = [(int(x), int(y)) for x, y in ring.coords[:-1]]
+            if len(points) < 3:
+                continue
+            x, y = points[0]
+            commands += [(1 << 3) | 1, _zigzag(x - cx), _zigzag(y - cy)]
+            cx, cy = x, y
+            commands.append(((len(points) - 1) << 3) | 2)
+            for x, y in points[1:]:
+                commands += [_zigzag(x - cx), _zigzag(y - cy)]
+                cx, cy = x, y
+            commands.append((1 << 3) | 7)
+    return commands
+
+def encode_tile_layer(name, features):
+    """Encode one MVT layer from (feature_id, polygons, properties) tuples"""
+    keys, values = {}, {}
+    encoded_features = []
+    for feature_id, polygons, properties in features:
+        geometry = _encode_polygon_rings(polygons)
+        if not geometry:
+            continue
+        tags = []
+        for key, value in properties.items():
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault((type(value).__name__, value), len(values)))
+        encoded_features.append(
+            _field(1, 0) + _varint(feature_id)
+            + _packed_field(2, tags)
+            + _field(3, 0) + _varint(3)
+            + _packed_field(4, geometry)
+        )
+    if not encoded_features:
+        return b''
+    
+    layer = _field(15, 0) + _varint(2) + _bytes_field(1, name.encode('utf-8'))
+    layer += b''.join(_bytes_field(2, f) for f in encoded_features)
+    layer += b''.join(_bytes_field(3, k.encode('utf-8')) for k in keys)
+    layer += b''.join(_bytes_field(4, _encode_value(v)) for _, v in values)
+    layer += _field(5, 0) + _varint(EXTENT)
+    return _bytes_field(3, layer)
+
+def tile_polygons(geometry, bounds):
+    """Clip a Web Mercator geometry to a buffered tile and convert it to tile coordinates"""
+    minx, miny, maxx, maxy = bounds
+    scale = EXTENT / (maxx - minx)
+    pad = BUFFER / scale
+    clipped = shapely.clip_by_rect(geometry, minx - pad, miny - pad, maxx + pad, maxy + pad)
+    if clipped.is_empty:
+        return []
+    
+    local = shapely.transform(clipped, lambda c: (c - [minx, maxy]) * [scale, -scale])
+    local = shapely.set_precision(local, grid_size=1.0)
+    
+    # MVT wants exterior rings with positive area in (y-down) tile coordinates
+    return [orient(part, sign=1.0) for part in shapely.get_parts(local)
+            if part.geom_type == 'Polygon' and not part.is_empty]
+
+def render_zoom(name, z, tiles_dir=TILES_DIR):
+    """Write every non-empty tile of one layer at one zoom level; returns the tile count"""
+    geometries, properties = _LAYER_DATA[name]
+    
+    # About one tile unit of detail at this zoom
+    tolerance = 2 * MERCATOR_HALF_WORLD / (1 << z) / EXTENT
+    simplified = shapely.simplify(geometries, tolerance, preserve_topology=True)
+    tree = shapely.STRtree(simplified)
+    
+    tiles = set()
+    for bounds in shapely.bounds(simplified):
+        xs, ys = tile_range(bounds, z)
+        tiles.update((x, y) for x in xs for y in ys)
+    
+    written = 0
+    for x, y in sorted(tiles):
+        bounds = tile_bounds(z, x, y)
+        features = []
+        for i in sorted(tree.query(shapely.box(*bounds))):
+            polygons = tile_polygons(simplified[i], bounds)
+            if polygons:
+                features.append((int(i) + 1, polygons, properties[i]))
+        data = encode_tile_layer(name, features)
+        if not data:
+            continue
+        path = os.path.join(tiles_dir, name, str(z), str(x), f"{y}.pbf")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        written += 1
+    return written
+
+def _render_task(task):
+    name, z, tiles_dir = task
+    return name, z, render_zoom(name, z, tiles_dir)
+
+def tilejson(name, min_zoom, max_zoom):
+    """TileJSON metadata describing one layer's pyramid, written next to its z/ directories"""
+    geometries, properties = _LAYER_DATA[name]
+    minx, miny, maxx, maxy = shapely.total_bounds(geometries)
+    to_lon = lambda x: math.degrees(x / 6378137.0)
+    to_lat = lambda y: math.degrees(2 * math.atan(math.exp(y / 6378137.0)) - math.pi / 2)
+    fields = sorted({key for p in properties for key in p})
+    return {
+        'tilejson': '3.0.0',
+        'name': name,
+        'format': 'pbf',
+        'scheme': 'xyz',
+        # Relative to metadata.json itself, so the pyramid resolves wherever it is served from
+        'tiles': ['{z}/{x}/{y}.pbf'],
+        'minzoom': min_zoom,
+        'maxzoom': max_zoom,
+        'bounds': [to_lon(minx), to_lat(miny), to_lon(maxx), to_lat(maxy)],
+        'vector_layers': [{
+            'id': name,
+            'fields': {field: 'String' if field == 'county' else 'Number' for field in fields},
+            'minzoom': min_zoom,
+            'maxzoom': max_zoom
+        }]
+    }
+
+def generate_tiles(layers=None, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM, workers=1, force=False, tiles_dir=TILES_DIR):
+    """Tile every requested layer whose source changed, one worker task per layer and zoom"""
+    cache = BuildCache()
+    stale = []
+    for name in layers or TILE_LAYERS:
+        source = TOPOLOGY_LAYERS[name]['path']
+        if not os.path.exists(source):
+            print(f"Skipping {name}: {source} not found")
+            continue
+        results = TILE_LAYERS[name]['results']
+        inputs = shapefile_inputs(source) + ([results] if results and os.path.exists(results) else []) + [__file__]
+        metadata = os.path.join(tiles_dir, name, 'metadata.json')
+        key = f"tiles/{name}/{min_zoom}-{max_zoom}"
+        if not force and cache.is_fresh(key, inputs, [metadata]):
+            print(f"{name}: unchanged, skipping")
+            continue
+        stale.append((name, key, inputs, metadata))
+    
+    if not stale:
+        return
+    
+    names = [name for name, _, _, _ in stale]
+    for name in names:
+        shutil.rmtree(os.path.join(tiles_dir, name), ignore_errors=True)
+    tasks = [(name, z, tiles_dir) for name in names for z in range(min_zoom, max_zoom + 1)]
+    
+    print(f"Rendering {len(tasks)} layer/zoom tasks...")
+    if workers == 1:
+        _init_worker(names)
+        rendered = [_render_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or None, initializer=_init_worker, initargs=(names,)) as pool:
+            rendered = list(pool.map(_render_task, tasks))
+        _init_worker(names)
+    for name, z, count in rendered:
+        print(f"  {name} z{z}: {count} tiles")
+    
+    for name, key, inputs, metadata in stale:
+        write_if_changed(metadata, json.dumps(tilejson(name, min_zoom, max_zoom), indent=2))
+        cache.record(key, inputs, [metadata])
+    cache.save()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate offline vector tiles for counties and district plans")
+    parser.add_argument('layers', nargs='*',
+                        help=f"layers to tile, from {', '.join(TILE_LAYERS)} (default: all)")
+    parser.add_argument('--min-zoom', type=int, default=MIN_ZOOM)
+    parser.add_argument('--max-zoom', type=int, default=MAX_ZOOM)
+    parser.add_argument('--workers', type=int, default=0,
+                        help="worker processes, one zoom level each (0 = one per CPU core)")
+    parser.add_argument('--force', action='store_true',
+                        help="re-tile layers even if their source is unchanged")
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.layers if name not in TILE_LAYERS]
+    if unknown:
+        parser.error(f"unknown layers: {', '.join(unknown)}")
+    
+    generate_tiles(args.layers or None, args.min_zoom, args.max_zoom, workers=args.workers, force=args.force)